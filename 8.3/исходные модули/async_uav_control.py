@@ -0,0 +1,608 @@
+# async_uav_control.py
+
+from pymavlink import mavutil
+from uav_control import (TELEMETRY_TYPES, ARRIVAL_TYPES, ModeTable, MissionUpload, telemetry_from_messages,
+                         merged_snapshot, mode_condition, arrival_condition, send_position_target)
+from mission_files import MissionItem, ItemWindow
+from telemetry_snapshot import TelemetrySnapshot
+import asyncio
+import time
+from typing import Optional, Dict, Any, Iterable, Callable, List, Sequence, Tuple, AsyncIterator, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSubscription:
+    """
+    Асинхронная подписка на входящие сообщения выбранных типов.
+    """
+
+    def __init__(self, owner: 'AsyncUAVControl', types: Optional[Iterable[str]] = None,
+                 condition: Optional[Callable[[Any], bool]] = None):
+        """
+        Создание подписки.
+
+        Args:
+            owner (AsyncUAVControl): Владелец подписки.
+            types (Optional[Iterable[str]]): Типы сообщений (None — все типы).
+            condition (Optional[Callable[[Any], bool]]): Дополнительный фильтр сообщений.
+        """
+        self.owner = owner
+        self.types = set(types) if types is not None else None
+        self.condition = condition
+        self._queue: 'asyncio.Queue[Any]' = asyncio.Queue()
+
+    def offer(self, msg: Any) -> None:
+        """
+        Передача сообщения в подписку (вызывается читателем соединения).
+
+        Args:
+            msg (Any): Декодированное сообщение MAVLink.
+        """
+        if self.types is not None and msg.get_type() not in self.types:
+            return
+        if self.condition is not None and not self.condition(msg):
+            return
+        self._queue.put_nowait(msg)
+
+    async def get(self, timeout: float) -> Optional[Any]:
+        """
+        Ожидание следующего сообщения подписки.
+
+        Args:
+            timeout (float): Время ожидания в секундах.
+
+        Returns:
+            Optional[Any]: Сообщение или None, если время ожидания истекло.
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        """
+        Отключение подписки.
+        """
+        self.owner.unsubscribe(self)
+
+    def __enter__(self) -> 'AsyncSubscription':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class AsyncUAVControl:
+    """
+    Асинхронное управление БПЛА через MAVLink.
+
+    Соединение читается без блокировок из цикла событий asyncio, поэтому
+    в одном процессе можно одновременно управлять несколькими БПЛА
+    с помощью asyncio.gather.
+    """
+
+    def __init__(self, master: Any, poll_interval: float = 0.01):
+        """
+        Инициализация поверх уже открытого соединения.
+
+        Args:
+            master (Any): Соединение MAVLink (mavutil.mavlink_connection).
+            poll_interval (float): Период опроса соединения без файлового дескриптора.
+        """
+        self.master = master
+        self.poll_interval = poll_interval
+        self._latest: Dict[str, Any] = {}
+        self._received_at: Dict[str, float] = {}
+        self._subscriptions: List[AsyncSubscription] = []
+        self._pending_acks: Dict[Tuple[int, int], List[asyncio.Future]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader_fd: Optional[int] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._modes = ModeTable(master)
+
+    @classmethod
+    async def connect(cls, connection_string: str, timeout: float = 30) -> 'AsyncUAVControl':
+        """
+        Открытие соединения и ожидание первого HEARTBEAT.
+
+        Args:
+            connection_string (str): Строка подключения MAVLink.
+            timeout (float): Время ожидания HEARTBEAT в секундах.
+
+        Returns:
+            AsyncUAVControl: Готовый к работе экземпляр.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            master = await loop.run_in_executor(None, mavutil.mavlink_connection, connection_string)
+            uav = cls(master)
+            uav.start()
+            if await uav.wait_heartbeat(timeout) is None:
+                raise Exception("Не получен HEARTBEAT от БПЛА")
+            logger.info("Соединение установлено")
+            return uav
+        except Exception as e:
+            logger.error(f"Ошибка подключения: {e}")
+            raise
+
+    def start(self) -> None:
+        """
+        Подключение неблокирующего чтения соединения к текущему циклу событий.
+        """
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        fd = getattr(self.master, 'fd', None)
+        if isinstance(fd, int):
+            try:
+                self._loop.add_reader(fd, self._drain)
+                self._reader_fd = fd
+                return
+            except (NotImplementedError, ValueError, OSError):
+                pass
+        self._poll_task = self._loop.create_task(self._poll_loop())
+
+    async def close(self) -> None:
+        """
+        Остановка чтения и закрытие соединения.
+        """
+        if self._reader_fd is not None:
+            self._loop.remove_reader(self._reader_fd)
+            self._reader_fd = None
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        self._loop = None
+        self.master.close()
+        logger.info("Соединение закрыто")
+
+    async def _poll_loop(self) -> None:
+        while True:
+            self._drain()
+            await asyncio.sleep(self.poll_interval)
+
+    def _drain(self) -> None:
+        """
+        Чтение всех уже пришедших сообщений без ожидания.
+        """
+        while True:
+            try:
+                msg = self.master.recv_msg()
+            except Exception as e:
+                logger.error(f"Ошибка приёма MAVLink: {e}")
+                return
+            if msg is None:
+                return
+            if msg.get_type() != 'BAD_DATA':
+                self.dispatch(msg)
+
+    def dispatch(self, msg: Any) -> None:
+        """
+        Сохранение сообщения в кэше и передача его ожидающим корутинам.
+
+        Args:
+            msg (Any): Декодированное сообщение MAVLink.
+        """
+        msg_type = msg.get_type()
+        self._latest[msg_type] = msg
+        self._received_at[msg_type] = time.time()
+        if msg_type == 'COMMAND_ACK':
+            self._route_ack(msg)
+        for subscription in list(self._subscriptions):
+            subscription.offer(msg)
+
+    def _route_ack(self, msg: Any) -> None:
+        futures = self._pending_acks.get((msg.command, msg.get_srcSystem()))
+        while futures:
+            future = futures.pop(0)
+            if not future.done():
+                future.set_result(msg)
+                return
+
+    def latest(self, msg_type: str) -> Optional[Any]:
+        """
+        Последнее принятое сообщение заданного типа.
+
+        Args:
+            msg_type (str): Тип сообщения MAVLink.
+
+        Returns:
+            Optional[Any]: Сообщение или None.
+        """
+        return self._latest.get(msg_type)
+
+    def subscribe(self, types: Optional[Iterable[str]] = None,
+                  condition: Optional[Callable[[Any], bool]] = None) -> AsyncSubscription:
+        """
+        Создание подписки на входящие сообщения.
+
+        Args:
+            types (Optional[Iterable[str]]): Типы сообщений (None — все типы).
+            condition (Optional[Callable[[Any], bool]]): Дополнительный фильтр.
+
+        Returns:
+            AsyncSubscription: Подписка; её нужно закрыть после использования.
+        """
+        subscription = AsyncSubscription(self, types, condition)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AsyncSubscription) -> None:
+        """
+        Удаление подписки.
+
+        Args:
+            subscription (AsyncSubscription): Ранее созданная подписка.
+        """
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def _from_target(self, msg: Any) -> bool:
+        return msg.get_srcSystem() == self.master.target_system
+
+    async def wait_heartbeat(self, timeout: float = 10) -> Optional[Any]:
+        """
+        Ожидание HEARTBEAT от БПЛА.
+
+        Args:
+            timeout (float): Время ожидания в секундах.
+
+        Returns:
+            Optional[Any]: Сообщение HEARTBEAT или None.
+        """
+        with self.subscribe(['HEARTBEAT']) as sub:
+            return await sub.get(timeout)
+
+    async def _wait_armed_state(self, armed: bool, timeout: float) -> None:
+        def condition(msg: Any) -> bool:
+            if not self._from_target(msg):
+                return False
+            return bool(msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED) == armed
+
+        with self.subscribe(['HEARTBEAT'], condition) as sub:
+            if armed:
+                self.master.arducopter_arm()
+            else:
+                self.master.arducopter_disarm()
+            if await sub.get(timeout) is None:
+                raise Exception("Не получено подтверждение состояния двигателей")
+
+    async def arm(self, timeout: float = 10) -> None:
+        """
+        Взведение (Arm) БПЛА для начала работы двигателей.
+
+        Args:
+            timeout (float): Время ожидания подтверждения в секундах.
+        """
+        try:
+            await self._wait_armed_state(True, timeout)
+            logger.info("БПЛА взведён")
+        except Exception as e:
+            logger.error(f"Ошибка взведения БПЛА: {e}")
+            raise
+
+    async def disarm(self, timeout: float = 10) -> None:
+        """
+        Разоружение (Disarm) БПЛА для остановки двигателей.
+
+        Args:
+            timeout (float): Время ожидания подтверждения в секундах.
+        """
+        try:
+            await self._wait_armed_state(False, timeout)
+            logger.info("БПЛА разоружён")
+        except Exception as e:
+            logger.error(f"Ошибка разоружения БПЛА: {e}")
+            raise
+
+    def mode_table(self) -> Dict[str, Any]:
+        """
+        Таблица режимов полёта для текущего типа БПЛА и автопилота (см. UAVControl.mode_table()).
+
+        Returns:
+            Dict[str, Any]: Словарь "название режима -> номер режима".
+        """
+        return self._modes.get()
+
+    async def set_mode(self, mode: str, timeout: float = 1.5, retries: int = 2) -> None:
+        """
+        Установка режима полёта БПЛА с подтверждением по HEARTBEAT.
+
+        Аналог UAVControl.set_mode(): команда повторяется, пока в HEARTBEAT
+        не появится нужный custom_mode; если БПЛА уже находится в этом
+        режиме, команда не отправляется.
+
+        Args:
+            mode (str): Название режима (например, 'GUIDED', 'LAND').
+            timeout (float): Время ожидания подтверждения одной попытки в секундах.
+            retries (int): Число повторных отправок команды.
+        """
+        mode_id = self.mode_table().get(mode)
+        if mode_id is None:
+            raise ValueError(f"Неизвестный режим: {mode}")
+
+        if not isinstance(mode_id, int):
+            # PX4: номер режима — кортеж, custom_mode в HEARTBEAT с ним напрямую не сравнить
+            try:
+                self.master.set_mode(mode_id)
+                logger.info(f"Режим установлен: {mode}")
+            except Exception as e:
+                logger.error(f"Ошибка установки режима {mode}: {e}")
+                raise
+            return
+
+        condition = mode_condition(self.master.target_system, mode_id)
+        heartbeat = self.latest('HEARTBEAT')
+        if heartbeat is not None and condition(heartbeat):
+            logger.info(f"Режим {mode} уже установлен")
+            return
+
+        try:
+            with self.subscribe(['HEARTBEAT'], condition) as sub:
+                for attempt in range(retries + 1):
+                    self.master.set_mode(mode_id)
+                    if await sub.get(timeout) is not None:
+                        logger.info(f"Режим установлен: {mode}")
+                        return
+                    logger.warning(f"Режим {mode} не подтверждён, попытка {attempt + 1}")
+            raise Exception(f"БПЛА не перешёл в режим {mode}")
+        except Exception as e:
+            logger.error(f"Ошибка установки режима {mode}: {e}")
+            raise
+
+    def expect_command_ack(self, command: int) -> asyncio.Future:
+        """
+        Регистрация ожидания COMMAND_ACK до отправки команды.
+
+        Args:
+            command (int): Код команды MAVLink.
+
+        Returns:
+            asyncio.Future: Future с сообщением COMMAND_ACK.
+        """
+        future = asyncio.get_running_loop().create_future()
+        key = (command, self.master.target_system)
+        self._pending_acks.setdefault(key, []).append(future)
+        return future
+
+    async def wait_command_ack(self, command: int, timeout: float = 10,
+                               pending: Optional[asyncio.Future] = None) -> bool:
+        """
+        Ожидание подтверждения выполнения команды.
+
+        Args:
+            command (int): Код команды MAVLink.
+            timeout (float): Время ожидания в секундах.
+            pending (Optional[asyncio.Future]): Ожидание из expect_command_ack().
+
+        Returns:
+            bool: True, если команда подтверждена, False в противном случае.
+        """
+        if pending is None:
+            pending = self.expect_command_ack(command)
+        try:
+            ack_msg = await asyncio.wait_for(pending, timeout)
+        except asyncio.TimeoutError:
+            futures = self._pending_acks.get((command, self.master.target_system), [])
+            if pending in futures:
+                futures.remove(pending)
+            logger.error(f"Не получено подтверждение для команды {command}")
+            return False
+
+        if ack_msg.result == mavutil.mavlink.MAV_RESULT_ACCEPTED:
+            logger.info(f"Команда {command} подтверждена")
+            return True
+        logger.error(f"Команда {command} отклонена с кодом {ack_msg.result}")
+        return False
+
+    async def _command_long(self, command: int, params: Sequence[float], timeout: float = 10) -> bool:
+        pending = self.expect_command_ack(command)
+        self.master.mav.command_long_send(
+            self.master.target_system,
+            self.master.target_component,
+            command,
+            0,
+            *params
+        )
+        return await self.wait_command_ack(command, timeout, pending=pending)
+
+    async def takeoff(self, altitude: float) -> None:
+        """
+        Команда на взлёт до заданной высоты.
+
+        Args:
+            altitude (float): Целевая высота взлёта в метрах.
+        """
+        if altitude <= 0:
+            raise ValueError("Высота должна быть положительной")
+
+        try:
+            await self.set_mode('GUIDED')
+
+            msg = self.latest('GLOBAL_POSITION_INT')
+            if msg is None:
+                with self.subscribe(['GLOBAL_POSITION_INT']) as sub:
+                    msg = await sub.get(5)
+            if msg is None:
+                raise Exception("Не удалось получить текущие координаты для взлёта")
+
+            params = (0, 0, 0, 0, msg.lat / 1e7, msg.lon / 1e7, altitude)
+            if not await self._command_long(mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, params):
+                raise Exception("Команда взлёта не подтверждена")
+            logger.info(f"Взлёт на высоту {altitude} метров")
+        except Exception as e:
+            logger.error(f"Ошибка взлёта: {e}")
+            raise
+
+    async def land(self) -> None:
+        """
+        Команда на посадку в текущей точке.
+        """
+        try:
+            if not await self._command_long(mavutil.mavlink.MAV_CMD_NAV_LAND, (0,) * 7):
+                raise Exception("Команда посадки не подтверждена")
+            logger.info("Посадка начата")
+        except Exception as e:
+            logger.error(f"Ошибка посадки: {e}")
+            raise
+
+    async def get_telemetry(self) -> Optional[TelemetrySnapshot]:
+        """
+        Получение снимка телеметрии из кэша последних сообщений.
+
+        Returns:
+            Optional[TelemetrySnapshot]: Снимок телеметрии или None.
+        """
+        try:
+            messages = {t: self._latest[t] for t in TELEMETRY_TYPES if t in self._latest}
+            telemetry = telemetry_from_messages(messages)
+            if telemetry:
+                return telemetry
+            logger.warning("Телеметрия недоступна")
+            return None
+        except Exception as e:
+            logger.error(f"Ошибка получения телеметрии: {e}")
+            return None
+
+    async def iter_telemetry(self, rate_hz: float = 10.0, fields: Optional[Iterable[str]] = None,
+                             duration: Optional[float] = None) -> AsyncIterator[TelemetrySnapshot]:
+        """
+        Асинхронный поток объединённых снимков телеметрии с заданной частотой.
+
+        Аналог UAVControl.iter_telemetry(): снимок собирается из кэша в момент
+        выдачи, пропущенные медленным потребителем снимки не накапливаются.
+
+        Args:
+            rate_hz (float): Частота выдачи снимков в Гц.
+            fields (Optional[Iterable[str]]): Нужные поля (None — все доступные).
+            duration (Optional[float]): Длительность потока в секундах (None — без ограничения).
+
+        Yields:
+            TelemetrySnapshot: Снимок телеметрии с полем 'timestamp'.
+        """
+        if rate_hz <= 0:
+            raise ValueError("Частота должна быть положительной")
+        fields = list(fields) if fields is not None else None
+        loop = asyncio.get_running_loop()
+        period = 1.0 / rate_hz
+        next_tick = loop.time()
+        end = None if duration is None else next_tick + duration
+        while end is None or next_tick <= end:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            messages = {t: self._latest[t] for t in TELEMETRY_TYPES if t in self._latest}
+            if messages:
+                timestamp = max(self._received_at[t] for t in messages)
+                try:
+                    snapshot = merged_snapshot(messages, timestamp, fields)
+                except ValueError as e:
+                    logger.error(f"Ошибка получения телеметрии: {e}")
+                else:
+                    yield snapshot
+            now = loop.time()
+            next_tick += period
+            if next_tick < now:
+                next_tick = now
+
+    async def upload_mission(self, waypoints: Iterable[Union[MissionItem, Tuple[float, float, float]]],
+                             item_timeout: float = 1.5, max_retries: int = 5, count: Optional[int] = None,
+                             window: int = 64) -> None:
+        """
+        Загрузка всей миссии за одну транзакцию протокола MAVLink Mission.
+
+        Протокол тот же, что в UAVControl.upload_mission() (см. MissionUpload).
+
+        Args:
+            waypoints (Iterable[Union[MissionItem, Tuple[float, float, float]]]): Точки (lat, lon, alt)
+                или пункты миссии.
+            item_timeout (float): Время ожидания очередного запроса в секундах.
+            max_retries (int): Число повторов подряд при отсутствии ответа.
+            count (Optional[int]): Число пунктов, если waypoints не поддерживает len().
+            window (int): Число последних пунктов итератора, доступных для повторной передачи.
+        """
+        if count is None:
+            count = len(waypoints)
+        if not isinstance(waypoints, Sequence):
+            waypoints = ItemWindow(waypoints, window)
+        upload = MissionUpload(self.master, waypoints, count, max_retries)
+
+        try:
+            with self.subscribe(MissionUpload.MESSAGE_TYPES, self._from_target) as sub:
+                upload.start()
+                while not upload.done:
+                    upload.feed(await sub.get(item_timeout))
+            logger.info(f"Миссия из {count} точек загружена")
+        except Exception as e:
+            logger.error(f"Ошибка загрузки миссии: {e}")
+            raise
+
+    async def goto(self, lat: float, lon: float, alt: float) -> None:
+        """
+        Команда на полёт к заданным координатам в режиме GUIDED (см. UAVControl.goto()).
+
+        Args:
+            lat (float): Широта целевой точки.
+            lon (float): Долгота целевой точки.
+            alt (float): Высота целевой точки в метрах (относительно точки старта).
+        """
+        try:
+            send_position_target(self.master, lat, lon, alt)
+            logger.info(f"Летим к точке ({lat}, {lon}, {alt})")
+        except Exception as e:
+            logger.error(f"Ошибка при полёте к точке: {e}")
+            raise
+
+    async def wait_arrival(self, lat: float, lon: float, alt: float, acceptance_radius: float = 2.0,
+                           timeout: float = 60, seq: Optional[int] = None) -> bool:
+        """
+        Ожидание прибытия БПЛА в точку по потоку сообщений.
+
+        Условия прибытия те же, что в UAVControl.wait_arrival(): расстояние
+        по GLOBAL_POSITION_INT не больше радиуса приёмки либо сообщение
+        автопилота о достижении пункта seq.
+
+        Args:
+            lat (float): Широта целевой точки.
+            lon (float): Долгота целевой точки.
+            alt (float): Высота целевой точки в метрах (относительно точки старта).
+            acceptance_radius (float): Радиус приёмки в метрах.
+            timeout (float): Время ожидания в секундах.
+            seq (Optional[int]): Номер пункта миссии для сообщений автопилота.
+
+        Returns:
+            bool: True, если точка достигнута до истечения таймаута.
+        """
+        reached = arrival_condition(lat, lon, alt, acceptance_radius, seq)
+        with self.subscribe(ARRIVAL_TYPES, self._from_target) as sub:
+            position = self.latest('GLOBAL_POSITION_INT')
+            if position is not None and reached(position):
+                return True
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                msg = await sub.get(remaining)
+                if msg is None:
+                    return False
+                if reached(msg):
+                    return True
+
+    async def start_mission(self) -> None:
+        """
+        Запуск загруженной миссии в режиме AUTO.
+        """
+        try:
+            await self.set_mode('AUTO')
+            if not await self._command_long(mavutil.mavlink.MAV_CMD_MISSION_START, (0,) * 7):
+                raise Exception("Команда запуска миссии не подтверждена")
+            logger.info("Миссия запущена")
+        except Exception as e:
+            logger.error(f"Ошибка запуска миссии: {e}")
+            raise
@@ -0,0 +1,380 @@
+# benchmark.py
+
+from pymavlink import mavutil
+import argparse
+import json
+import platform
+import socket
+import sys
+import time
+import tracemalloc
+from typing import Optional, Dict, Any, List, Callable, Sequence, Tuple
+import numpy as np
+from sim_vehicle import SimulatedVehicle
+from uav_control import UAVControl
+from mission_planner import MissionPlanner
+from selective_decode import SelectiveDecoder, message_ids
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Частоты имитатора при измерении пропускной способности, Гц
+THROUGHPUT_RATES = {
+    'GLOBAL_POSITION_INT': 200.0,
+    'VFR_HUD': 50.0,
+    'SYS_STATUS': 10.0,
+    'ATTITUDE': 200.0,
+}
+
+BENCH_MISSION = [
+    (47.3979, 8.5457, 10.0),
+    (47.3981, 8.5459, 15.0),
+]
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """
+    Сводка по выборке длительностей в миллисекундах.
+
+    Args:
+        samples (Sequence[float]): Длительности в секундах.
+
+    Returns:
+        Dict[str, float]: count, mean, p50, p95, p99 и max в миллисекундах.
+    """
+    values = np.asarray(samples, dtype=float) * 1000
+    if len(values) == 0:
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': int(len(values)),
+        'mean': float(values.mean()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'max': float(values.max()),
+    }
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _free_udp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def bench_commands(uav: UAVControl, iterations: int) -> Dict[str, Dict[str, float]]:
+    """
+    Время от отправки команды до её подтверждения.
+
+    Args:
+        uav (UAVControl): БПЛА с запущенным фоновым приёмником.
+        iterations (int): Число повторов каждой команды.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Сводка percentiles() по каждой команде.
+    """
+    samples: Dict[str, List[float]] = {'arm': [], 'disarm': [], 'set_mode': [], 'takeoff': [], 'goto': [],
+                                       'land': []}
+    for i in range(iterations):
+        samples['set_mode'].append(_timed(lambda: uav.set_mode('LOITER' if i % 2 else 'GUIDED')))
+        samples['arm'].append(_timed(uav.arm))
+        samples['disarm'].append(_timed(uav.disarm))
+    for _ in range(iterations):
+        uav.set_mode('GUIDED')  # после посадки в режиме LAND БПЛА разоружается сам
+        uav.arm()
+        samples['takeoff'].append(_timed(lambda: uav.takeoff(5)))
+        samples['goto'].append(_timed(lambda: uav.goto(*BENCH_MISSION[0])))
+        samples['land'].append(_timed(uav.land))
+    uav.disarm()
+    return {name: percentiles(values) for name, values in samples.items()}
+
+
+def bench_telemetry(uav: UAVControl, duration: float) -> Dict[str, float]:
+    """
+    Пропускная способность приёма и get_telemetry(), расход CPU и рост памяти.
+
+    Сначала приём измеряется без нагрузки со стороны вызывающего кода
+    (CPU считается для всего процесса, включая поток имитатора, поэтому
+    значение на сообщение — оценка сверху), затем get_telemetry()
+    вызывается в цикле столько же времени.
+
+    Args:
+        uav (UAVControl): БПЛА с запущенным фоновым приёмником.
+        duration (float): Длительность каждого этапа в секундах.
+
+    Returns:
+        Dict[str, float]: Сообщений и вызовов в секунду, CPU на сообщение, рост памяти.
+    """
+    received = [0]
+
+    def count(msg: Any) -> None:
+        received[0] += 1
+
+    uav.receiver.add_listener(count)
+    tracemalloc.start()
+    try:
+        memory_before = tracemalloc.get_traced_memory()[0]
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        time.sleep(duration)
+        receive_elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        messages = received[0]
+
+        calls = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < duration:
+            uav.get_telemetry()
+            calls += 1
+        calls_elapsed = time.perf_counter() - started
+        memory_after, memory_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        uav.receiver.remove_listener(count)
+    return {
+        'messages_per_s': messages / receive_elapsed,
+        'cpu_us_per_message': cpu / max(messages, 1) * 1e6,
+        'get_telemetry_per_s': calls / calls_elapsed,
+        'get_telemetry_us': calls_elapsed / max(calls, 1) * 1e6,
+        'memory_growth_kib': (memory_after - memory_before) / 1024,
+        'memory_peak_kib': (memory_peak - memory_before) / 1024,
+    }
+
+
+def bench_decode(count: int = 100000) -> Dict[str, float]:
+    """
+    Скорость декодирования MAVLink без сети: поток GLOBAL_POSITION_INT и ATTITUDE.
+
+    Args:
+        count (int): Число сообщений.
+
+    Returns:
+        Dict[str, float]: Сообщений в секунду и CPU на сообщение в микросекундах.
+    """
+    encoder = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    position = encoder.global_position_int_encode(0, 473977420, 85455940, 488000, 10000, 0, 0, 0, 0)
+    attitude = encoder.attitude_encode(0, 0.1, 0.2, 0.3, 0, 0, 0)
+    data = (position.pack(encoder) + attitude.pack(encoder)) * (count // 2)
+
+    decoder = mavutil.mavlink.MAVLink(None)
+    decoder.robust_parsing = True
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    decoded = 0
+    for start in range(0, len(data), 4096):
+        messages = decoder.parse_buffer(data[start:start + 4096])
+        decoded += len(messages) if messages else 0
+    while decoder.parse_char(b'') is not None:
+        decoded += 1
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    return {
+        'messages': decoded,
+        'messages_per_s': decoded / elapsed,
+        'cpu_us_per_message': cpu / max(decoded, 1) * 1e6,
+    }
+
+
+class _BufferLink:
+    """
+    Соединение, отдающее заранее закодированный поток блоками по 4096 байт.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+        self.mav = mavutil.mavlink.MAVLink(None)
+
+    def recv(self, n: int = 4096) -> bytes:
+        chunk = self.data[self.offset:self.offset + n]
+        self.offset += len(chunk)
+        return chunk
+
+    def post_message(self, msg: Any) -> None:
+        pass
+
+    def select(self, timeout: float) -> bool:
+        return False
+
+
+def bench_selective_decode(count: int = 100000, wanted: Sequence[str] = ('GLOBAL_POSITION_INT',)) -> Dict[str, float]:
+    """
+    Скорость разбора того же потока, что и в bench_decode(), при выборочном декодировании.
+
+    Args:
+        count (int): Число сообщений.
+        wanted (Sequence[str]): Декодируемые типы.
+
+    Returns:
+        Dict[str, float]: Кадров в секунду и CPU на кадр в микросекундах.
+    """
+    encoder = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    position = encoder.global_position_int_encode(0, 473977420, 85455940, 488000, 10000, 0, 0, 0, 0)
+    attitude = encoder.attitude_encode(0, 0.1, 0.2, 0.3, 0, 0, 0)
+    data = (position.pack(encoder) + attitude.pack(encoder)) * (count // 2)
+
+    decoder = SelectiveDecoder(_BufferLink(data), lambda ids=message_ids(wanted): ids)
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    while decoder.recv_msg() is not None:
+        pass
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    frames = decoder.decoded + decoder.skipped
+    return {
+        'frames': frames,
+        'decoded': decoder.decoded,
+        'frames_per_s': frames / elapsed,
+        'cpu_us_per_frame': cpu / max(frames, 1) * 1e6,
+    }
+
+
+def bench_skip_saving(count: int = 100000) -> Dict[str, float]:
+    """
+    Цена пропуска ненужного кадра (только заголовок и CRC) по сравнению с его декодированием.
+
+    Args:
+        count (int): Число сообщений.
+
+    Returns:
+        Dict[str, float]: CPU на кадр при декодировании всех и при пропуске всех кадров
+        в микросекундах и экономия в процентах.
+    """
+    decoded = bench_selective_decode(count, wanted=('GLOBAL_POSITION_INT', 'ATTITUDE'))
+    skipped = bench_selective_decode(count, wanted=())
+    decode_us, skip_us = decoded['cpu_us_per_frame'], skipped['cpu_us_per_frame']
+    return {
+        'decode_us_per_frame': decode_us,
+        'skip_us_per_frame': skip_us,
+        'saving_percent': (1 - skip_us / decode_us) * 100 if decode_us else 0.0,
+    }
+
+
+def bench_mission(connection_string: str, runs: int,
+                  waypoints: Sequence[Tuple[float, float, float]] = BENCH_MISSION) -> Dict[str, float]:
+    """
+    Полное время MissionPlanner.execute_mission() (включая паузы после взлёта и RTL).
+
+    Args:
+        connection_string (str): Строка подключения к имитатору.
+        runs (int): Число прогонов.
+        waypoints (Sequence[Tuple[float, float, float]]): Точки миссии.
+
+    Returns:
+        Dict[str, float]: Сводка percentiles().
+    """
+    planner = MissionPlanner(connection_string, cruise_speed=30.0)
+    try:
+        samples = [_timed(lambda: planner.execute_mission(list(waypoints))) for _ in range(runs)]
+    finally:
+        planner.uav.close()
+    return percentiles(samples)
+
+
+def run(iterations: int = 20, duration: float = 3.0, mission_runs: int = 0,
+        decode_count: int = 100000) -> Dict[str, Any]:
+    """
+    Прогон всех измерений против локального имитатора БПЛА.
+
+    Args:
+        iterations (int): Число повторов каждой команды.
+        duration (float): Длительность измерения телеметрии в секундах.
+        mission_runs (int): Число прогонов execute_mission() (0 — пропустить).
+        decode_count (int): Число сообщений для измерения декодирования.
+
+    Returns:
+        Dict[str, Any]: Результаты, готовые к сохранению в JSON.
+    """
+    results: Dict[str, Any] = {
+        'meta': {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pymavlink': getattr(sys.modules.get('pymavlink'), '__version__', None),
+            'iterations': iterations,
+            'duration': duration,
+        },
+        'decode': bench_decode(decode_count),
+        'selective_decode': bench_selective_decode(decode_count),
+        'selective_decode_skip': bench_skip_saving(decode_count),
+    }
+
+    port = _free_udp_port()
+    with SimulatedVehicle(f'127.0.0.1:{port}', cruise_speed=30.0, climb_rate=20.0, rates=THROUGHPUT_RATES,
+                          tick=0.002):
+        uav = UAVControl(f'udpin:127.0.0.1:{port}', background_receiver=True)
+        try:
+            results['commands'] = bench_commands(uav, iterations)
+            results['telemetry'] = bench_telemetry(uav, duration)
+        finally:
+            uav.close()
+
+    if mission_runs > 0:
+        port = _free_udp_port()
+        with SimulatedVehicle(f'127.0.0.1:{port}', cruise_speed=30.0, climb_rate=20.0):
+            results['mission'] = bench_mission(f'udpin:127.0.0.1:{port}', mission_runs)
+    return results
+
+
+def _flatten(results: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """
+    Сравнение двух результатов: изменение каждого числового показателя в процентах.
+
+    Args:
+        baseline (Dict[str, Any]): Результаты предыдущего выпуска.
+        current (Dict[str, Any]): Текущие результаты.
+
+    Returns:
+        List[str]: Строки отчёта "показатель: было -> стало (изменение)".
+    """
+    old, new = _flatten(baseline), _flatten(current)
+    lines = []
+    for name in sorted(old.keys() & new.keys()):
+        if name.startswith('meta.'):
+            continue
+        change = (new[name] - old[name]) / old[name] * 100 if old[name] else float('nan')
+        lines.append(f"{name}: {old[name]:.3f} -> {new[name]:.3f} ({change:+.1f}%)")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Измерение задержек команд и пропускной способности телеметрии")
+    parser.add_argument('--iterations', type=int, default=20, help="повторов каждой команды")
+    parser.add_argument('--duration', type=float, default=3.0, help="секунд измерения телеметрии")
+    parser.add_argument('--mission-runs', type=int, default=0, help="прогонов execute_mission()")
+    parser.add_argument('--output', help="файл для результатов в JSON")
+    parser.add_argument('--compare', help="JSON с предыдущими результатами для сравнения")
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations, args.duration, args.mission_runs)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print('\n'.join(compare(json.load(f), results)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+# command_ack.py
+
+from pymavlink import mavutil
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Optional, Dict, Tuple, List, Any, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CommandAckRouter:
+    """
+    Маршрутизатор COMMAND_ACK: сопоставляет входящие подтверждения
+    с ожидающими их командами по коду MAV_CMD и системе-отправителю.
+
+    Остальные сообщения маршрутизатор не трогает, поэтому они продолжают
+    поступать в кэш телеметрии и к другим подписчикам приёмника.
+    """
+
+    def __init__(self):
+        """
+        Инициализация маршрутизатора.
+        """
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[int, Optional[int]], List[Future]] = {}
+
+    def expect(self, command: int, target_system: Optional[int] = None) -> Future:
+        """
+        Регистрация ожидания подтверждения команды.
+
+        Регистрировать ожидание нужно до отправки команды, иначе быстрый
+        ответ может прийти раньше, чем его начнут ждать.
+
+        Args:
+            command (int): Код команды MAVLink.
+            target_system (Optional[int]): Система, от которой ждём ответ (None — любая).
+
+        Returns:
+            Future: Future, результатом которого станет сообщение COMMAND_ACK.
+        """
+        future: Future = Future()
+        with self._lock:
+            self._pending.setdefault((command, target_system), []).append(future)
+        return future
+
+    def cancel(self, future: Future) -> None:
+        """
+        Снятие ожидания (например, по таймауту).
+
+        Args:
+            future (Future): Future, полученный из expect().
+        """
+        with self._lock:
+            for key, futures in list(self._pending.items()):
+                if future in futures:
+                    futures.remove(future)
+                    if not futures:
+                        del self._pending[key]
+                    break
+        future.cancel()
+
+    def pending_count(self) -> int:
+        """
+        Количество команд, ожидающих подтверждения.
+
+        Returns:
+            int: Число незавершённых ожиданий.
+        """
+        with self._lock:
+            return sum(len(futures) for futures in self._pending.values())
+
+    def dispatch(self, msg: Any) -> bool:
+        """
+        Передача сообщения ожидающей команде.
+
+        Args:
+            msg (Any): Декодированное сообщение MAVLink.
+
+        Returns:
+            bool: True, если сообщение было подтверждением ожидаемой команды.
+        """
+        if msg.get_type() != 'COMMAND_ACK':
+            return False
+        future = None
+        with self._lock:
+            for key in ((msg.command, msg.get_srcSystem()), (msg.command, None)):
+                futures = self._pending.get(key)
+                if futures:
+                    future = futures.pop(0)
+                    if not futures:
+                        del self._pending[key]
+                    break
+        if future is None:
+            logger.debug(f"Неожиданное подтверждение команды {msg.command}")
+            return False
+        try:
+            future.set_result(msg)
+        except InvalidStateError:
+            # Ожидание было отменено одновременно с приходом ответа
+            return False
+        return True
+
+
+class _PendingCommand:
+    """
+    Команда COMMAND_LONG, ожидающая окончательного подтверждения.
+    """
+
+    def __init__(self, command: int, params: Sequence[float], target_system: int, target_component: int):
+        self.command = command
+        self.params = tuple(params) + (0,) * (7 - len(params))
+        self.target_system = target_system
+        self.target_component = target_component
+        self.confirmation = 0
+        self.in_progress = False
+        self.deadline = 0.0
+        self.ack: Optional[Future] = None
+        self.result: Future = Future()
+
+
+class CommandPipeline:
+    """
+    Отправка COMMAND_LONG с несколькими командами в полёте одновременно.
+
+    Каждая команда возвращает свой Future. Если COMMAND_ACK не пришёл за
+    ack_timeout, команда отправляется повторно с увеличенным полем
+    confirmation. Ответ MAV_RESULT_IN_PROGRESS продлевает ожидание до
+    in_progress_timeout без повторной отправки. Повторы выполняет поток,
+    который работает, только пока есть неподтверждённые команды.
+    """
+
+    def __init__(self, master: Any, router: CommandAckRouter, ack_timeout: float = 0.3,
+                 max_retries: int = 5, in_progress_timeout: float = 30.0):
+        """
+        Инициализация конвейера команд.
+
+        Args:
+            master (Any): Соединение MAVLink.
+            router (CommandAckRouter): Маршрутизатор, получающий COMMAND_ACK.
+            ack_timeout (float): Время ожидания подтверждения одной отправки в секундах.
+            max_retries (int): Число повторных отправок.
+            in_progress_timeout (float): Время ожидания после MAV_RESULT_IN_PROGRESS в секундах.
+        """
+        self.master = master
+        self.router = router
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+        self.in_progress_timeout = in_progress_timeout
+        self.retransmissions = 0
+        self._condition = threading.Condition()
+        self._in_flight: List[_PendingCommand] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def send(self, command: int, *params: float, target_system: Optional[int] = None,
+             target_component: Optional[int] = None) -> Future:
+        """
+        Отправка команды без ожидания ответа.
+
+        Args:
+            command (int): Код команды MAVLink.
+            *params (float): Параметры param1..param7 (недостающие равны 0).
+            target_system (Optional[int]): Целевая система (по умолчанию из соединения).
+            target_component (Optional[int]): Целевой компонент (по умолчанию из соединения).
+
+        Returns:
+            Future: Future с окончательным COMMAND_ACK или TimeoutError после всех повторов.
+        """
+        pending = _PendingCommand(
+            command, params,
+            self.master.target_system if target_system is None else target_system,
+            self.master.target_component if target_component is None else target_component)
+        self._expect(pending)
+        with self._condition:
+            pending.deadline = time.monotonic() + self.ack_timeout
+            self._in_flight.append(pending)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="command-pipeline", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        self._transmit(pending)
+        return pending.result
+
+    def pending_count(self) -> int:
+        """
+        Количество команд, ожидающих окончательного подтверждения.
+
+        Returns:
+            int: Число команд в полёте.
+        """
+        with self._condition:
+            return len(self._in_flight)
+
+    def _expect(self, pending: _PendingCommand) -> None:
+        pending.ack = self.router.expect(pending.command, pending.target_system)
+        pending.ack.add_done_callback(lambda ack: self._on_ack(pending, ack))
+
+    def _transmit(self, pending: _PendingCommand) -> None:
+        try:
+            self.master.mav.command_long_send(pending.target_system, pending.target_component,
+                                              pending.command, pending.confirmation, *pending.params)
+        except Exception as e:
+            logger.error(f"Ошибка отправки команды {pending.command}: {e}")
+
+    def _on_ack(self, pending: _PendingCommand, ack: Future) -> None:
+        if ack.cancelled():
+            return
+        msg = ack.result()
+        if msg.result == mavutil.mavlink.MAV_RESULT_IN_PROGRESS:
+            with self._condition:
+                pending.in_progress = True
+                pending.deadline = time.monotonic() + self.in_progress_timeout
+            # Ответ обрабатывается в потоке приёма, поэтому следующее
+            # подтверждение гарантированно придёт уже после регистрации
+            self._expect(pending)
+            return
+        self._finish(pending)
+        try:
+            pending.result.set_result(msg)
+        except InvalidStateError:
+            pass  # ожидание отменено вызывающим кодом
+
+    def _finish(self, pending: _PendingCommand) -> None:
+        with self._condition:
+            if pending in self._in_flight:
+                self._in_flight.remove(pending)
+
+    def _run(self) -> None:
+        while True:
+            retransmit = []
+            with self._condition:
+                if not self._in_flight:
+                    self._thread = None
+                    return
+                now = time.monotonic()
+                next_deadline = min(pending.deadline for pending in self._in_flight)
+                if next_deadline > now:
+                    self._condition.wait(next_deadline - now)
+                    continue
+                for pending in list(self._in_flight):
+                    if pending.result.cancelled():
+                        self._in_flight.remove(pending)
+                        self.router.cancel(pending.ack)
+                    elif pending.deadline <= now:
+                        if pending.in_progress or pending.confirmation >= self.max_retries:
+                            self._in_flight.remove(pending)
+                            self.router.cancel(pending.ack)
+                            self._fail(pending)
+                        else:
+                            pending.confirmation += 1
+                            pending.deadline = now + self.ack_timeout
+                            self.retransmissions += 1
+                            retransmit.append(pending)
+            for pending in retransmit:
+                logger.warning(f"Повтор команды {pending.command}, confirmation={pending.confirmation}")
+                self._transmit(pending)
+
+    def _fail(self, pending: _PendingCommand) -> None:
+        logger.error(f"Команда {pending.command} не подтверждена после {pending.confirmation + 1} отправок")
+        try:
+            pending.result.set_exception(TimeoutError(f"Команда {pending.command} не подтверждена"))
+        except InvalidStateError:
+            pass
@@ -0,0 +1,310 @@
+# fleet_manager.py
+
+from pymavlink import mavutil
+from uav_control import UAVControl
+import selectors
+import threading
+import time
+from typing import Optional, Dict, Any, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class VehicleLink:
+    """
+    Представление одного БПЛА на общем соединении MAVLink.
+
+    Предоставляет UAVControl тот же набор методов, что и
+    mavutil.mavlink_connection, но адресует команды конкретной системе,
+    а при общем UDP-порту отправляет их на адрес именно этого БПЛА.
+    """
+
+    def __init__(self, link: Any, heartbeat: Any):
+        """
+        Создание представления по первому HEARTBEAT от БПЛА.
+
+        Args:
+            link (Any): Общее соединение MAVLink.
+            heartbeat (Any): Сообщение HEARTBEAT от БПЛА.
+        """
+        self.link = link
+        self.target_system = heartbeat.get_srcSystem()
+        self.target_component = heartbeat.get_srcComponent()
+        self.heartbeat = heartbeat
+        self.address = None
+        self._mav = None
+
+    @property
+    def mav(self) -> Any:
+        """
+        Кодировщик MAVLink этого БПЛА (пишет в общее соединение через write()).
+        """
+        if self._mav is None or self._mav.__class__ is not self.link.mav.__class__:
+            self._mav = self.link.mav.__class__(
+                self, srcSystem=self.link.source_system, srcComponent=self.link.source_component)
+        return self._mav
+
+    def write(self, buf: bytes) -> None:
+        """
+        Отправка закодированного пакета БПЛА.
+
+        Args:
+            buf (bytes): Пакет MAVLink.
+        """
+        if self.address is not None and getattr(self.link, 'udp_server', False):
+            self.link.port.sendto(buf, self.address)
+        else:
+            self.link.write(buf)
+
+    def wait_heartbeat(self, blocking: bool = True, timeout: Optional[float] = None) -> Any:
+        """
+        Последний HEARTBEAT от БПЛА (он уже получен при обнаружении).
+        """
+        return self.heartbeat
+
+    def recv_match(self, **kwargs) -> None:
+        """
+        Сообщения доставляет FleetManager, прямое чтение не выполняется.
+        """
+        time.sleep(kwargs.get('timeout') or 0)
+        return None
+
+    def mode_mapping(self) -> Optional[Dict[str, Any]]:
+        """
+        Таблица режимов полёта по типу БПЛА и автопилота из HEARTBEAT.
+        """
+        if self.heartbeat.autopilot == mavutil.mavlink.MAV_AUTOPILOT_PX4:
+            return mavutil.px4_map
+        return mavutil.mode_mapping_byname(self.heartbeat.type)
+
+    def set_mode(self, mode: Any, custom_mode: int = 0, custom_sub_mode: int = 0) -> None:
+        """
+        Установка режима полёта командой MAV_CMD_DO_SET_MODE.
+        """
+        if self.heartbeat.autopilot == mavutil.mavlink.MAV_AUTOPILOT_PX4:
+            if isinstance(mode, str):
+                mode, custom_mode, custom_sub_mode = mavutil.px4_map[mode]
+            params = (mode, custom_mode, custom_sub_mode, 0, 0, 0, 0)
+        else:
+            params = (mavutil.mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED, mode, 0, 0, 0, 0, 0)
+        self.mav.command_long_send(self.target_system, self.target_component,
+                                   mavutil.mavlink.MAV_CMD_DO_SET_MODE, 0, *params)
+
+    def arducopter_arm(self) -> None:
+        """
+        Команда на взведение двигателей.
+        """
+        self.mav.command_long_send(self.target_system, self.target_component,
+                                   mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM, 0,
+                                   1, 0, 0, 0, 0, 0, 0)
+
+    def arducopter_disarm(self) -> None:
+        """
+        Команда на разоружение двигателей.
+        """
+        self.mav.command_long_send(self.target_system, self.target_component,
+                                   mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM, 0,
+                                   0, 0, 0, 0, 0, 0, 0)
+
+    def close(self) -> None:
+        """
+        Общее соединение закрывает FleetManager.
+        """
+
+
+class FleetManager:
+    """
+    Управление группой БПЛА из одного процесса.
+
+    Все соединения читает один поток через selectors; сообщения
+    распределяются по БПЛА согласно системному идентификатору отправителя.
+    Для каждого БПЛА выдаётся совместимый с UAVControl объект, поэтому
+    число потоков не растёт вместе с размером группы.
+    """
+
+    def __init__(self, select_timeout: float = 0.1):
+        """
+        Инициализация менеджера группы.
+
+        Args:
+            select_timeout (float): Таймаут ожидания данных в цикле событий в секундах.
+        """
+        self.select_timeout = select_timeout
+        self._selector = selectors.DefaultSelector()
+        self._links: List[Any] = []
+        self._polled_links: List[Any] = []
+        self._vehicles: Dict[int, UAVControl] = {}
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_link(self, connection_string: str) -> Any:
+        """
+        Открытие соединения MAVLink и подключение его к циклу событий.
+
+        Одно соединение может обслуживать несколько БПЛА (например, UDP-порт,
+        на который шлют данные БПЛА с разными системными идентификаторами).
+
+        Args:
+            connection_string (str): Строка подключения MAVLink.
+
+        Returns:
+            Any: Открытое соединение.
+        """
+        try:
+            link = mavutil.mavlink_connection(connection_string)
+        except Exception as e:
+            logger.error(f"Ошибка подключения {connection_string}: {e}")
+            raise
+        self.attach_link(link)
+        logger.info(f"Соединение {connection_string} добавлено")
+        return link
+
+    def attach_link(self, link: Any) -> None:
+        """
+        Подключение уже открытого соединения к циклу событий.
+
+        Args:
+            link (Any): Соединение MAVLink.
+        """
+        self._links.append(link)
+        fd = getattr(link, 'fd', None)
+        if isinstance(fd, int):
+            try:
+                self._selector.register(fd, selectors.EVENT_READ, link)
+                return
+            except (ValueError, OSError):
+                pass
+        self._polled_links.append(link)
+
+    def start(self) -> None:
+        """
+        Запуск цикла событий в отдельном потоке.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="fleet-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """
+        Остановка цикла событий.
+
+        Args:
+            timeout (float): Время ожидания завершения потока в секундах.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def close(self) -> None:
+        """
+        Остановка цикла событий и закрытие всех соединений.
+        """
+        self.stop()
+        for link in self._links:
+            try:
+                link.close()
+            except Exception as e:
+                logger.error(f"Ошибка закрытия соединения: {e}")
+        self._selector.close()
+        self._links.clear()
+        self._polled_links.clear()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            timeout = min(self.select_timeout, 0.01) if self._polled_links else self.select_timeout
+            if self._selector.get_map():
+                events = self._selector.select(timeout)
+            else:
+                self._stop_event.wait(timeout)
+                events = []
+            for key, _ in events:
+                self.poll_link(key.data)
+            for link in self._polled_links:
+                self.poll_link(link)
+
+    def poll_link(self, link: Any) -> int:
+        """
+        Чтение всех уже пришедших сообщений соединения без ожидания.
+
+        Args:
+            link (Any): Соединение MAVLink.
+
+        Returns:
+            int: Число обработанных сообщений.
+        """
+        count = 0
+        while True:
+            try:
+                msg = link.recv_msg()
+            except Exception as e:
+                logger.error(f"Ошибка приёма MAVLink: {e}")
+                return count
+            if msg is None:
+                return count
+            if msg.get_type() != 'BAD_DATA':
+                self.route(link, msg)
+                count += 1
+
+    def route(self, link: Any, msg: Any) -> None:
+        """
+        Передача сообщения приёмнику БПЛА-отправителя.
+
+        Новый БПЛА регистрируется по первому HEARTBEAT от него.
+
+        Args:
+            link (Any): Соединение, из которого пришло сообщение.
+            msg (Any): Декодированное сообщение MAVLink.
+        """
+        system_id = msg.get_srcSystem()
+        vehicle = self._vehicles.get(system_id)
+        if vehicle is None:
+            if msg.get_type() != 'HEARTBEAT' or msg.type == mavutil.mavlink.MAV_TYPE_GCS:
+                return
+            vehicle = self._register(link, msg)
+        vehicle_link = vehicle.master
+        if getattr(link, 'udp_server', False):
+            vehicle_link.address = getattr(link, 'last_address', None)
+        if msg.get_type() == 'HEARTBEAT' and msg.get_srcComponent() == vehicle_link.target_component:
+            vehicle_link.heartbeat = msg
+        vehicle.receiver.dispatch(msg)
+
+    def _register(self, link: Any, heartbeat: Any) -> UAVControl:
+        system_id = heartbeat.get_srcSystem()
+        vehicle_link = VehicleLink(link, heartbeat)
+        vehicle = UAVControl(f"fleet:{system_id}", master=vehicle_link)
+        vehicle.receiver.use_external_feed()
+        with self._condition:
+            self._vehicles[system_id] = vehicle
+            self._condition.notify_all()
+        logger.info(f"Обнаружен БПЛА {system_id}")
+        return vehicle
+
+    def vehicle(self, system_id: int, timeout: float = 10) -> UAVControl:
+        """
+        Объект управления БПЛА с заданным системным идентификатором.
+
+        Args:
+            system_id (int): Системный идентификатор MAVLink.
+            timeout (float): Время ожидания первого HEARTBEAT в секундах.
+
+        Returns:
+            UAVControl: Объект управления БПЛА.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: system_id in self._vehicles, timeout):
+                raise Exception(f"БПЛА {system_id} не обнаружен")
+            return self._vehicles[system_id]
+
+    @property
+    def vehicles(self) -> Dict[int, UAVControl]:
+        """
+        Dict[int, UAVControl]: Обнаруженные БПЛА по системным идентификаторам.
+        """
+        with self._condition:
+            return dict(self._vehicles)
@@ -0,0 +1,330 @@
+# geodesy.py
+
+import math
+from functools import lru_cache
+from typing import Tuple, Sequence, Union
+import numpy as np
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+EARTH_RADIUS = 6371008.8  # Средний радиус Земли в метрах
+
+# Эллипсоид WGS-84
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
+
+def distance_3d(lat1: float, lon1: float, alt1: float,
+                lat2: float, lon2: float, alt2: float) -> float:
+    """
+    Расстояние между двумя точками в метрах (гаверсинус по горизонтали и разность высот).
+
+    Скалярная версия для обработки отдельных сообщений, где накладные
+    расходы NumPy больше самого расчёта.
+
+    Args:
+        lat1 (float): Широта первой точки.
+        lon1 (float): Долгота первой точки.
+        alt1 (float): Высота первой точки в метрах.
+        lat2 (float): Широта второй точки.
+        lon2 (float): Долгота второй точки.
+        alt2 (float): Высота второй точки в метрах.
+
+    Returns:
+        float: Расстояние в метрах.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    horizontal = 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+    return math.hypot(horizontal, alt2 - alt1)
+
+
+def as_waypoint_array(waypoints: Union[Sequence[Tuple[float, float, float]], np.ndarray]) -> np.ndarray:
+    """
+    Преобразование списка точек (lat, lon, alt) в массив формы (N, 3).
+
+    Args:
+        waypoints (Union[Sequence[Tuple[float, float, float]], np.ndarray]): Точки миссии.
+
+    Returns:
+        np.ndarray: Массив float64 формы (N, 3).
+    """
+    array = np.asarray(waypoints, dtype=np.float64)
+    if array.ndim == 1 and array.size == 3:
+        array = array.reshape(1, 3)
+    if array.ndim != 2 or array.shape[1] != 3:
+        raise ValueError("Ожидается массив точек формы (N, 3)")
+    return array
+
+
+def validate_waypoints(waypoints: Union[Sequence[Tuple[float, float, float]], np.ndarray]) -> np.ndarray:
+    """
+    Проверка диапазонов координат всех точек сразу.
+
+    Args:
+        waypoints (Union[Sequence[Tuple[float, float, float]], np.ndarray]): Точки миссии.
+
+    Returns:
+        np.ndarray: Массив точек формы (N, 3).
+
+    Raises:
+        ValueError: Если хотя бы одна точка вне допустимого диапазона.
+    """
+    array = as_waypoint_array(waypoints)
+    bad = ~np.isfinite(array).all(axis=1)
+    bad |= np.abs(array[:, 0]) > 90.0
+    bad |= np.abs(array[:, 1]) > 180.0
+    if bad.any():
+        indices = np.flatnonzero(bad)
+        raise ValueError(f"Некорректные координаты точек: {(indices[:10] + 1).tolist()}")
+    return array
+
+
+def haversine_distance(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike) -> np.ndarray:
+    """
+    Расстояние по дуге большого круга (сфера) в метрах.
+
+    Args:
+        lat1 (ArrayLike): Широты начальных точек в градусах.
+        lon1 (ArrayLike): Долготы начальных точек в градусах.
+        lat2 (ArrayLike): Широты конечных точек в градусах.
+        lon2 (ArrayLike): Долготы конечных точек в градусах.
+
+    Returns:
+        np.ndarray: Расстояния в метрах (с учётом правил broadcasting).
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def vincenty_distance(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike,
+                      max_iterations: int = 200, tolerance: float = 1e-12) -> np.ndarray:
+    """
+    Расстояние на эллипсоиде WGS-84 (обратная задача Винченти) в метрах.
+
+    Для почти антиподальных точек, где итерации не сходятся, возвращается NaN.
+
+    Args:
+        lat1 (ArrayLike): Широты начальных точек в градусах.
+        lon1 (ArrayLike): Долготы начальных точек в градусах.
+        lat2 (ArrayLike): Широты конечных точек в градусах.
+        lon2 (ArrayLike): Долготы конечных точек в градусах.
+        max_iterations (int): Максимальное число итераций.
+        tolerance (float): Точность сходимости по долготе на вспомогательной сфере.
+
+    Returns:
+        np.ndarray: Расстояния в метрах.
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64)
+                                                   for v in (lat1, lon1, lat2, lon2)))
+    f = WGS84_F
+    big_l = np.radians(lon2 - lon1)
+    u1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    u2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+
+    lam = big_l.copy()
+    converged = np.zeros(lam.shape, dtype=bool)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(max_iterations):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha)
+            c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_next = big_l + (1 - c) * f * sin_alpha * (
+                sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+            converged = np.abs(lam_next - lam) < tolerance
+            lam = lam_next
+            if converged.all():
+                break
+
+        u_sq = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+        distance = WGS84_B * big_a * (sigma - delta_sigma)
+    return np.where(converged, distance, np.nan)
+
+
+def initial_bearing(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike) -> np.ndarray:
+    """
+    Начальный азимут от первой точки на вторую в градусах [0, 360).
+
+    Args:
+        lat1 (ArrayLike): Широты начальных точек в градусах.
+        lon1 (ArrayLike): Долготы начальных точек в градусах.
+        lat2 (ArrayLike): Широты конечных точек в градусах.
+        lon2 (ArrayLike): Долготы конечных точек в градусах.
+
+    Returns:
+        np.ndarray: Азимуты в градусах.
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    d_lambda = np.radians(np.subtract(lon2, lon1))
+    y = np.sin(d_lambda) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(d_lambda)
+    return np.degrees(np.arctan2(y, x)) % 360.0
+
+
+def destination_point(lat: ArrayLike, lon: ArrayLike, bearing: ArrayLike,
+                      distance: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Точка, лежащая на заданном расстоянии и азимуте от исходной (сфера).
+
+    Args:
+        lat (ArrayLike): Широты исходных точек в градусах.
+        lon (ArrayLike): Долготы исходных точек в градусах.
+        bearing (ArrayLike): Азимуты в градусах.
+        distance (ArrayLike): Расстояния в метрах.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Широты и долготы конечных точек в градусах.
+    """
+    phi1 = np.radians(lat)
+    lambda1 = np.radians(lon)
+    theta = np.radians(bearing)
+    delta = np.asarray(distance, dtype=np.float64) / EARTH_RADIUS
+    sin_phi2 = np.sin(phi1) * np.cos(delta) + np.cos(phi1) * np.sin(delta) * np.cos(theta)
+    phi2 = np.arcsin(np.clip(sin_phi2, -1.0, 1.0))
+    lambda2 = lambda1 + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(phi1),
+                                   np.cos(delta) - np.sin(phi1) * sin_phi2)
+    lon2 = (np.degrees(lambda2) + 540.0) % 360.0 - 180.0
+    return np.degrees(phi2), lon2
+
+
+def leg_lengths(waypoints: Union[Sequence[Tuple[float, float, float]], np.ndarray]) -> np.ndarray:
+    """
+    Длины участков между соседними точками миссии с учётом высоты.
+
+    Args:
+        waypoints (Union[Sequence[Tuple[float, float, float]], np.ndarray]): Точки миссии.
+
+    Returns:
+        np.ndarray: Массив длиной N-1 с расстояниями в метрах.
+    """
+    array = as_waypoint_array(waypoints)
+    horizontal = haversine_distance(array[:-1, 0], array[:-1, 1], array[1:, 0], array[1:, 1])
+    return np.hypot(horizontal, np.diff(array[:, 2]))
+
+
+def geodetic_to_ecef(lat: ArrayLike, lon: ArrayLike, alt: ArrayLike) -> np.ndarray:
+    """
+    Перевод геодезических координат WGS-84 в ECEF.
+
+    Args:
+        lat (ArrayLike): Широты в градусах.
+        lon (ArrayLike): Долготы в градусах.
+        alt (ArrayLike): Высоты над эллипсоидом в метрах.
+
+    Returns:
+        np.ndarray: Массив формы (..., 3) с координатами X, Y, Z в метрах.
+    """
+    phi = np.radians(lat)
+    lam = np.radians(lon)
+    sin_phi = np.sin(phi)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_phi ** 2)
+    x = (n + alt) * np.cos(phi) * np.cos(lam)
+    y = (n + alt) * np.cos(phi) * np.sin(lam)
+    z = (n * (1 - WGS84_E2) + alt) * sin_phi
+    return np.stack(np.broadcast_arrays(x, y, z), axis=-1)
+
+
+def ecef_to_geodetic(ecef: np.ndarray, iterations: int = 4) -> np.ndarray:
+    """
+    Перевод координат ECEF в геодезические WGS-84.
+
+    Args:
+        ecef (np.ndarray): Массив формы (..., 3) с координатами X, Y, Z в метрах.
+        iterations (int): Число итераций уточнения широты.
+
+    Returns:
+        np.ndarray: Массив формы (..., 3) с широтой, долготой (градусы) и высотой (метры).
+    """
+    ecef = np.asarray(ecef, dtype=np.float64)
+    x, y, z = ecef[..., 0], ecef[..., 1], ecef[..., 2]
+    lam = np.arctan2(y, x)
+    p = np.hypot(x, y)
+    phi = np.arctan2(z, p * (1 - WGS84_E2))
+    for _ in range(iterations):
+        sin_phi = np.sin(phi)
+        n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_phi ** 2)
+        phi = np.arctan2(z + WGS84_E2 * n * sin_phi, p)
+    sin_phi = np.sin(phi)
+    cos_phi = np.cos(phi)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_phi ** 2)
+    # Вблизи полюсов высота надёжнее считается через Z
+    alt = np.where(np.abs(cos_phi) > 1e-6,
+                   p / np.where(cos_phi == 0, 1.0, cos_phi) - n,
+                   np.abs(z) - WGS84_B)
+    return np.stack((np.degrees(phi), np.degrees(lam), alt), axis=-1)
+
+
+@lru_cache(maxsize=64)
+def _ned_frame(lat0: float, lon0: float, alt0: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Начало координат ECEF и матрица поворота ECEF -> NED для заданной точки.
+
+    Результат кэшируется: миссия обычно переводится относительно одной точки старта.
+    """
+    origin = geodetic_to_ecef(lat0, lon0, alt0)
+    phi, lam = math.radians(lat0), math.radians(lon0)
+    sin_phi, cos_phi = math.sin(phi), math.cos(phi)
+    sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+    rotation = np.array([
+        [-sin_phi * cos_lam, -sin_phi * sin_lam, cos_phi],
+        [-sin_lam, cos_lam, 0.0],
+        [-cos_phi * cos_lam, -cos_phi * sin_lam, -sin_phi],
+    ])
+    origin.setflags(write=False)
+    rotation.setflags(write=False)
+    return origin, rotation
+
+
+def global_to_ned(waypoints: Union[Sequence[Tuple[float, float, float]], np.ndarray],
+                  origin: Tuple[float, float, float]) -> np.ndarray:
+    """
+    Перевод точек (lat, lon, alt) в локальную систему NED относительно origin.
+
+    Args:
+        waypoints (Union[Sequence[Tuple[float, float, float]], np.ndarray]): Точки миссии.
+        origin (Tuple[float, float, float]): Начало локальной системы (lat, lon, alt).
+
+    Returns:
+        np.ndarray: Массив формы (N, 3) с координатами север, восток, вниз в метрах.
+    """
+    array = as_waypoint_array(waypoints)
+    ecef0, rotation = _ned_frame(*(float(v) for v in origin))
+    ecef = geodetic_to_ecef(array[:, 0], array[:, 1], array[:, 2])
+    return (ecef - ecef0) @ rotation.T
+
+
+def ned_to_global(ned: np.ndarray, origin: Tuple[float, float, float]) -> np.ndarray:
+    """
+    Перевод локальных координат NED обратно в (lat, lon, alt).
+
+    Args:
+        ned (np.ndarray): Массив формы (N, 3) с координатами север, восток, вниз в метрах.
+        origin (Tuple[float, float, float]): Начало локальной системы (lat, lon, alt).
+
+    Returns:
+        np.ndarray: Массив формы (N, 3) с широтой, долготой и высотой.
+    """
+    ned = np.asarray(ned, dtype=np.float64).reshape(-1, 3)
+    ecef0, rotation = _ned_frame(*(float(v) for v in origin))
+    return ecef_to_geodetic(ned @ rotation + ecef0)
@@ -0,0 +1,476 @@
+# geofence.py
+
+import json
+import math
+import threading
+from typing import Optional, Dict, Any, Iterable, List, Sequence, Tuple, Union
+import numpy as np
+import logging
+
+from geodesy import EARTH_RADIUS, as_waypoint_array
+
+logger = logging.getLogger(__name__)
+
+_DEG = math.pi / 180 * EARTH_RADIUS  # метров в градусе широты
+
+
+class Zone:
+    """
+    Запретная зона: вертикальная призма над плоской фигурой в диапазоне высот.
+
+    Высоты задаются в той же системе, что и точки миссии
+    (относительно точки старта, MAV_FRAME_GLOBAL_RELATIVE_ALT).
+    """
+
+    def __init__(self, name: str, min_alt: float = -math.inf, max_alt: float = math.inf):
+        if min_alt > max_alt:
+            raise ValueError(f"Зона {name}: нижняя граница выше верхней")
+        self.name = name
+        self.min_alt = min_alt
+        self.max_alt = max_alt
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        Границы зоны в градусах (min_lat, min_lon, max_lat, max_lon).
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class PolygonZone(Zone):
+    """
+    Зона в форме многоугольника.
+    """
+
+    def __init__(self, name: str, vertices: Sequence[Tuple[float, float]],
+                 min_alt: float = -math.inf, max_alt: float = math.inf):
+        """
+        Args:
+            name (str): Название зоны.
+            vertices (Sequence[Tuple[float, float]]): Вершины (lat, lon) без повтора первой.
+            min_alt (float): Нижняя граница зоны в метрах.
+            max_alt (float): Верхняя граница зоны в метрах.
+        """
+        super().__init__(name, min_alt, max_alt)
+        vertices = np.asarray(vertices, dtype=np.float64)
+        if len(vertices) > 1 and np.array_equal(vertices[0], vertices[-1]):
+            vertices = vertices[:-1]
+        if vertices.ndim != 2 or vertices.shape[1] != 2 or len(vertices) < 3:
+            raise ValueError(f"Зона {name}: нужно не менее трёх вершин (lat, lon)")
+        self.vertices = vertices
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        lo = self.vertices.min(axis=0)
+        hi = self.vertices.max(axis=0)
+        return lo[0], lo[1], hi[0], hi[1]
+
+
+class CylinderZone(Zone):
+    """
+    Зона в форме вертикального цилиндра.
+    """
+
+    def __init__(self, name: str, lat: float, lon: float, radius: float,
+                 min_alt: float = -math.inf, max_alt: float = math.inf):
+        """
+        Args:
+            name (str): Название зоны.
+            lat (float): Широта центра.
+            lon (float): Долгота центра.
+            radius (float): Радиус в метрах.
+            min_alt (float): Нижняя граница зоны в метрах.
+            max_alt (float): Верхняя граница зоны в метрах.
+        """
+        super().__init__(name, min_alt, max_alt)
+        if radius <= 0:
+            raise ValueError(f"Зона {name}: радиус должен быть положительным")
+        self.lat = lat
+        self.lon = lon
+        self.radius = radius
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        d_lat = self.radius / _DEG
+        d_lon = d_lat / max(math.cos(math.radians(self.lat)), 1e-6)
+        return self.lat - d_lat, self.lon - d_lon, self.lat + d_lat, self.lon + d_lon
+
+
+class GeofenceViolation:
+    """
+    Нарушение запретной зоны участком миссии.
+
+    Attributes:
+        leg (int): Номер участка (от точки leg к точке leg + 1; для миссии из одной точки — 0).
+        zone (Zone): Нарушенная зона.
+    """
+
+    __slots__ = ('leg', 'zone')
+
+    def __init__(self, leg: int, zone: Zone):
+        self.leg = leg
+        self.zone = zone
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, GeofenceViolation) and (self.leg, self.zone) == (other.leg, other.zone)
+
+    def __repr__(self) -> str:
+        return f"GeofenceViolation(leg={self.leg}, zone={self.zone.name!r})"
+
+
+def _polygon_edges(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Рёбра многоугольника: строки x, y вершин, x, y предыдущих вершин и приращения по рёбрам.
+    """
+    xj, yj = np.roll(x, 1), np.roll(y, 1)
+    return np.vstack((x, y, xj, yj, x - xj, y - yj))
+
+
+def _inside_polygon(x: np.ndarray, y: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Проверка точек на попадание в многоугольник (чётность пересечений луча).
+    """
+    xs, ys, xj, yj = edges[0], edges[1], edges[2], edges[3]
+    x = np.asarray(x, dtype=np.float64)[..., None]
+    y = np.asarray(y, dtype=np.float64)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crosses = ((ys > y) != (yj > y)) & (x < (xj - xs) * (y - ys) / (yj - ys) + xs)
+    return np.count_nonzero(crosses, axis=-1) % 2 == 1
+
+
+class Geofence:
+    """
+    Набор запретных зон с пространственным индексом на равномерной сетке.
+
+    Зоны переводятся в локальную плоскую систему (метры, равнопромежуточная
+    проекция относительно центра набора) — для зон масштаба города её
+    погрешность пренебрежимо мала. Каждая зона регистрируется во всех
+    ячейках сетки, которые покрывает её охватывающий прямоугольник. Точка
+    проверяется только по зонам своей ячейки, а участок миссии — по зонам
+    ячеек, через которые он проходит (обход сетки Amanatides–Woo), поэтому
+    время проверки почти не зависит от общего числа зон.
+
+    Участок нарушает зону, если хотя бы часть его горизонтальной проекции
+    внутри зоны проходит на высотах из диапазона зоны (высота меняется
+    вдоль участка линейно).
+    """
+
+    def __init__(self, zones: Iterable[Zone] = (), cell_size: float = 250.0,
+                 origin: Optional[Tuple[float, float]] = None):
+        """
+        Инициализация набора зон.
+
+        Args:
+            zones (Iterable[Zone]): Запретные зоны.
+            cell_size (float): Размер ячейки сетки в метрах.
+            origin (Optional[Tuple[float, float]]): Центр проекции (lat, lon);
+                по умолчанию — центр охватывающего прямоугольника всех зон.
+        """
+        if cell_size <= 0:
+            raise ValueError("Размер ячейки должен быть положительным")
+        self.cell_size = cell_size
+        self.zones: List[Zone] = []
+        self._origin = origin
+        self._fixed_origin = origin is not None
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self._shapes: List[np.ndarray] = []
+        self._boxes = np.empty((0, 4))
+        self._dirty = True
+        # add() может вызываться из основного потока, пока monitor_geofence
+        # проверяет позицию в потоке приёма: индекс строится и читается под блокировкой
+        self._lock = threading.Lock()
+        self.add(zones)
+
+    def add(self, zones: Union[Zone, Iterable[Zone]]) -> None:
+        """
+        Добавление зон (индекс перестраивается при следующей проверке).
+
+        Args:
+            zones (Union[Zone, Iterable[Zone]]): Зона или несколько зон.
+        """
+        if isinstance(zones, Zone):
+            zones = [zones]
+        zones = list(zones)
+        with self._lock:
+            self.zones.extend(zones)
+            self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    @classmethod
+    def from_geojson(cls, source: Union[str, Dict[str, Any]], **kwargs: Any) -> 'Geofence':
+        """
+        Загрузка зон из GeoJSON FeatureCollection.
+
+        Поддерживаются Polygon и MultiPolygon (внешние контуры) и Point со
+        свойством radius (цилиндр). Свойства name, min_alt и max_alt необязательны.
+
+        Args:
+            source (Union[str, Dict[str, Any]]): Путь к файлу или разобранный GeoJSON.
+            **kwargs (Any): Параметры Geofence (cell_size, origin).
+
+        Returns:
+            Geofence: Набор зон.
+        """
+        if isinstance(source, str):
+            with open(source, encoding='utf-8') as f:
+                source = json.load(f)
+        zones: List[Zone] = []
+        for i, feature in enumerate(source.get('features', [])):
+            props = feature.get('properties') or {}
+            geometry = feature.get('geometry') or {}
+            name = str(props.get('name', f"zone-{i}"))
+            alts = {'min_alt': float(props.get('min_alt', -math.inf)),
+                    'max_alt': float(props.get('max_alt', math.inf))}
+            kind = geometry.get('type')
+            if kind == 'Polygon':
+                polygons = [geometry['coordinates']]
+            elif kind == 'MultiPolygon':
+                polygons = geometry['coordinates']
+            elif kind == 'Point' and 'radius' in props:
+                lon, lat = geometry['coordinates'][:2]
+                zones.append(CylinderZone(name, lat, lon, float(props['radius']), **alts))
+                continue
+            else:
+                logger.warning(f"Зона {name}: геометрия {kind} не поддерживается")
+                continue
+            for polygon in polygons:
+                # GeoJSON хранит координаты в порядке (lon, lat)
+                zones.append(PolygonZone(name, [(lat, lon) for lon, lat, *_ in polygon[0]], **alts))
+        return cls(zones, **kwargs)
+
+    def _project(self, lat: Any, lon: Any) -> Tuple[Any, Any]:
+        lat0, lon0 = self._origin
+        x = (np.subtract(lon, lon0)) * _DEG * self._cos_lat0
+        y = (np.subtract(lat, lat0)) * _DEG
+        return x, y
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _build(self) -> None:
+        """
+        Перестроение проекции и сетки после изменения набора зон.
+        """
+        self._dirty = False
+        self._grid = {}
+        self._shapes = []
+        if not self.zones:
+            self._boxes = np.empty((0, 4))
+            return
+        bounds = np.array([zone.bounds() for zone in self.zones])
+        if not self._fixed_origin:
+            self._origin = ((bounds[:, 0].min() + bounds[:, 2].max()) / 2,
+                            (bounds[:, 1].min() + bounds[:, 3].max()) / 2)
+        self._cos_lat0 = math.cos(math.radians(self._origin[0]))
+        boxes = []
+        for index, zone in enumerate(self.zones):
+            if isinstance(zone, PolygonZone):
+                x, y = self._project(zone.vertices[:, 0], zone.vertices[:, 1])
+                shape = _polygon_edges(x, y)
+                box = (x.min(), y.min(), x.max(), y.max())
+            else:
+                cx, cy = self._project(zone.lat, zone.lon)
+                shape = np.array([float(cx), float(cy), zone.radius])
+                box = (shape[0] - zone.radius, shape[1] - zone.radius,
+                       shape[0] + zone.radius, shape[1] + zone.radius)
+            self._shapes.append(shape)
+            boxes.append(box)
+            ix0, iy0 = self._cell(box[0], box[1])
+            ix1, iy1 = self._cell(box[2], box[3])
+            for ix in range(ix0, ix1 + 1):
+                for iy in range(iy0, iy1 + 1):
+                    self._grid.setdefault((ix, iy), []).append(index)
+        self._boxes = np.array(boxes)
+        logger.info(f"Геозона: {len(self.zones)} зон, {len(self._grid)} ячеек сетки")
+
+    def _segment_cells(self, x1: float, y1: float, x2: float, y2: float) -> List[Tuple[int, int]]:
+        """
+        Ячейки сетки, через которые проходит отрезок (обход Amanatides–Woo).
+        """
+        ix, iy = self._cell(x1, y1)
+        end = self._cell(x2, y2)
+        cells = [(ix, iy)]
+        dx, dy = x2 - x1, y2 - y1
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        size = self.cell_size
+        t_max_x = ((ix + (step_x > 0)) * size - x1) / dx if dx else math.inf
+        t_max_y = ((iy + (step_y > 0)) * size - y1) / dy if dy else math.inf
+        t_delta_x = size / abs(dx) if dx else math.inf
+        t_delta_y = size / abs(dy) if dy else math.inf
+        limit = abs(end[0] - ix) + abs(end[1] - iy)
+        while (ix, iy) != end and len(cells) <= limit:
+            if t_max_x == t_max_y:
+                # Отрезок проходит через угол ячейки: соседние по сторонам ячейки тоже касаются его
+                cells.append((ix + step_x, iy))
+                cells.append((ix, iy + step_y))
+                ix += step_x
+                iy += step_y
+                t_max_x += t_delta_x
+                t_max_y += t_delta_y
+                limit += 2
+            elif t_max_x < t_max_y:
+                ix += step_x
+                t_max_x += t_delta_x
+            else:
+                iy += step_y
+                t_max_y += t_delta_y
+            cells.append((ix, iy))
+        return cells
+
+    def _candidates(self, cells: Iterable[Tuple[int, int]]) -> List[int]:
+        seen = set()
+        for cell in cells:
+            seen.update(self._grid.get(cell, ()))
+        return sorted(seen)
+
+    @staticmethod
+    def _alt_overlaps(zone: Zone, alt1: float, alt2: float, t0: float, t1: float) -> bool:
+        a = alt1 + (alt2 - alt1) * t0
+        b = alt1 + (alt2 - alt1) * t1
+        return max(a, b) >= zone.min_alt and min(a, b) <= zone.max_alt
+
+    def _segment_hits(self, index: int, x1: float, y1: float, alt1: float,
+                      x2: float, y2: float, alt2: float) -> bool:
+        """
+        Точная проверка пересечения участка с зоной с учётом высоты.
+        """
+        zone, shape = self.zones[index], self._shapes[index]
+        dx, dy = x2 - x1, y2 - y1
+        if isinstance(zone, CylinderZone):
+            fx, fy = x1 - shape[0], y1 - shape[1]
+            a = dx * dx + dy * dy
+            c = fx * fx + fy * fy - shape[2] * shape[2]
+            if a == 0:
+                return c <= 0 and self._alt_overlaps(zone, alt1, alt2, 0.0, 1.0)
+            b = 2 * (fx * dx + fy * dy)
+            disc = b * b - 4 * a * c
+            if disc < 0:
+                return False
+            root = math.sqrt(disc)
+            t0 = max(0.0, (-b - root) / (2 * a))
+            t1 = min(1.0, (-b + root) / (2 * a))
+            return t0 <= t1 and self._alt_overlaps(zone, alt1, alt2, t0, t1)
+
+        ax, ay, ex, ey = shape[2], shape[3], shape[4], shape[5]
+        denom = dx * ey - dy * ex
+        qx, qy = ax - x1, ay - y1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (qx * ey - qy * ex) / denom
+            u = (qx * dy - qy * dx) / denom
+        valid = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+        # Параметры входа и выхода из многоугольника делят участок на куски,
+        # каждый из которых целиком внутри или целиком снаружи
+        ts = np.unique(np.concatenate(([0.0, 1.0], t[valid])))
+        mids = (ts[:-1] + ts[1:]) / 2
+        inside = _inside_polygon(x1 + dx * mids, y1 + dy * mids, shape)
+        for t0, t1, hit in zip(ts[:-1], ts[1:], inside):
+            if hit and self._alt_overlaps(zone, alt1, alt2, t0, t1):
+                return True
+        return False
+
+    def _point_hits(self, index: int, x: float, y: float, alt: float) -> bool:
+        zone, shape = self.zones[index], self._shapes[index]
+        if not zone.min_alt <= alt <= zone.max_alt:
+            return False
+        box = self._boxes[index]
+        if not (box[0] <= x <= box[2] and box[1] <= y <= box[3]):
+            return False
+        if isinstance(zone, CylinderZone):
+            return (x - shape[0]) ** 2 + (y - shape[1]) ** 2 <= shape[2] ** 2
+        return bool(_inside_polygon(x, y, shape))
+
+    def zones_at(self, lat: float, lon: float, alt: float) -> List[Zone]:
+        """
+        Зоны, внутри которых находится точка (проверка текущей позиции).
+
+        Args:
+            lat (float): Широта.
+            lon (float): Долгота.
+            alt (float): Высота в метрах.
+
+        Returns:
+            List[Zone]: Нарушенные зоны (пустой список, если точка вне зон).
+        """
+        with self._lock:
+            if self._dirty:
+                self._build()
+            if not self.zones:
+                return []
+            x, y = self._project(lat, lon)
+            x, y = float(x), float(y)
+            return [self.zones[i] for i in self._grid.get(self._cell(x, y), ())
+                    if self._point_hits(i, x, y, alt)]
+
+    def check_segment(self, start: Tuple[float, float, float],
+                      end: Tuple[float, float, float]) -> List[Zone]:
+        """
+        Зоны, которые пересекает прямолинейный участок между двумя точками.
+
+        Args:
+            start (Tuple[float, float, float]): Начало участка (lat, lon, alt).
+            end (Tuple[float, float, float]): Конец участка (lat, lon, alt).
+
+        Returns:
+            List[Zone]: Пересечённые зоны в порядке добавления.
+        """
+        with self._lock:
+            if self._dirty:
+                self._build()
+            if not self.zones:
+                return []
+            (x1, x2), (y1, y2) = self._project([start[0], end[0]], [start[1], end[1]])
+            candidates = self._candidates(self._segment_cells(x1, y1, x2, y2))
+            if not candidates:
+                return []
+            # Отсев по охватывающим прямоугольникам: интервал параметра участка внутри
+            # прямоугольника (метод Лианга–Барски) должен быть непустым
+            boxes = self._boxes[candidates]
+            dx, dy = x2 - x1, y2 - y1
+            t_lo = np.zeros(len(candidates))
+            t_hi = np.ones(len(candidates))
+            for p0, delta, lo, hi in ((x1, dx, boxes[:, 0], boxes[:, 2]), (y1, dy, boxes[:, 1], boxes[:, 3])):
+                if delta == 0:
+                    outside = (p0 < lo) | (p0 > hi)
+                    t_hi = np.where(outside, -1.0, t_hi)
+                else:
+                    ta, tb = (lo - p0) / delta, (hi - p0) / delta
+                    t_lo = np.maximum(t_lo, np.minimum(ta, tb))
+                    t_hi = np.minimum(t_hi, np.maximum(ta, tb))
+            near = t_lo <= t_hi
+            return [self.zones[i] for i, ok in zip(candidates, near)
+                    if ok and self._segment_hits(i, x1, y1, start[2], x2, y2, end[2])]
+
+    def validate_mission(self, waypoints: Union[Sequence[Tuple[float, float, float]], np.ndarray]
+                         ) -> List[GeofenceViolation]:
+        """
+        Проверка всех участков миссии (отрезков между точками, а не только самих точек).
+
+        Args:
+            waypoints (Union[Sequence[Tuple[float, float, float]], np.ndarray]): Точки (lat, lon, alt).
+
+        Returns:
+            List[GeofenceViolation]: Нарушения по участкам (пустой список — миссия допустима).
+        """
+        array = as_waypoint_array(waypoints)
+        if len(array) == 1:
+            return [GeofenceViolation(0, zone) for zone in self.zones_at(*array[0])]
+        violations = []
+        for leg in range(len(array) - 1):
+            for zone in self.check_segment(tuple(array[leg]), tuple(array[leg + 1])):
+                violations.append(GeofenceViolation(leg, zone))
+        return violations
+
+    def require_clear(self, waypoints: Union[Sequence[Tuple[float, float, float]], np.ndarray]) -> None:
+        """
+        Проверка миссии с исключением при нарушении.
+
+        Raises:
+            ValueError: Если хотя бы один участок пересекает запретную зону.
+        """
+        violations = self.validate_mission(waypoints)
+        if violations:
+            listed = ', '.join(f"участок {v.leg + 1}: {v.zone.name}" for v in violations[:10])
+            raise ValueError(f"Миссия пересекает запретные зоны ({len(violations)}): {listed}")
@@ -0,0 +1,271 @@
+# kinematic_sim.py
+
+from concurrent import futures
+import math
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Union
+import numpy as np
+import logging
+
+from geodesy import as_waypoint_array, haversine_distance, initial_bearing
+
+logger = logging.getLogger(__name__)
+
+GRAVITY = 9.80665
+
+
+class VehicleModel:
+    """
+    Кинематическая и энергетическая модель мультикоптера для оценки миссий.
+
+    Каждый участок пролетается с остановкой в конечной точке (как при
+    goto() + wait_arrival() в MissionPlanner.execute_mission): скорость
+    набирается и сбрасывается с ограниченным ускорением, горизонтальное
+    и вертикальное движения идут одновременно. Мощность складывается из
+    мощности висения, добавки на горизонтальный полёт и работы против
+    силы тяжести при наборе высоты.
+    """
+
+    __slots__ = ('cruise_speed', 'climb_rate', 'descent_rate', 'land_speed', 'acceleration',
+                 'vertical_acceleration', 'mass', 'hover_power', 'cruise_power', 'climb_efficiency',
+                 'battery_capacity', 'reserve')
+
+    def __init__(self, cruise_speed: float = 5.0, climb_rate: float = 2.5, descent_rate: float = 1.5,
+                 land_speed: float = 0.5, acceleration: float = 2.5, vertical_acceleration: float = 1.0,
+                 mass: float = 1.5, hover_power: float = 180.0, cruise_power: float = 40.0,
+                 climb_efficiency: float = 0.5, battery_capacity: float = 60.0, reserve: float = 0.2):
+        """
+        Args:
+            cruise_speed (float): Воздушная скорость на участках в м/с.
+            climb_rate (float): Скорость набора высоты в м/с.
+            descent_rate (float): Скорость снижения в м/с.
+            land_speed (float): Скорость финальной посадки в м/с.
+            acceleration (float): Горизонтальное ускорение в м/с².
+            vertical_acceleration (float): Вертикальное ускорение в м/с².
+            mass (float): Взлётная масса в кг.
+            hover_power (float): Потребляемая мощность при висении в Вт.
+            cruise_power (float): Добавка мощности при полёте на крейсерской скорости в Вт.
+            climb_efficiency (float): КПД преобразования энергии батареи в набор высоты.
+            battery_capacity (float): Полная ёмкость батареи в Вт·ч.
+            reserve (float): Неприкосновенный остаток ёмкости (доля от 0 до 1).
+        """
+        for name, value in (('cruise_speed', cruise_speed), ('climb_rate', climb_rate),
+                            ('descent_rate', descent_rate), ('land_speed', land_speed),
+                            ('acceleration', acceleration), ('vertical_acceleration', vertical_acceleration),
+                            ('climb_efficiency', climb_efficiency), ('battery_capacity', battery_capacity)):
+            if value <= 0:
+                raise ValueError(f"Параметр модели {name} должен быть положительным")
+        if not 0 <= reserve < 1:
+            raise ValueError("Резерв батареи должен быть в диапазоне [0, 1)")
+        self.cruise_speed = cruise_speed
+        self.climb_rate = climb_rate
+        self.descent_rate = descent_rate
+        self.land_speed = land_speed
+        self.acceleration = acceleration
+        self.vertical_acceleration = vertical_acceleration
+        self.mass = mass
+        self.hover_power = hover_power
+        self.cruise_power = cruise_power
+        self.climb_efficiency = climb_efficiency
+        self.battery_capacity = battery_capacity
+        self.reserve = reserve
+
+    def __repr__(self) -> str:
+        return f"VehicleModel(cruise_speed={self.cruise_speed}, battery_capacity={self.battery_capacity})"
+
+
+class MissionEstimate:
+    """
+    Результат моделирования миссии: время, путь и энергия по участкам и в сумме.
+
+    Участки включают взлёт над точкой старта, перелёты между точками,
+    возврат к точке старта (RTL) и посадку.
+    """
+
+    __slots__ = ('leg_time', 'leg_distance', 'leg_energy', 'battery_start', 'battery_capacity', 'reserve')
+
+    def __init__(self, leg_time: np.ndarray, leg_distance: np.ndarray, leg_energy: np.ndarray,
+                 battery_start: float, battery_capacity: float, reserve: float):
+        self.leg_time = leg_time
+        self.leg_distance = leg_distance
+        self.leg_energy = leg_energy
+        self.battery_start = battery_start
+        self.battery_capacity = battery_capacity
+        self.reserve = reserve
+
+    @property
+    def total_time(self) -> float:
+        """
+        float: Время полёта в секундах (inf, если ветер сильнее крейсерской скорости).
+        """
+        return float(self.leg_time.sum())
+
+    @property
+    def total_distance(self) -> float:
+        """
+        float: Путь в метрах.
+        """
+        return float(self.leg_distance.sum())
+
+    @property
+    def total_energy(self) -> float:
+        """
+        float: Затраченная энергия в Вт·ч.
+        """
+        return float(self.leg_energy.sum())
+
+    @property
+    def battery_end(self) -> float:
+        """
+        float: Ожидаемый заряд после посадки в процентах.
+        """
+        return self.battery_start - 100.0 * self.total_energy / self.battery_capacity
+
+    @property
+    def feasible(self) -> bool:
+        """
+        bool: Миссия укладывается в заряд батареи с учётом резерва.
+        """
+        return math.isfinite(self.total_time) and self.battery_end >= 100.0 * self.reserve
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Итоговые показатели в виде словаря (для журнала и передачи диспетчеру).
+        """
+        return {
+            'time': self.total_time,
+            'distance': self.total_distance,
+            'energy': self.total_energy,
+            'battery_end': self.battery_end,
+            'feasible': self.feasible,
+        }
+
+    def __repr__(self) -> str:
+        return (f"MissionEstimate(time={self.total_time:.1f} с, distance={self.total_distance:.0f} м, "
+                f"energy={self.total_energy:.1f} Вт·ч, battery_end={self.battery_end:.1f}%)")
+
+
+def _profile_time(distance: np.ndarray, speed: np.ndarray, acceleration: float) -> np.ndarray:
+    """
+    Время прохождения расстояния с разгоном от нуля и остановкой (трапециевидный профиль скорости).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cruise = distance / speed + speed / acceleration
+        short = 2.0 * np.sqrt(distance / acceleration)
+        time = np.where(distance >= speed * speed / acceleration, cruise, short)
+    return np.where(distance > 0, time, 0.0)
+
+
+def simulate_mission(waypoints: Union[Sequence[Tuple[float, float, float]], np.ndarray],
+                     home: Tuple[float, float], model: Optional[VehicleModel] = None,
+                     wind: Tuple[float, float] = (0.0, 0.0), battery: float = 100.0) -> MissionEstimate:
+    """
+    Оценка времени, пути и энергии миссии, рассчитанная сразу для всех участков.
+
+    Маршрут: взлёт над home до высоты первой точки, точки миссии по порядку,
+    возврат к home на высоте последней точки и посадка. Ветер постоянный;
+    БПЛА держит крейсерскую воздушную скорость и компенсирует снос, поэтому
+    путевая скорость на участке зависит от его направления.
+
+    Args:
+        waypoints (Union[Sequence[Tuple[float, float, float]], np.ndarray]): Точки (lat, lon, высота
+            относительно точки старта).
+        home (Tuple[float, float]): Точка старта и посадки (lat, lon).
+        model (Optional[VehicleModel]): Модель БПЛА (по умолчанию VehicleModel()).
+        wind (Tuple[float, float]): Скорость ветра в м/с и направление, откуда он дует, в градусах.
+        battery (float): Заряд батареи перед вылетом в процентах.
+
+    Returns:
+        MissionEstimate: Показатели по участкам и в сумме.
+    """
+    model = model or VehicleModel()
+    array = as_waypoint_array(waypoints)
+    route = np.empty((len(array) + 4, 3))
+    route[0] = (home[0], home[1], 0.0)
+    route[1] = (home[0], home[1], array[0, 2])
+    route[2:-2] = array
+    route[-2] = (home[0], home[1], array[-1, 2])
+    route[-1] = (home[0], home[1], 0.0)
+
+    horizontal = haversine_distance(route[:-1, 0], route[:-1, 1], route[1:, 0], route[1:, 1])
+    dz = np.diff(route[:, 2])
+
+    # Путевая скорость: проекция ветра на линию пути плюс компенсирующая снос воздушная скорость
+    wind_speed, wind_from = wind
+    track = np.radians(initial_bearing(route[:-1, 0], route[:-1, 1], route[1:, 0], route[1:, 1]))
+    wind_to = math.radians(wind_from + 180.0)
+    along = wind_speed * np.cos(wind_to - track)
+    cross = wind_speed * np.sin(wind_to - track)
+    with np.errstate(invalid='ignore'):
+        ground_speed = along + np.sqrt(model.cruise_speed ** 2 - cross ** 2)
+    ground_speed = np.where(np.isfinite(ground_speed) & (ground_speed > 0), ground_speed, 0.0)
+
+    with np.errstate(divide='ignore'):
+        horizontal_time = np.where(ground_speed > 0,
+                                   _profile_time(horizontal, ground_speed, model.acceleration), np.inf)
+    horizontal_time = np.where(horizontal > 0, horizontal_time, 0.0)
+    vertical_speed = np.where(dz > 0, model.climb_rate, model.descent_rate)
+    vertical_speed[-1] = model.land_speed
+    vertical_time = _profile_time(np.abs(dz), vertical_speed, model.vertical_acceleration)
+    leg_time = np.maximum(horizontal_time, vertical_time)
+
+    with np.errstate(invalid='ignore'):
+        energy = (model.hover_power * leg_time + model.cruise_power * horizontal_time
+                  + model.mass * GRAVITY * np.maximum(dz, 0.0) / model.climb_efficiency) / 3600.0
+    energy = np.where(np.isfinite(leg_time), energy, np.inf)
+    return MissionEstimate(leg_time, np.hypot(horizontal, dz), energy,
+                           battery, model.battery_capacity, model.reserve)
+
+
+def _simulate_chunk(missions: List[np.ndarray], home: Tuple[float, float], model: VehicleModel,
+                    wind: Tuple[float, float], battery: float) -> List[MissionEstimate]:
+    return [simulate_mission(waypoints, home, model, wind, battery) for waypoints in missions]
+
+
+def simulate_many(missions: Sequence[Union[Sequence[Tuple[float, float, float]], np.ndarray]],
+                  home: Tuple[float, float], model: Optional[VehicleModel] = None,
+                  wind: Tuple[float, float] = (0.0, 0.0), battery: float = 100.0,
+                  processes: Optional[int] = None, chunk_size: int = 64) -> List[MissionEstimate]:
+    """
+    Моделирование множества вариантов миссии, при необходимости в пуле процессов.
+
+    Варианты передаются процессам пачками по chunk_size, чтобы накладные
+    расходы на передачу данных не превышали время расчёта.
+
+    Args:
+        missions (Sequence[...]): Варианты миссии (списки точек или массивы (N, 3)).
+        home (Tuple[float, float]): Точка старта (lat, lon).
+        model (Optional[VehicleModel]): Модель БПЛА.
+        wind (Tuple[float, float]): Скорость ветра в м/с и направление, откуда он дует.
+        battery (float): Заряд батареи перед вылетом в процентах.
+        processes (Optional[int]): Число процессов (None — по числу ядер, 1 — в текущем процессе).
+        chunk_size (int): Число вариантов в одной задаче пула.
+
+    Returns:
+        List[MissionEstimate]: Оценки в порядке вариантов.
+    """
+    model = model or VehicleModel()
+    missions = [as_waypoint_array(waypoints) for waypoints in missions]
+    chunks = [missions[i:i + chunk_size] for i in range(0, len(missions), chunk_size)]
+    if processes == 1 or len(chunks) <= 1:
+        return _simulate_chunk(missions, home, model, wind, battery)
+    results: List[MissionEstimate] = []
+    with futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        jobs = [executor.submit(_simulate_chunk, chunk, home, model, wind, battery) for chunk in chunks]
+        for job in jobs:
+            results.extend(job.result())
+    logger.info(f"Смоделировано вариантов миссии: {len(results)}")
+    return results
+
+
+def rank_missions(estimates: Sequence[MissionEstimate]) -> List[int]:
+    """
+    Номера вариантов, выполнимых по заряду, в порядке возрастания времени полёта.
+
+    Args:
+        estimates (Sequence[MissionEstimate]): Оценки вариантов.
+
+    Returns:
+        List[int]: Номера выполнимых вариантов, лучший первым.
+    """
+    feasible = [index for index, estimate in enumerate(estimates) if estimate.feasible]
+    return sorted(feasible, key=lambda index: estimates[index].total_time)
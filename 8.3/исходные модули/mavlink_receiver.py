@@ -0,0 +1,369 @@
+# mavlink_receiver.py
+
+import threading
+import queue
+import time
+from typing import Optional, Dict, Any, Iterable, Callable, List, Tuple, FrozenSet
+from selective_decode import SelectiveDecoder, message_ids
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Подписка на входящие сообщения MAVLink выбранных типов.
+
+    Сообщения складываются в очередь в порядке поступления, поэтому,
+    пока подписка открыта, ни одно подходящее сообщение не теряется.
+    """
+
+    def __init__(self, receiver: 'MavlinkReceiver', types: Optional[Iterable[str]] = None,
+                 condition: Optional[Callable[[Any], bool]] = None):
+        """
+        Создание подписки.
+
+        Args:
+            receiver (MavlinkReceiver): Приёмник, к которому относится подписка.
+            types (Optional[Iterable[str]]): Типы сообщений (None — все типы).
+            condition (Optional[Callable[[Any], bool]]): Дополнительный фильтр сообщений.
+        """
+        self.receiver = receiver
+        self.types = set(types) if types is not None else None
+        self.condition = condition
+        self._queue: 'queue.Queue[Any]' = queue.Queue()
+
+    def offer(self, msg: Any) -> None:
+        """
+        Передача сообщения в подписку (вызывается приёмником).
+
+        Args:
+            msg (Any): Декодированное сообщение MAVLink.
+        """
+        if self.types is not None and msg.get_type() not in self.types:
+            return
+        if self.condition is not None and not self.condition(msg):
+            return
+        self._queue.put(msg)
+
+    def get(self, timeout: float) -> Optional[Any]:
+        """
+        Получение следующего сообщения подписки.
+
+        Если фоновый поток приёмника не запущен, чтение из соединения
+        выполняется в вызывающем потоке.
+
+        Args:
+            timeout (float): Время ожидания в секундах.
+
+        Returns:
+            Optional[Any]: Сообщение или None, если время ожидания истекло.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if self.receiver.running:
+                try:
+                    return self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    return None
+            self.receiver.poll(min(remaining, self.receiver.poll_timeout))
+
+    @property
+    def pending(self) -> int:
+        """
+        int: Число принятых, но ещё не прочитанных сообщений.
+        """
+        return self._queue.qsize()
+
+    def close(self) -> None:
+        """
+        Отключение подписки от приёмника.
+        """
+        self.receiver.unsubscribe(self)
+
+    def __enter__(self) -> 'Subscription':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class MavlinkReceiver:
+    """
+    Приёмник MAVLink, который непрерывно вычитывает соединение и хранит
+    последнее сообщение каждого типа в кэше, защищённом блокировкой.
+    """
+
+    def __init__(self, master: Any, poll_timeout: float = 0.1, selective_decode: bool = False):
+        """
+        Инициализация приёмника.
+
+        Args:
+            master (Any): Соединение MAVLink (mavutil.mavlink_connection).
+            poll_timeout (float): Таймаут одного чтения из соединения в секундах.
+            selective_decode (bool): Декодировать только типы, на которые есть
+                подписки, типизированные обработчики или заявки want().
+        """
+        self.master = master
+        self.poll_timeout = poll_timeout
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Any] = {}
+        self._received_at: Dict[str, float] = {}
+        self._subscriptions: List[Subscription] = []
+        self._listeners: List[Tuple[Callable[[Any], None], Optional[FrozenSet[str]]]] = []
+        self._wanted: set = set()
+        self._wanted_ids: Optional[FrozenSet[int]] = None
+        self._wanted_dirty = True
+        self.decoder = SelectiveDecoder(master, self.wanted_ids) if selective_decode else None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._external = False
+        self.recv_blocked = 0.0  # суммарное время ожидания в recv_match(), секунды
+
+    @property
+    def running(self) -> bool:
+        """
+        bool: True, если сообщения поступают без участия вызывающего потока
+        (запущен фоновый поток или приёмник питается внешним циклом).
+        """
+        return self._external or (self._thread is not None and self._thread.is_alive())
+
+    def use_external_feed(self) -> None:
+        """
+        Переключение на внешнюю подачу сообщений через dispatch().
+
+        Используется, когда соединение читает общий цикл (например, FleetManager),
+        а не собственный поток приёмника.
+        """
+        self.stop()
+        self._external = True
+
+    def start(self) -> None:
+        """
+        Запуск фонового потока чтения соединения.
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="mavlink-receiver", daemon=True)
+        self._thread.start()
+        logger.info("Фоновый приём MAVLink запущен")
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """
+        Остановка фонового потока чтения.
+
+        Args:
+            timeout (float): Время ожидания завершения потока в секундах.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+        logger.info("Фоновый приём MAVLink остановлен")
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.poll(self.poll_timeout)
+            except Exception as e:
+                logger.error(f"Ошибка приёма MAVLink: {e}")
+                self._stop_event.wait(self.poll_timeout)
+
+    def poll(self, timeout: float) -> Optional[Any]:
+        """
+        Однократное чтение сообщения из соединения и его рассылка.
+
+        Args:
+            timeout (float): Время ожидания сообщения в секундах.
+
+        Returns:
+            Optional[Any]: Принятое сообщение или None.
+        """
+        source = self.decoder if self.decoder is not None else self.master
+        start = time.perf_counter()
+        try:
+            msg = source.recv_match(blocking=True, timeout=timeout)
+        finally:
+            self.recv_blocked += time.perf_counter() - start
+        if msg is None or msg.get_type() == 'BAD_DATA':
+            return None
+        self.dispatch(msg)
+        return msg
+
+    def dispatch(self, msg: Any) -> None:
+        """
+        Сохранение сообщения в кэше и передача его подписчикам.
+
+        Args:
+            msg (Any): Декодированное сообщение MAVLink.
+        """
+        msg_type = msg.get_type()
+        with self._lock:
+            self._latest[msg_type] = msg
+            self._received_at[msg_type] = time.time()
+            subscriptions = list(self._subscriptions)
+            listeners = list(self._listeners)
+        for subscription in subscriptions:
+            subscription.offer(msg)
+        for listener, types in listeners:
+            if types is not None and msg_type not in types:
+                continue
+            try:
+                listener(msg)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика сообщения {msg_type}: {e}")
+
+    def latest(self, msg_type: str) -> Optional[Any]:
+        """
+        Последнее принятое сообщение заданного типа.
+
+        Args:
+            msg_type (str): Тип сообщения MAVLink.
+
+        Returns:
+            Optional[Any]: Сообщение или None, если такого ещё не было.
+        """
+        with self._lock:
+            return self._latest.get(msg_type)
+
+    def age(self, msg_type: str) -> Optional[float]:
+        """
+        Время с момента приёма последнего сообщения заданного типа.
+
+        Args:
+            msg_type (str): Тип сообщения MAVLink.
+
+        Returns:
+            Optional[float]: Возраст сообщения в секундах или None.
+        """
+        with self._lock:
+            received_at = self._received_at.get(msg_type)
+        if received_at is None:
+            return None
+        return time.time() - received_at
+
+    def snapshot(self, types: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Согласованный срез кэша последних сообщений.
+
+        Args:
+            types (Optional[Iterable[str]]): Интересующие типы (None — все).
+
+        Returns:
+            Dict[str, Any]: Словарь "тип сообщения -> последнее сообщение".
+        """
+        with self._lock:
+            if types is None:
+                return dict(self._latest)
+            return {t: self._latest[t] for t in types if t in self._latest}
+
+    def backlog(self) -> int:
+        """
+        Наибольшее число непрочитанных сообщений среди открытых подписок.
+
+        Returns:
+            int: Длина самой длинной очереди подписки.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return max((subscription.pending for subscription in subscriptions), default=0)
+
+    def subscribe(self, types: Optional[Iterable[str]] = None,
+                  condition: Optional[Callable[[Any], bool]] = None) -> Subscription:
+        """
+        Создание подписки на входящие сообщения.
+
+        Args:
+            types (Optional[Iterable[str]]): Типы сообщений (None — все типы).
+            condition (Optional[Callable[[Any], bool]]): Дополнительный фильтр.
+
+        Returns:
+            Subscription: Подписка; её нужно закрыть после использования.
+        """
+        subscription = Subscription(self, types, condition)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            self._wanted_dirty = True
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Удаление подписки.
+
+        Args:
+            subscription (Subscription): Ранее созданная подписка.
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                self._wanted_dirty = True
+
+    def add_listener(self, listener: Callable[[Any], None], types: Optional[Iterable[str]] = None) -> None:
+        """
+        Регистрация обработчика, вызываемого для каждого принятого сообщения.
+
+        Args:
+            listener (Callable[[Any], None]): Обработчик сообщения.
+            types (Optional[Iterable[str]]): Типы сообщений. При выборочном
+                декодировании эти типы декодируются ради обработчика; обработчик
+                без типов получает только то, что декодируется для других.
+        """
+        with self._lock:
+            self._listeners.append((listener, frozenset(types) if types is not None else None))
+            self._wanted_dirty = True
+
+    def remove_listener(self, listener: Callable[[Any], None]) -> None:
+        """
+        Удаление обработчика сообщений.
+
+        Args:
+            listener (Callable[[Any], None]): Ранее зарегистрированный обработчик.
+        """
+        with self._lock:
+            self._listeners = [(fn, types) for fn, types in self._listeners if fn != listener]
+            self._wanted_dirty = True
+
+    def want(self, types: Iterable[str]) -> None:
+        """
+        Постоянная заявка на декодирование типов (например, для кэша latest()).
+
+        Args:
+            types (Iterable[str]): Типы сообщений MAVLink.
+        """
+        with self._lock:
+            self._wanted.update(types)
+            self._wanted_dirty = True
+
+    def wanted_ids(self) -> Optional[FrozenSet[int]]:
+        """
+        Идентификаторы сообщений, которые нужно декодировать.
+
+        Returns:
+            Optional[FrozenSet[int]]: Идентификаторы или None, если нужны все сообщения
+            (есть подписка без фильтра по типам).
+        """
+        with self._lock:
+            if self._wanted_dirty:
+                types = set(self._wanted)
+                everything = False
+                for subscription in self._subscriptions:
+                    if subscription.types is None:
+                        everything = True
+                        break
+                    types.update(subscription.types)
+                for _, listener_types in self._listeners:
+                    if listener_types is not None:
+                        types.update(listener_types)
+                self._wanted_ids = None if everything else message_ids(types)
+                self._wanted_dirty = False
+            return self._wanted_ids
@@ -0,0 +1,352 @@
+# metrics.py
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import bisect
+import threading
+from typing import Optional, Dict, Any, Callable, List, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы по умолчанию (секунды)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels_key(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra is not None else [])
+    if not items:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    """
+    Общая часть метрик: имя, описание и значения по наборам меток.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, function: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.help = help
+        self.function = function
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, Any] = {}
+
+    def samples(self) -> Dict[Labels, float]:
+        """
+        Текущие значения по наборам меток.
+
+        Для метрик с function значение запрашивается при каждом вызове;
+        функция может вернуть число или словарь "метки -> число".
+        """
+        if self.function is None:
+            with self._lock:
+                return dict(self._values)
+        value = self.function()
+        if isinstance(value, dict):
+            return {_labels_key(labels): float(v) for labels, v in value.items()}
+        return {(): float(value)}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """
+    Монотонно растущий счётчик.
+    """
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """
+        Увеличение счётчика.
+
+        Args:
+            amount (float): Приращение (неотрицательное).
+            **labels (Any): Метки значения.
+        """
+        if amount < 0:
+            raise ValueError("Счётчик не может уменьшаться")
+        key = _labels_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """
+        Значение счётчика с заданными метками.
+        """
+        return self.samples().get(_labels_key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """
+    Значение, которое может как расти, так и уменьшаться.
+    """
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels: Any) -> None:
+        """
+        Установка значения.
+
+        Args:
+            value (float): Новое значение.
+            **labels (Any): Метки значения.
+        """
+        with self._lock:
+            self._values[_labels_key(labels)] = float(value)
+
+    def value(self, **labels: Any) -> float:
+        """
+        Значение с заданными метками.
+        """
+        return self.samples().get(_labels_key(labels), 0.0)
+
+
+class _HistogramValue:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """
+    Распределение значений по корзинам с фиксированными границами.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """
+        Учёт одного наблюдения.
+
+        Args:
+            value (float): Наблюдаемое значение.
+            **labels (Any): Метки значения.
+        """
+        key = _labels_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            hist = self._values.get(key)
+            if hist is None:
+                hist = self._values[key] = _HistogramValue(len(self.buckets) + 1)
+            hist.counts[index] += 1
+            hist.sum += value
+            hist.count += 1
+
+    def summary(self, **labels: Any) -> Dict[str, Any]:
+        """
+        Сводка по наблюдениям с заданными метками.
+
+        Returns:
+            Dict[str, Any]: count, sum и накопленные счётчики по границам корзин.
+        """
+        with self._lock:
+            hist = self._values.get(_labels_key(labels))
+            if hist is None:
+                return {'count': 0, 'sum': 0.0, 'buckets': {}}
+            counts, total, count = list(hist.counts), hist.sum, hist.count
+        cumulative, buckets = 0, {}
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            cumulative += n
+            buckets[bound] = cumulative
+        return {'count': count, 'sum': total, 'buckets': buckets}
+
+    def samples(self) -> Dict[Labels, Dict[str, Any]]:
+        with self._lock:
+            keys = list(self._values)
+        return {key: self.summary(**dict(key)) for key in keys}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, summary in sorted(self.samples().items()):
+            for bound, count in summary['buckets'].items():
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(summary['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {summary['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик с выдачей значений по запросу и в текстовом формате Prometheus.
+
+    Значения обновляются на месте (счётчики, гистограммы) или вычисляются
+    функцией в момент запроса, поэтому сбор метрик не требует отдельного
+    потока. serve() поднимает локальный HTTP-сервер, отдающий render().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+
+    def _register(self, cls: type, name: str, *args: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Метрика {name} уже зарегистрирована с другим типом")
+            return metric
+
+    def counter(self, name: str, help: str, function: Optional[Callable[[], Any]] = None) -> Counter:
+        """
+        Счётчик с заданным именем (создаётся при первом обращении).
+
+        Args:
+            name (str): Имя метрики.
+            help (str): Описание.
+            function (Optional[Callable[[], Any]]): Функция, возвращающая значение при запросе.
+
+        Returns:
+            Counter: Счётчик.
+        """
+        return self._register(Counter, name, help, function)
+
+    def gauge(self, name: str, help: str, function: Optional[Callable[[], Any]] = None) -> Gauge:
+        """
+        Показатель с заданным именем (создаётся при первом обращении).
+
+        Args:
+            name (str): Имя метрики.
+            help (str): Описание.
+            function (Optional[Callable[[], Any]]): Функция, возвращающая значение при запросе.
+
+        Returns:
+            Gauge: Показатель.
+        """
+        return self._register(Gauge, name, help, function)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Гистограмма с заданным именем (создаётся при первом обращении).
+
+        Args:
+            name (str): Имя метрики.
+            help (str): Описание.
+            buckets (Sequence[float]): Верхние границы корзин.
+
+        Returns:
+            Histogram: Гистограмма.
+        """
+        return self._register(Histogram, name, help, buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """
+        Метрика по имени или None.
+        """
+        with self._lock:
+            return self._metrics.get(name)
+
+    def collect(self) -> Dict[str, Dict[Labels, Any]]:
+        """
+        Текущие значения всех метрик.
+
+        Returns:
+            Dict[str, Dict[Labels, Any]]: Словарь "имя -> (метки -> значение)";
+            для гистограмм значение — сводка summary().
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        result = {}
+        for metric in metrics:
+            try:
+                result[metric.name] = metric.samples()
+            except Exception as e:
+                logger.error(f"Ошибка сбора метрики {metric.name}: {e}")
+        return result
+
+    def render(self) -> str:
+        """
+        Все метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Текст для выдачи по HTTP.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logger.error(f"Ошибка сбора метрики {metric.name}: {e}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int = 9102, host: str = '127.0.0.1') -> Tuple[str, int]:
+        """
+        Запуск HTTP-сервера, отдающего метрики по адресу /metrics.
+
+        Args:
+            port (int): Порт (0 — любой свободный).
+            host (str): Адрес прослушивания (по умолчанию только локальный).
+
+        Returns:
+            Tuple[str, int]: Фактический адрес сервера.
+        """
+        if self._server is not None:
+            return self._server.server_address[:2]
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"Запрос метрик: {format % args}")
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(target=self._server.serve_forever,
+                                               name="metrics-http", daemon=True)
+        self._server_thread.start()
+        address = self._server.server_address[:2]
+        logger.info(f"Метрики доступны по адресу http://{address[0]}:{address[1]}/metrics")
+        return address
+
+    def stop_serving(self) -> None:
+        """
+        Остановка HTTP-сервера метрик.
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server_thread.join()
+        self._server = None
+        self._server_thread = None
@@ -0,0 +1,475 @@
+# mission_files.py
+
+import collections
+import json
+import math
+import re
+from typing import Optional, Dict, Any, Iterable, Iterator, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+WPL_HEADER = 'QGC WPL 110'
+
+MAV_CMD_NAV_WAYPOINT = 16
+MAV_FRAME_GLOBAL = 0
+MAV_FRAME_GLOBAL_RELATIVE_ALT = 3
+# Кадры, в которых x и y — широта и долгота (в MISSION_ITEM_INT передаются в градусах * 1e7)
+GLOBAL_FRAMES = frozenset((0, 3, 5, 6, 10, 11))
+# Кадры с высотой относительно точки старта
+RELATIVE_FRAMES = frozenset((3, 6))
+
+_WHITESPACE = re.compile(r'\s*')
+_NUMBER = re.compile(r'[-+0-9.eE]*')
+
+
+class MissionItem:
+    """
+    Пункт миссии MAVLink: команда, система координат, параметры 1–4 и координаты.
+
+    Хранит ровно то, что передаётся в MISSION_ITEM(_INT) и записывается
+    в файлы WPL и .plan, поэтому пункты из файла загружаются на БПЛА
+    без потери команд, отличных от MAV_CMD_NAV_WAYPOINT.
+    """
+
+    __slots__ = ('command', 'frame', 'params', 'lat', 'lon', 'alt', 'autocontinue')
+
+    def __init__(self, lat: float, lon: float, alt: float, command: int = MAV_CMD_NAV_WAYPOINT,
+                 frame: int = MAV_FRAME_GLOBAL_RELATIVE_ALT, params: Tuple[float, float, float, float] = (0, 0, 0, 0),
+                 autocontinue: bool = True):
+        """
+        Args:
+            lat (float): Широта (или параметр 5 для негеографических кадров).
+            lon (float): Долгота (или параметр 6).
+            alt (float): Высота (или параметр 7).
+            command (int): Команда MAV_CMD.
+            frame (int): Система координат MAV_FRAME.
+            params (Tuple[float, float, float, float]): Параметры 1–4 (NaN — "не менять").
+            autocontinue (bool): Переходить к следующему пункту автоматически.
+        """
+        if len(params) != 4:
+            raise ValueError("Пункт миссии должен иметь четыре параметра")
+        self.lat = float(lat)
+        self.lon = float(lon)
+        self.alt = float(alt)
+        self.command = int(command)
+        self.frame = int(frame)
+        self.params = tuple(float(p) for p in params)
+        self.autocontinue = bool(autocontinue)
+
+    @classmethod
+    def coerce(cls, item: Union['MissionItem', Tuple[float, float, float]]) -> 'MissionItem':
+        """
+        Пункт миссии из точки (lat, lon, alt) или сам пункт без изменений.
+        """
+        if isinstance(item, cls):
+            return item
+        lat, lon, alt = item
+        return cls(lat, lon, alt)
+
+    @property
+    def waypoint(self) -> Tuple[float, float, float]:
+        """
+        Tuple[float, float, float]: Координаты пункта (lat, lon, alt).
+        """
+        return self.lat, self.lon, self.alt
+
+    @property
+    def has_position(self) -> bool:
+        """
+        bool: Пункт задаёт точку в глобальных координатах.
+        """
+        return self.frame in GLOBAL_FRAMES and not (self.lat == 0 and self.lon == 0)
+
+    def to_plan(self, jump_id: int) -> Dict[str, Any]:
+        """
+        Пункт в формате SimpleItem файла .plan QGroundControl.
+
+        Args:
+            jump_id (int): Номер пункта для DO_JUMP (doJumpId, с единицы).
+
+        Returns:
+            Dict[str, Any]: Объект JSON.
+        """
+        params = [None if math.isnan(p) else p for p in self.params + (self.lat, self.lon, self.alt)]
+        return {
+            'autoContinue': self.autocontinue,
+            'command': self.command,
+            'doJumpId': jump_id,
+            'frame': self.frame,
+            'params': params,
+            'type': 'SimpleItem',
+        }
+
+    @classmethod
+    def from_plan(cls, item: Dict[str, Any]) -> 'MissionItem':
+        """
+        Пункт из объекта SimpleItem файла .plan.
+
+        Raises:
+            ValueError: Если в объекте нет команды или семи параметров.
+        """
+        try:
+            params = [math.nan if p is None else float(p) for p in item['params']]
+            command, frame = item['command'], item['frame']
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Некорректный пункт миссии в файле .plan: {e}")
+        if len(params) != 7:
+            raise ValueError("Пункт миссии в файле .plan должен иметь семь параметров")
+        lat, lon, alt = (0.0 if math.isnan(p) else p for p in params[4:])
+        return cls(lat, lon, alt, command, frame, params[:4], item.get('autoContinue', True))
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, MissionItem):
+            return NotImplemented
+        return (self.command, self.frame, self.waypoint, self.autocontinue) == \
+            (other.command, other.frame, other.waypoint, other.autocontinue) and \
+            all(a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(self.params, other.params))
+
+    def __repr__(self) -> str:
+        return f"MissionItem(command={self.command}, frame={self.frame}, lat={self.lat}, lon={self.lon}, alt={self.alt})"
+
+
+def read_wpl(path: str) -> Iterator[MissionItem]:
+    """
+    Построчное чтение пунктов миссии из файла QGC WPL 110.
+
+    Строка файла: seq, current, frame, command, param1–4, x, y, z, autocontinue
+    (через табуляцию). Пункты выдаются по одному, в памяти держится только
+    текущая строка. В файлах ArduPilot строка 0 — точка старта; она
+    выдаётся как обычный пункт, потому что и при загрузке на борт
+    ArduPilot ожидает её под номером 0.
+
+    Args:
+        path (str): Путь к файлу.
+
+    Yields:
+        MissionItem: Пункты в порядке файла.
+
+    Raises:
+        ValueError: Если нет заголовка или строка не разбирается.
+    """
+    with open(path, encoding='utf-8') as f:
+        header = f.readline().strip()
+        if not header.startswith('QGC WPL'):
+            raise ValueError(f"Файл {path} не является миссией QGC WPL")
+        if header != WPL_HEADER:
+            logger.warning(f"Версия формата {header!r} отличается от {WPL_HEADER!r}")
+        for number, line in enumerate(f, start=2):
+            fields = line.split()
+            if not fields:
+                continue
+            if len(fields) != 12:
+                raise ValueError(f"{path}:{number}: ожидалось 12 полей, получено {len(fields)}")
+            try:
+                values = [float(v) for v in fields[4:11]]
+                yield MissionItem(values[4], values[5], values[6], int(fields[3]), int(fields[2]),
+                                  values[:4], int(float(fields[11])) != 0)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: {e}")
+
+
+def write_wpl(path: str, items: Iterable[Union[MissionItem, Tuple[float, float, float]]]) -> int:
+    """
+    Потоковая запись пунктов миссии в файл QGC WPL 110.
+
+    Args:
+        path (str): Путь к файлу.
+        items (Iterable[Union[MissionItem, Tuple[float, float, float]]]): Пункты или точки (lat, lon, alt);
+            итератор читается один раз.
+
+    Returns:
+        int: Число записанных пунктов.
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(WPL_HEADER + '\n')
+        for seq, item in enumerate(items):
+            item = MissionItem.coerce(item)
+            values = '\t'.join(f"{v:.8f}" for v in item.params + item.waypoint)
+            f.write(f"{seq}\t{1 if seq == 0 else 0}\t{item.frame}\t{item.command}\t{values}\t"
+                    f"{int(item.autocontinue)}\n")
+            count += 1
+    logger.info(f"В {path} записано пунктов миссии: {count}")
+    return count
+
+
+class _JsonStream:
+    """
+    Последовательный разбор JSON из файла порциями.
+
+    Значения разбираются json.JSONDecoder.raw_decode по мере чтения;
+    прочитанная часть буфера отбрасывается, поэтому память ограничена
+    размером самого крупного отдельного значения.
+    """
+
+    def __init__(self, f: Any, chunk_size: int):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        data = self._file.read(size)
+        if not data:
+            return False
+        self._buffer = self._buffer[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Следующий значащий символ ('' в конце файла).
+        """
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(self._chunk_size):
+                return ''
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Некорректный файл .plan: ожидался символ {char!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """
+        Очередное значение JSON целиком.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                # Значение не поместилось в буфер: дочитываем, удваивая порцию
+                if not self._fill(max(self._chunk_size, len(self._buffer) - self._pos)):
+                    raise ValueError(f"Некорректный файл .plan: {e.msg}")
+                continue
+            # Число, дошедшее до конца буфера, может продолжаться в следующей порции ("47." + "39")
+            if isinstance(value, (int, float)) and \
+                    _NUMBER.match(self._buffer, self._pos).end() == len(self._buffer) and \
+                    self._fill(self._chunk_size):
+                continue
+            self._pos = end
+            return value
+
+    def _sequence(self, close: str) -> Iterator[None]:
+        if self.peek() == close:
+            self._pos += 1
+            return
+        while True:
+            yield None
+            char = self.peek()
+            self._pos += 1
+            if char == close:
+                return
+            if char != ',':
+                raise ValueError(f"Некорректный файл .plan: ожидался символ ',' или {close!r}")
+
+    def members(self) -> Iterator[str]:
+        """
+        Ключи объекта; значение каждого ключа читает вызывающий код.
+        """
+        self.expect('{')
+        for _ in self._sequence('}'):
+            key = self.value()
+            self.expect(':')
+            yield key
+
+    def elements(self) -> Iterator[None]:
+        """
+        Элементы массива; каждый элемент читает вызывающий код.
+        """
+        self.expect('[')
+        return self._sequence(']')
+
+
+def _plan_items(item: Dict[str, Any]) -> Iterator[MissionItem]:
+    kind = item.get('type')
+    if kind == 'SimpleItem':
+        yield MissionItem.from_plan(item)
+    elif kind == 'ComplexItem':
+        # Съёмка и коридор хранят сгенерированные пункты в TransectStyleComplexItem.Items
+        generated = (item.get('TransectStyleComplexItem') or {}).get('Items')
+        if generated is None:
+            raise ValueError(f"Сложный пункт {item.get('complexItemType')!r} не содержит сгенерированных пунктов")
+        for sub in generated:
+            yield from _plan_items(sub)
+    else:
+        raise ValueError(f"Неизвестный тип пункта миссии {kind!r}")
+
+
+def read_plan(path: str, chunk_size: int = 65536) -> Iterator[MissionItem]:
+    """
+    Потоковое чтение пунктов миссии из файла .plan QGroundControl.
+
+    Массив mission.items разбирается по одному элементу, поэтому файл
+    с сотнями тысяч пунктов не загружается в память целиком. Сложные
+    пункты (съёмка, коридор) разворачиваются в сохранённые в них простые
+    пункты; геозоны и точки сбора пропускаются.
+
+    Args:
+        path (str): Путь к файлу.
+        chunk_size (int): Размер порции чтения в символах.
+
+    Yields:
+        MissionItem: Пункты в порядке файла.
+
+    Raises:
+        ValueError: Если файл не является корректным .plan.
+    """
+    with open(path, encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        for key in stream.members():
+            if key == 'fileType':
+                if stream.value() != 'Plan':
+                    raise ValueError(f"Файл {path} не является планом QGroundControl")
+            elif key == 'mission':
+                for mission_key in stream.members():
+                    if mission_key != 'items':
+                        stream.value()
+                        continue
+                    for _ in stream.elements():
+                        yield from _plan_items(stream.value())
+            else:
+                stream.value()
+
+
+def write_plan(path: str, items: Iterable[Union[MissionItem, Tuple[float, float, float]]],
+               home: Optional[Tuple[float, float, float]] = None, cruise_speed: float = 15.0,
+               hover_speed: float = 5.0) -> int:
+    """
+    Потоковая запись пунктов миссии в файл .plan QGroundControl.
+
+    Пункты записываются по мере чтения итератора; остальная часть файла
+    (плановая точка старта, пустые геозоны и точки сбора) дописывается
+    в конце.
+
+    Args:
+        path (str): Путь к файлу.
+        items (Iterable[Union[MissionItem, Tuple[float, float, float]]]): Пункты или точки (lat, lon, alt).
+        home (Optional[Tuple[float, float, float]]): Плановая точка старта (по умолчанию первый пункт).
+        cruise_speed (float): Крейсерская скорость самолёта в м/с.
+        hover_speed (float): Скорость коптера в м/с.
+
+    Returns:
+        int: Число записанных пунктов.
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n    "fileType": "Plan",\n'
+                '    "geoFence": {"circles": [], "polygons": [], "version": 2},\n'
+                '    "groundStation": "QGroundControl",\n'
+                '    "mission": {\n'
+                f'        "cruiseSpeed": {json.dumps(cruise_speed)},\n'
+                '        "firmwareType": 3,\n'
+                f'        "hoverSpeed": {json.dumps(hover_speed)},\n'
+                '        "items": [')
+        for item in items:
+            item = MissionItem.coerce(item)
+            if home is None:
+                home = item.waypoint
+            f.write(',\n            ' if count else '\n            ')
+            f.write(json.dumps(item.to_plan(count + 1), allow_nan=False))
+            count += 1
+        f.write('\n        ],\n'
+                f'        "plannedHomePosition": {json.dumps(list(home or (0, 0, 0)))},\n'
+                '        "vehicleType": 2,\n'
+                '        "version": 2\n'
+                '    },\n'
+                '    "rallyPoints": {"points": [], "version": 2},\n'
+                '    "version": 1\n}\n')
+    logger.info(f"В {path} записано пунктов миссии: {count}")
+    return count
+
+
+def detect_format(path: str) -> str:
+    """
+    Формат файла миссии по первому значащему символу: 'plan' (JSON) или 'wpl'.
+    """
+    with open(path, encoding='utf-8') as f:
+        start = f.read(256).lstrip()
+    return 'plan' if start.startswith('{') else 'wpl'
+
+
+def write_mission(path: str, items: Iterable[Union[MissionItem, Tuple[float, float, float]]],
+                  **kwargs: Any) -> int:
+    """
+    Запись миссии в формате по расширению файла: .plan — JSON QGroundControl, иначе WPL 110.
+
+    Args:
+        path (str): Путь к файлу.
+        items (Iterable[Union[MissionItem, Tuple[float, float, float]]]): Пункты или точки.
+        **kwargs (Any): Дополнительные параметры write_plan().
+
+    Returns:
+        int: Число записанных пунктов.
+    """
+    if path.lower().endswith('.plan'):
+        return write_plan(path, items, **kwargs)
+    return write_wpl(path, items)
+
+
+class MissionFile:
+    """
+    Миссия из файла WPL или .plan, читаемая заново при каждом проходе.
+
+    Итерация лениво выдаёт пункты, len() — число пунктов (считается
+    отдельным проходом по файлу один раз), поэтому объект можно передать
+    прямо в UAVControl.upload_mission() без промежуточного списка.
+    """
+
+    def __init__(self, path: str, format: Optional[str] = None):
+        """
+        Args:
+            path (str): Путь к файлу.
+            format (Optional[str]): 'wpl' или 'plan' (по умолчанию определяется по содержимому).
+        """
+        format = format or detect_format(path)
+        if format not in ('wpl', 'plan'):
+            raise ValueError(f"Неизвестный формат миссии {format!r}")
+        self.path = path
+        self.format = format
+        self._count: Optional[int] = None
+
+    def __iter__(self) -> Iterator[MissionItem]:
+        return read_plan(self.path) if self.format == 'plan' else read_wpl(self.path)
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = sum(1 for _ in self)
+        return self._count
+
+
+class ItemWindow:
+    """
+    Доступ по номеру к пунктам из итератора с хранением только последних size пунктов.
+
+    Протокол загрузки миссии запрашивает пункты по порядку и повторяет
+    лишь недавние запросы, поэтому скользящего окна достаточно, чтобы
+    загружать миссию прямо из файла.
+    """
+
+    def __init__(self, items: Iterable[Any], size: int = 64):
+        if size < 1:
+            raise ValueError("Размер окна должен быть положительным")
+        self._items = iter(items)
+        self._window: collections.OrderedDict = collections.OrderedDict()
+        self._next = 0
+        self.size = size
+
+    def __getitem__(self, seq: int) -> Any:
+        while self._next <= seq:
+            try:
+                item = next(self._items)
+            except StopIteration:
+                raise IndexError(f"В миссии нет пункта {seq}")
+            self._window[self._next] = item
+            self._next += 1
+            if len(self._window) > self.size:
+                self._window.popitem(last=False)
+        if seq not in self._window:
+            raise IndexError(f"Пункт миссии {seq} уже вышел из окна повторной передачи")
+        return self._window[seq]
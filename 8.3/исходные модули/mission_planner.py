@@ -1,8 +1,17 @@
 # mission_planner.py
 
 from uav_control import UAVControl
+from geodesy import distance_3d, leg_lengths, validate_waypoints
+from geofence import GeofenceViolation
+from route_optimizer import optimize_order
+from tracing import traced
+from terrain import agl_to_relative, check_clearance
+from survey import lawnmower
+from kinematic_sim import VehicleModel, MissionEstimate, simulate_mission, simulate_many, rank_missions
+from mission_files import MissionFile, RELATIVE_FRAMES, write_mission
 import time
-from typing import List, Tuple
+import numpy as np
+from typing import List, Tuple, Union, Sequence, Optional, Any
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,59 +22,390 @@ class MissionPlanner:
     Класс для планирования и выполнения миссий БПЛА.
     """
 
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, cruise_speed: float = 5.0, tracer: Optional[Any] = None,
+                 geofence: Optional[Any] = None, terrain: Optional[Any] = None):
         """
         Инициализация планировщика миссий.
 
         Args:
             connection_string (str): Строка подключения MAVLink.
+            cruise_speed (float): Ожидаемая крейсерская скорость в м/с для оценки времени перелёта.
+            tracer (Optional[Any]): Трассировщик операций и этапов миссии (tracing.Tracer).
+            geofence (Optional[Any]): Запретные зоны (geofence.Geofence): миссии проверяются
+                по ним перед полётом, а позиции БПЛА — во время полёта.
+            terrain (Optional[Any]): Модель рельефа (terrain.TerrainModel) для миссий
+                с высотами над рельефом.
         """
-        self.uav = UAVControl(connection_string)
+        self.uav = UAVControl(connection_string, tracer=tracer)
+        self.cruise_speed = cruise_speed
+        self.geofence = geofence
+        self.terrain = terrain
+        if geofence is not None:
+            self.uav.monitor_geofence(geofence)
 
-    def execute_mission(self, waypoints: List[Tuple[float, float, float]]) -> None:
+    @property
+    def tracer(self) -> Any:
+        """
+        Трассировщик, общий с UAVControl.
+        """
+        return self.uav.tracer
+
+    def _leg_timeout(self, waypoint: Tuple[float, float, float],
+                     previous: Optional[Tuple[float, float, float]] = None,
+                     eta_factor: float = 2.0, min_timeout: float = 10.0) -> float:
+        """
+        Таймаут перелёта к точке по оценке времени в пути.
+
+        Текущая позиция берётся из кэша последних сообщений приёмника без
+        блокирующего чтения канала; если позиции ещё нет, расстояние
+        считается от предыдущей точки маршрута.
+
+        Args:
+            waypoint (Tuple[float, float, float]): Целевая точка (lat, lon, alt).
+            previous (Optional[Tuple[float, float, float]]): Предыдущая точка маршрута.
+            eta_factor (float): Запас относительно расчётного времени.
+            min_timeout (float): Минимальный таймаут в секундах.
+
+        Returns:
+            float: Таймаут в секундах.
+        """
+        position = self.uav.receiver.latest('GLOBAL_POSITION_INT')
+        if position is not None:
+            start = (position.lat / 1e7, position.lon / 1e7, position.relative_alt / 1000)
+        elif previous is not None:
+            start = previous
+        else:
+            return 6 * min_timeout
+        distance = distance_3d(*start, *waypoint)
+        return max(min_timeout, eta_factor * distance / self.cruise_speed)
+
+    @staticmethod
+    def mission_length(waypoints: List[Tuple[float, float, float]]) -> float:
+        """
+        Суммарная длина маршрута по всем участкам в метрах.
+
+        Args:
+            waypoints (List[Tuple[float, float, float]]): Список точек (lat, lon, alt).
+
+        Returns:
+            float: Длина маршрута в метрах.
+        """
+        if len(waypoints) < 2:
+            return 0.0
+        return float(leg_lengths(waypoints).sum())
+
+    @staticmethod
+    def optimize_route(waypoints: List[Tuple[float, float, float]],
+                       time_budget: float = 1.0) -> List[Tuple[float, float, float]]:
+        """
+        Переупорядочивание точек для сокращения пути в 3D (первая точка остаётся первой).
+
+        Args:
+            waypoints (List[Tuple[float, float, float]]): Список точек (lat, lon, alt).
+            time_budget (float): Ограничение времени оптимизации в секундах.
+
+        Returns:
+            List[Tuple[float, float, float]]: Точки в новом порядке.
+        """
+        order = optimize_order(waypoints, time_budget=time_budget)
+        return [waypoints[i] for i in order]
+
+    @traced()
+    def terrain_mission(self, waypoints: List[Tuple[float, float, float]],
+                        home: Optional[Tuple[float, float]] = None,
+                        min_clearance: float = 10.0) -> List[Tuple[float, float, float]]:
+        """
+        Подготовка миссии с высотами над рельефом (AGL) к полёту.
+
+        Высоты переводятся в систему относительно точки старта, в которой
+        работают goto() и upload_mission(), после чего все участки проверяются
+        на запас высоты над рельефом.
+
+        Args:
+            waypoints (List[Tuple[float, float, float]]): Точки (lat, lon, высота над рельефом).
+            home (Optional[Tuple[float, float]]): Точка старта (lat, lon); по умолчанию —
+                текущая позиция БПЛА.
+            min_clearance (float): Минимальная высота над рельефом вдоль участков в метрах.
+
+        Returns:
+            List[Tuple[float, float, float]]: Точки с высотами относительно точки старта.
+
+        Raises:
+            ValueError: Если нет модели рельефа, данных рельефа или запаса высоты.
+        """
+        if self.terrain is None:
+            raise ValueError("Модель рельефа не задана")
+        validate_waypoints(waypoints)
+        if home is None:
+            telemetry = self.uav.get_telemetry()
+            if not telemetry or 'lat' not in telemetry:
+                raise ValueError("Не удалось определить точку старта")
+            home = (telemetry['lat'], telemetry['lon'])
+        relative = agl_to_relative(waypoints, home, self.terrain)
+        legs = check_clearance(relative, home, self.terrain, min_clearance)
+        if legs.size:
+            raise ValueError(f"Недостаточный запас высоты над рельефом на участках: {(legs[:10] + 1).tolist()}")
+        return [tuple(point) for point in relative.tolist()]
+
+    @traced()
+    def survey_mission(self, polygon: Sequence[Tuple[float, float]], altitude: float,
+                       footprint: Tuple[float, float], side_overlap: float = 0.7, front_overlap: float = 0.8,
+                       heading: float = 0.0, photo_waypoints: bool = False,
+                       as_array: bool = False) -> Union[List[Tuple[float, float, float]], np.ndarray]:
+        """
+        Маршрут площадной съёмки "змейкой" над заданной областью.
+
+        Результат можно сразу передать в execute_mission() или upload_mission();
+        массив (as_array=True) не создаёт кортеж на каждую точку, что важно
+        для плотных съёмочных миссий.
+
+        Args:
+            polygon (Sequence[Tuple[float, float]]): Вершины области (lat, lon).
+            altitude (float): Высота полёта относительно точки старта в метрах.
+            footprint (Tuple[float, float]): Ширина и длина кадра на земле в метрах
+                (survey.camera_footprint()).
+            side_overlap (float): Поперечное перекрытие кадров (доля от 0 до 1).
+            front_overlap (float): Продольное перекрытие кадров (доля от 0 до 1).
+            heading (float): Направление галсов в градусах от севера по часовой стрелке.
+            photo_waypoints (bool): Точка в каждом месте съёмки, а не только на концах галсов.
+            as_array (bool): Вернуть массив NumPy формы (N, 3) вместо списка кортежей.
+
+        Returns:
+            Union[List[Tuple[float, float, float]], np.ndarray]: Точки (lat, lon, alt).
+        """
+        waypoints = lawnmower(polygon, altitude, footprint, side_overlap, front_overlap, heading, photo_waypoints)
+        if as_array:
+            return waypoints
+        return [tuple(point) for point in waypoints.tolist()]
+
+    def _flight_context(self, home: Optional[Tuple[float, float]],
+                        battery: Optional[float]) -> Tuple[Tuple[float, float], float]:
+        """
+        Точка старта и заряд батареи для оценки миссии: заданные явно или из телеметрии.
+        """
+        if home is not None and battery is not None:
+            return home, battery
+        telemetry = self.uav.get_telemetry() or {}
+        if home is None:
+            if 'lat' not in telemetry:
+                raise ValueError("Не удалось определить точку старта")
+            home = (telemetry['lat'], telemetry['lon'])
+        if battery is None:
+            battery = telemetry.get('battery', -1)
+            if battery is None or battery < 0:
+                # SYS_STATUS сообщает -1, если автопилот не оценивает заряд
+                logger.warning("Заряд батареи неизвестен, оценка выполняется для полной батареи")
+                battery = 100.0
+        return home, float(battery)
+
+    @traced()
+    def estimate_mission(self, waypoints: List[Tuple[float, float, float]], model: Optional[VehicleModel] = None,
+                         wind: Tuple[float, float] = (0.0, 0.0), home: Optional[Tuple[float, float]] = None,
+                         battery: Optional[float] = None) -> MissionEstimate:
+        """
+        Оценка времени полёта и расхода батареи до вылета.
+
+        Args:
+            waypoints (List[Tuple[float, float, float]]): Список точек (lat, lon, alt).
+            model (Optional[VehicleModel]): Модель БПЛА (по умолчанию с крейсерской скоростью планировщика).
+            wind (Tuple[float, float]): Скорость ветра в м/с и направление, откуда он дует, в градусах.
+            home (Optional[Tuple[float, float]]): Точка старта; по умолчанию — текущая позиция БПЛА.
+            battery (Optional[float]): Заряд в процентах; по умолчанию — из телеметрии.
+
+        Returns:
+            MissionEstimate: Время, путь и энергия по участкам и в сумме.
+        """
+        validate_waypoints(waypoints)
+        home, battery = self._flight_context(home, battery)
+        estimate = simulate_mission(waypoints, home, model or VehicleModel(cruise_speed=self.cruise_speed),
+                                    wind, battery)
+        logger.info(f"Оценка миссии: {estimate}")
+        if not estimate.feasible:
+            logger.warning("Заряда батареи не хватит на миссию с учётом резерва")
+        return estimate
+
+    @traced()
+    def rank_missions(self, candidates: Sequence[List[Tuple[float, float, float]]],
+                      model: Optional[VehicleModel] = None, wind: Tuple[float, float] = (0.0, 0.0),
+                      home: Optional[Tuple[float, float]] = None, battery: Optional[float] = None,
+                      processes: Optional[int] = None) -> List[Tuple[int, MissionEstimate]]:
+        """
+        Сравнение вариантов миссии перед вылетом.
+
+        Все варианты моделируются (при большом числе — в пуле процессов),
+        выполнимые по заряду упорядочиваются по времени полёта.
+
+        Args:
+            candidates (Sequence[List[Tuple[float, float, float]]]): Варианты миссии.
+            model (Optional[VehicleModel]): Модель БПЛА.
+            wind (Tuple[float, float]): Скорость ветра в м/с и направление, откуда он дует.
+            home (Optional[Tuple[float, float]]): Точка старта; по умолчанию — текущая позиция БПЛА.
+            battery (Optional[float]): Заряд в процентах; по умолчанию — из телеметрии.
+            processes (Optional[int]): Число процессов пула (1 — без пула).
+
+        Returns:
+            List[Tuple[int, MissionEstimate]]: Номер варианта и оценка, лучший вариант первым.
+        """
+        home, battery = self._flight_context(home, battery)
+        estimates = simulate_many(candidates, home, model or VehicleModel(cruise_speed=self.cruise_speed),
+                                  wind, battery, processes=processes)
+        return [(index, estimates[index]) for index in rank_missions(estimates)]
+
+    @traced()
+    def execute_mission(self, waypoints: List[Tuple[float, float, float]],
+                        acceptance_radius: Union[float, Sequence[float]] = 2.0,
+                        optimize: bool = False) -> None:
         """
         Выполнение миссии по заданным точкам.
 
+        Прибытие в каждую точку определяется по потоку GLOBAL_POSITION_INT
+        (в режиме GUIDED сообщения о пунктах миссии к цели goto() не относятся),
+        а таймаут перелёта вычисляется по расстоянию и крейсерской скорости.
+
         Args:
             waypoints (List[Tuple[float, float, float]]): Список точек (lat, lon, alt).
+            acceptance_radius (Union[float, Sequence[float]]): Радиус приёмки в метрах,
+                общий или для каждой точки.
+            optimize (bool): Переупорядочить точки для сокращения пути перед полётом.
         """
+        validate_waypoints(waypoints)
+        if isinstance(acceptance_radius, (int, float)):
+            radii = [float(acceptance_radius)] * len(waypoints)
+        else:
+            radii = list(acceptance_radius)
+            if len(radii) != len(waypoints):
+                raise ValueError("Число радиусов приёмки не совпадает с числом точек")
+        if optimize:
+            order = optimize_order(waypoints)
+            waypoints = [waypoints[i] for i in order]
+            radii = [radii[i] for i in order]
+        if self.geofence is not None:
+            self.geofence.require_clear(waypoints)
+
         try:
             self.uav.arm()
             self.uav.set_mode('GUIDED')
             self.uav.takeoff(waypoints[0][2])
 
             # Ожидание набора высоты
-            time.sleep(5)
+            with self.tracer.span('mission.climb'):
+                time.sleep(5)
 
             for idx, waypoint in enumerate(waypoints):
-                logger.info(f"Переходим к точке {idx+1}: {waypoint}")
-                self.uav.goto(*waypoint)
-
-                # Ожидание достижения точки с проверкой телеметрии
-                reached = False
-                for _ in range(5):  # Максимум 5 проверок
-                    telemetry = self.uav.get_telemetry()
-                    if telemetry:
-                        lat_diff = abs(telemetry.get('lat', 0.0) - waypoint[0])
-                        lon_diff = abs(telemetry.get('lon', 0.0) - waypoint[1])
-                        alt_diff = abs(telemetry.get('alt', 0.0) - waypoint[2])
-                        if lat_diff < 0.0001 and lon_diff < 0.0001 and alt_diff < 1.0:
-                            reached = True
-                            logger.info(f"Достигнута точка {idx+1}")
-                            break
-                    time.sleep(1)
-                if not reached:
-                    logger.error(f"Не удалось достичь точки {idx+1}")
-                    raise Exception(f"Не удалось достичь точки {idx+1}")
+                with self.tracer.span('mission.leg', index=idx, lat=waypoint[0], lon=waypoint[1], alt=waypoint[2]):
+                    logger.info(f"Переходим к точке {idx+1}: {waypoint}")
+                    self.uav.goto(*waypoint)
+
+                    # Ожидание достижения точки по позиции: в GUIDED MISSION_CURRENT и
+                    # MISSION_ITEM_REACHED относятся к сохранённой миссии AUTO, а не к цели goto()
+                    timeout = self._leg_timeout(waypoint, waypoints[idx - 1] if idx else None)
+                    if not self.uav.wait_arrival(*waypoint, acceptance_radius=radii[idx], timeout=timeout):
+                        logger.error(f"Не удалось достичь точки {idx+1}")
+                        raise Exception(f"Не удалось достичь точки {idx+1}")
+                    logger.info(f"Достигнута точка {idx+1}")
 
             # Возвращение и посадка
-            self.uav.set_mode('RTL')
-            logger.info("Возвращение домой и посадка")
+            with self.tracer.span('mission.return'):
+                self.uav.set_mode('RTL')
+                logger.info("Возвращение домой и посадка")
 
-            # Ожидание посадки
-            time.sleep(5)
-            self.uav.disarm()
+                # Ожидание посадки
+                time.sleep(5)
+                self.uav.disarm()
         except Exception as e:
             logger.error(f"Ошибка во время выполнения миссии: {e}")
             self.uav.disarm()
             raise
+
+    @traced()
+    def upload_mission(self, waypoints: List[Tuple[float, float, float]], start: bool = True,
+                       optimize: bool = False) -> None:
+        """
+        Загрузка всех точек миссии одной транзакцией и запуск в режиме AUTO.
+
+        Args:
+            waypoints (List[Tuple[float, float, float]]): Список точек (lat, lon, alt).
+            start (bool): Взвести БПЛА и запустить миссию сразу после загрузки.
+            optimize (bool): Переупорядочить точки для сокращения пути перед загрузкой.
+        """
+        validate_waypoints(waypoints)
+        if optimize:
+            waypoints = self.optimize_route(waypoints)
+        if self.geofence is not None:
+            self.geofence.require_clear(waypoints)
+        try:
+            self.uav.upload_mission(waypoints)
+            if start:
+                self.uav.arm()
+                self.uav.start_mission()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки миссии: {e}")
+            raise
+
+    def _check_geofence_stream(self, mission: MissionFile) -> None:
+        """
+        Проверка участков миссии из файла по запретным зонам за один проход без списка точек.
+
+        Проверяются участки между пунктами с высотой относительно точки старта;
+        точка старта ArduPilot (высота над уровнем моря) и служебные команды пропускаются.
+
+        Raises:
+            ValueError: Если хотя бы один участок пересекает запретную зону.
+        """
+        violations = []
+        previous = None
+        for index, item in enumerate(mission):
+            if not item.has_position or item.frame not in RELATIVE_FRAMES:
+                continue
+            if previous is None:
+                hits = self.geofence.zones_at(*item.waypoint)
+            else:
+                hits = self.geofence.check_segment(previous, item.waypoint)
+            violations.extend(GeofenceViolation(index, zone) for zone in hits)
+            previous = item.waypoint
+        if violations:
+            listed = ', '.join(f"пункт {v.leg}: {v.zone.name}" for v in violations[:10])
+            raise ValueError(f"Миссия пересекает запретные зоны ({len(violations)}): {listed}")
+
+    @traced(args=('path',))
+    def upload_mission_file(self, path: str, start: bool = True) -> int:
+        """
+        Загрузка миссии из файла QGC WPL 110 или .plan и запуск в режиме AUTO.
+
+        Пункты читаются из файла потоково прямо в транзакцию загрузки, поэтому
+        большие съёмочные миссии не загружаются в память целиком. Если заданы
+        запретные зоны, файл предварительно проверяется отдельным проходом.
+
+        Args:
+            path (str): Путь к файлу миссии.
+            start (bool): Взвести БПЛА и запустить миссию сразу после загрузки.
+
+        Returns:
+            int: Число загруженных пунктов.
+        """
+        mission = MissionFile(path)
+        if self.geofence is not None:
+            self._check_geofence_stream(mission)
+        count = len(mission)
+        try:
+            self.uav.upload_mission(mission, count=count)
+            if start:
+                self.uav.arm()
+                self.uav.start_mission()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки миссии из {path}: {e}")
+            raise
+        return count
+
+    @traced(args=('path',))
+    def download_mission_file(self, path: str) -> int:
+        """
+        Выгрузка миссии с БПЛА в файл (.plan — JSON QGroundControl, иначе WPL 110).
+
+        Args:
+            path (str): Путь к файлу.
+
+        Returns:
+            int: Число сохранённых пунктов.
+        """
+        return write_mission(path, self.uav.download_mission())
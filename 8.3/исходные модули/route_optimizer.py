@@ -0,0 +1,255 @@
+# route_optimizer.py
+
+import time
+from typing import List, Tuple, Sequence, Union, Optional
+import numpy as np
+from geodesy import validate_waypoints, global_to_ned
+import logging
+
+logger = logging.getLogger(__name__)
+
+Waypoints = Union[Sequence[Tuple[float, float, float]], np.ndarray]
+
+
+def _nearest_neighbours(points: np.ndarray, k: int, chunk: int = 1024) -> np.ndarray:
+    """
+    Индексы k ближайших соседей каждой точки (без неё самой).
+
+    Матрица расстояний считается блоками, чтобы не держать в памяти N x N.
+    """
+    n = len(points)
+    k = min(k, n - 1)
+    result = np.empty((n, k), dtype=np.int64)
+    squared = np.einsum('ij,ij->i', points, points)
+    for start in range(0, n, chunk):
+        block = points[start:start + chunk]
+        d2 = squared[start:start + chunk, None] + squared[None, :] - 2 * block @ points.T
+        rows = np.arange(len(block))
+        d2[rows, rows + start] = np.inf
+        candidates = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        order = np.argsort(d2[rows[:, None], candidates], axis=1)
+        result[start:start + chunk] = np.take_along_axis(candidates, order, axis=1)
+    return result
+
+
+def _nearest_neighbour_tour(points: np.ndarray, start: int = 0) -> np.ndarray:
+    """
+    Жадный маршрут: из каждой точки в ближайшую ещё не посещённую.
+    """
+    n = len(points)
+    visited = np.zeros(n, dtype=bool)
+    tour = np.empty(n, dtype=np.int64)
+    current = start
+    for step in range(n):
+        tour[step] = current
+        visited[current] = True
+        if step == n - 1:
+            break
+        d2 = ((points - points[current]) ** 2).sum(axis=1)
+        d2[visited] = np.inf
+        current = int(np.argmin(d2))
+    return tour
+
+
+class _Tour:
+    """
+    Замкнутый маршрут в виде массива узлов с позициями для 2-opt и Or-opt.
+
+    Открытый маршрут представлен замкнутым через фиктивный узел с нулевой
+    стоимостью рёбер. Узел в позиции 0 никогда не перемещается, а при
+    фиксированном старте открытого маршрута фиксируется и последняя позиция
+    (фиктивный узел), так что старт остаётся началом пути.
+    """
+
+    def __init__(self, points: np.ndarray, tour: np.ndarray, dummy: Optional[int], lock_last: bool):
+        self.points = points
+        self.dummy = dummy
+        self.tour = tour
+        self.m = len(tour)
+        self.last_movable = self.m - 2 if lock_last else self.m - 1
+        self.pos = np.empty(self.m, dtype=np.int64)
+        self.pos[tour] = np.arange(self.m)
+
+    def d(self, a: int, b: int) -> float:
+        if a == self.dummy or b == self.dummy:
+            return 0.0
+        diff = self.points[a] - self.points[b]
+        return float(np.sqrt(diff @ diff))
+
+    def at(self, index: int) -> int:
+        return int(self.tour[index % self.m])
+
+    def _reindex(self) -> None:
+        self.pos[self.tour] = np.arange(self.m)
+
+    def two_opt(self, neighbours: np.ndarray, deadline: float, eps: float = 1e-9) -> bool:
+        """
+        Один проход 2-opt по спискам соседей.
+
+        Returns:
+            bool: True, если маршрут был улучшен.
+        """
+        improved = False
+        for a in range(len(neighbours)):
+            if time.monotonic() > deadline:
+                break
+            for c in neighbours[a]:
+                i, j = int(self.pos[a]), int(self.pos[c])
+                if i > j:
+                    i, j = j, i
+                if j - i < 2 or j > self.last_movable:
+                    continue
+                n1, n2 = self.at(i), self.at(i + 1)
+                n3, n4 = self.at(j), self.at(j + 1)
+                delta = self.d(n1, n3) + self.d(n2, n4) - self.d(n1, n2) - self.d(n3, n4)
+                if delta < -eps:
+                    self.tour[i + 1:j + 1] = self.tour[i + 1:j + 1][::-1].copy()
+                    self._reindex()
+                    improved = True
+                    break
+        return improved
+
+    def or_opt(self, neighbours: np.ndarray, deadline: float, max_segment: int = 3,
+               eps: float = 1e-9) -> bool:
+        """
+        Один проход Or-opt: перенос отрезков из 1..max_segment точек к соседям.
+
+        Returns:
+            bool: True, если маршрут был улучшен.
+        """
+        improved = False
+        for length in range(1, max_segment + 1):
+            i = 1
+            while i + length - 1 <= self.last_movable:
+                if time.monotonic() > deadline:
+                    return improved
+                if self._move_segment(i, length, neighbours, eps):
+                    improved = True
+                i += 1
+        return improved
+
+    def _move_segment(self, i: int, length: int, neighbours: np.ndarray, eps: float) -> bool:
+        segment = self.tour[i:i + length]
+        first, last = int(segment[0]), int(segment[-1])
+        if self.dummy in (first, last) or (self.dummy is not None and self.dummy in segment):
+            return False
+        prev, nxt = self.at(i - 1), self.at(i + length)
+        gain = self.d(prev, first) + self.d(last, nxt) - self.d(prev, nxt)
+        if gain <= eps:
+            return False
+
+        inside = set(int(v) for v in segment)
+        best = None
+        for c in np.concatenate((neighbours[first], neighbours[last])):
+            c = int(c)
+            if c in inside:
+                continue
+            pc = int(self.pos[c])
+            for u, v in ((c, self.at(pc + 1)), (self.at(pc - 1), c)):
+                if u in inside or v in inside:
+                    continue
+                if int(self.pos[u]) > self.last_movable:
+                    continue  # за зафиксированным последним узлом вставлять нельзя
+                base = self.d(u, v)
+                forward = self.d(u, first) + self.d(last, v) - base
+                backward = self.d(u, last) + self.d(first, v) - base
+                cost, reverse = (forward, False) if forward <= backward else (backward, True)
+                if cost < gain - eps and (best is None or cost < best[0]):
+                    best = (cost, u, reverse)
+        if best is None:
+            return False
+
+        _, u, reverse = best
+        moved = segment[::-1].copy() if reverse else segment.copy()
+        rest = np.concatenate((self.tour[:i], self.tour[i + length:]))
+        k = int(np.flatnonzero(rest == u)[0])
+        self.tour = np.concatenate((rest[:k + 1], moved, rest[k + 1:]))
+        self._reindex()
+        return True
+
+
+def route_cost(points: np.ndarray, order: Sequence[int], closed: bool = False) -> float:
+    """
+    Стоимость маршрута как сумма евклидовых длин участков.
+
+    Args:
+        points (np.ndarray): Локальные координаты точек формы (N, 3).
+        order (Sequence[int]): Порядок обхода.
+        closed (bool): Учитывать возврат в первую точку.
+
+    Returns:
+        float: Стоимость маршрута.
+    """
+    path = points[np.asarray(order)]
+    if closed:
+        path = np.vstack((path, path[:1]))
+    return float(np.linalg.norm(np.diff(path, axis=0), axis=1).sum())
+
+
+def optimize_order(waypoints: Waypoints, time_budget: float = 1.0, fix_start: bool = True,
+                   return_to_start: bool = False, vertical_weight: float = 1.0,
+                   neighbours: int = 10) -> np.ndarray:
+    """
+    Поиск порядка обхода точек с минимальной длиной пути в 3D.
+
+    Начальный маршрут строится методом ближайшего соседа, затем улучшается
+    2-opt и Or-opt по спискам ближайших соседей, пока не кончится время.
+
+    Args:
+        waypoints (Waypoints): Точки (lat, lon, alt).
+        time_budget (float): Ограничение времени улучшения в секундах.
+        fix_start (bool): Оставить первую точку первой.
+        return_to_start (bool): Учитывать возврат в первую точку (замкнутый маршрут).
+        vertical_weight (float): Вес вертикальной составляющей в стоимости участка.
+        neighbours (int): Размер списка ближайших соседей.
+
+    Returns:
+        np.ndarray: Перестановка индексов исходных точек.
+    """
+    deadline = time.monotonic() + time_budget
+    array = validate_waypoints(waypoints)
+    n = len(array)
+    if n < 3:
+        return np.arange(n)
+
+    points = global_to_ned(array, tuple(array[0]))
+    points[:, 2] *= vertical_weight
+    seed = _nearest_neighbour_tour(points, 0)
+    knn = _nearest_neighbours(points, neighbours)
+
+    if return_to_start:
+        tour = _Tour(points, seed, dummy=None, lock_last=False)
+    else:
+        tour = _Tour(points, np.append(seed, n), dummy=n, lock_last=fix_start)
+
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = tour.two_opt(knn, deadline)
+        improved = tour.or_opt(knn, deadline) or improved
+
+    order = tour.tour
+    if tour.dummy is not None:
+        cut = int(tour.pos[tour.dummy])
+        order = np.concatenate((order[cut + 1:], order[:cut]))
+    logger.info(f"Длина маршрута: {route_cost(points, seed, return_to_start):.1f} м -> "
+                f"{route_cost(points, order, return_to_start):.1f} м")
+    return order
+
+
+def optimize_route(waypoints: Waypoints, time_budget: float = 1.0, fix_start: bool = True,
+                   return_to_start: bool = False, vertical_weight: float = 1.0) -> List[Tuple[float, float, float]]:
+    """
+    Переупорядочивание точек миссии для сокращения пути.
+
+    Args:
+        waypoints (Waypoints): Точки (lat, lon, alt).
+        time_budget (float): Ограничение времени улучшения в секундах.
+        fix_start (bool): Оставить первую точку первой.
+        return_to_start (bool): Учитывать возврат в первую точку.
+        vertical_weight (float): Вес вертикальной составляющей в стоимости участка.
+
+    Returns:
+        List[Tuple[float, float, float]]: Точки в новом порядке.
+    """
+    order = optimize_order(waypoints, time_budget, fix_start, return_to_start, vertical_weight)
+    return [tuple(waypoints[i]) for i in order]
@@ -0,0 +1,220 @@
+# selective_decode.py
+
+from pymavlink import mavutil
+import time
+from typing import Optional, Any, Callable, FrozenSet, Tuple
+import logging
+
+try:
+    from fastcrc.crc16 import mcrf4xx as _native_crc
+except ImportError:
+    _native_crc = None
+
+logger = logging.getLogger(__name__)
+
+STX_V1 = 0xFE
+STX_V2 = 0xFD
+# Сообщения, от которых зависит состояние соединения pymavlink, декодируются всегда
+ALWAYS_DECODED = frozenset({'HEARTBEAT'})
+
+
+def _crc_table() -> Tuple[int, ...]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x8408 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+# Табличный CRC-16/MCRF4XX (X.25) MAVLink на случай отсутствия fastcrc
+_CRC_TABLE = _crc_table()
+
+
+def _x25crc(data: memoryview) -> int:
+    """
+    CRC-16/MCRF4XX участка буфера без копирования (fastcrc, если установлен).
+    """
+    if _native_crc is not None:
+        return _native_crc(data)
+    crc = 0xFFFF
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def message_ids(types) -> FrozenSet[int]:
+    """
+    Идентификаторы сообщений по их именам (неизвестные имена пропускаются).
+
+    Args:
+        types (Iterable[str]): Типы сообщений MAVLink.
+
+    Returns:
+        FrozenSet[int]: Идентификаторы сообщений.
+    """
+    ids = set()
+    for msg_type in types:
+        msg_id = getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{msg_type}", None)
+        if msg_id is not None:
+            ids.add(msg_id)
+    return frozenset(ids)
+
+
+class SelectiveDecoder:
+    """
+    Приём MAVLink с декодированием только нужных типов сообщений.
+
+    Кадры разбираются по заголовку: идентификатор сообщения и длина
+    читаются без распаковки полезной нагрузки. Кадр нужного типа
+    декодируется штатным MAVLink.decode() с проверкой CRC (и подписи,
+    если она настроена). Остальные кадры пропускаются целиком без
+    распаковки, но только после проверки CRC с crc_extra их типа:
+    случайный байт 0xFD/0xFE внутри полезной нагрузки иначе заставил бы
+    пропустить следующие за ним настоящие кадры. При ошибке CRC или
+    неизвестном типе поиск начала кадра продолжается со следующего байта.
+    """
+
+    def __init__(self, master: Any, wanted: Callable[[], Optional[FrozenSet[int]]]):
+        """
+        Инициализация декодера.
+
+        Args:
+            master (Any): Соединение mavutil (используются recv(), select(), mav и post_message()).
+            wanted (Callable[[], Optional[FrozenSet[int]]]): Функция, возвращающая
+                идентификаторы нужных сообщений (None — декодировать все).
+        """
+        self.master = master
+        self.wanted = wanted
+        self._always = message_ids(ALWAYS_DECODED)
+        self._buf = bytearray()
+        self.bytes_received = 0
+        self.decoded = 0
+        self.skipped = 0
+        self.bad_frames = 0
+
+    def _next_frame(self) -> Optional[Any]:
+        buf = self._buf
+        wanted = self.wanted()
+        while buf:
+            if buf[0] not in (STX_V1, STX_V2):
+                start = next((i for i, b in enumerate(buf) if b in (STX_V1, STX_V2)), len(buf))
+                del buf[:start]
+                continue
+            if buf[0] == STX_V2:
+                if len(buf) < 10:
+                    return None
+                msg_id = buf[7] | (buf[8] << 8) | (buf[9] << 16)
+                crc_end = 10 + buf[1]
+                size = 12 + buf[1] + (mavutil.mavlink.MAVLINK_SIGNATURE_BLOCK_LEN if buf[2] & 1 else 0)
+                seq, source = buf[4], (buf[5], buf[6])
+            else:
+                if len(buf) < 6:
+                    return None
+                msg_id = buf[5]
+                crc_end = 6 + buf[1]
+                size = 8 + buf[1]
+                seq, source = buf[2], (buf[3], buf[4])
+            if len(buf) < size:
+                return None
+            if wanted is not None and msg_id not in wanted and msg_id not in self._always:
+                if not self._crc_ok(buf, msg_id, crc_end):
+                    self.bad_frames += 1
+                    del buf[:1]
+                    continue
+                del buf[:size]
+                self.skipped += 1
+                self._track_seq(source, seq)
+                continue
+            frame = buf[:size]
+            try:
+                msg = self.master.mav.decode(frame)
+            except mavutil.mavlink.MAVError as e:
+                logger.debug(f"Повреждённый кадр MAVLink: {e}")
+                self.bad_frames += 1
+                del buf[:1]
+                continue
+            del buf[:size]
+            if msg.get_type().startswith('UNKNOWN'):
+                continue
+            self.decoded += 1
+            self.master.post_message(msg)
+            return msg
+        return None
+
+    @staticmethod
+    def _crc_ok(buf: bytearray, msg_id: int, crc_end: int) -> bool:
+        """
+        Проверка контрольной суммы кадра без распаковки полезной нагрузки.
+
+        Args:
+            buf (bytearray): Буфер, начинающийся с кадра.
+            msg_id (int): Идентификатор сообщения из заголовка.
+            crc_end (int): Смещение контрольной суммы (конец заголовка и нагрузки).
+
+        Returns:
+            bool: True, если тип известен и CRC с его crc_extra совпадает.
+        """
+        msg_class = mavutil.mavlink.mavlink_map.get(msg_id)
+        if msg_class is None:
+            return False
+        # memoryview освобождается до выхода: иначе bytearray нельзя будет укоротить
+        with memoryview(buf) as view:
+            crc = _x25crc(view[1:crc_end])
+        crc = (crc >> 8) ^ _CRC_TABLE[(crc ^ msg_class.crc_extra) & 0xFF]
+        return crc == buf[crc_end] | (buf[crc_end + 1] << 8)
+
+    def _track_seq(self, source: tuple, seq: int) -> None:
+        """
+        Учёт номера пропущенного кадра в счётчиках потерь pymavlink
+        (mav_loss, mav_count), иначе пропуск считался бы потерей пакетов.
+        """
+        last_seq = getattr(self.master, 'last_seq', None)
+        if not isinstance(last_seq, dict):
+            return
+        if source in last_seq:
+            self.master.mav_loss += (seq - last_seq[source] - 1) % 256
+        last_seq[source] = seq
+        self.master.mav_count += 1
+
+    def recv_msg(self) -> Optional[Any]:
+        """
+        Следующее нужное сообщение из уже пришедших данных без ожидания.
+
+        Returns:
+            Optional[Any]: Декодированное сообщение или None.
+        """
+        while True:
+            msg = self._next_frame()
+            if msg is not None:
+                return msg
+            data = self.master.recv(4096)
+            if not data:
+                return None
+            if isinstance(data, str):
+                data = data.encode('latin-1')
+            self.bytes_received += len(data)
+            self._buf += data
+
+    def recv_match(self, blocking: bool = False, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Ожидание следующего нужного сообщения.
+
+        Args:
+            blocking (bool): Ждать появления данных.
+            timeout (Optional[float]): Время ожидания в секундах.
+
+        Returns:
+            Optional[Any]: Декодированное сообщение или None.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            msg = self.recv_msg()
+            if msg is not None or not blocking:
+                return msg
+            remaining = 0.05 if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.master.select(min(remaining, 0.05))
@@ -0,0 +1,374 @@
+# sim_vehicle.py
+
+from pymavlink import mavutil
+import math
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
+from geodesy import EARTH_RADIUS
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Частоты телеметрии по умолчанию, Гц
+DEFAULT_RATES = {
+    'HEARTBEAT': 1.0,
+    'GLOBAL_POSITION_INT': 10.0,
+    'VFR_HUD': 4.0,
+    'SYS_STATUS': 1.0,
+    'ATTITUDE': 10.0,
+}
+
+
+class SimulatedVehicle:
+    """
+    Упрощённый БПЛА (ArduCopter), работающий по MAVLink через локальный UDP-порт.
+
+    Отправляет HEARTBEAT и телеметрию с заданными частотами, выполняет смену
+    режима, взведение, взлёт, посадку, RTL, загрузку, выгрузку и выполнение миссии
+    и отвечает COMMAND_ACK. Движение — равномерное к текущей цели с
+    ограничением горизонтальной и вертикальной скорости.
+
+    В режиме GUIDED цель полёта задаётся SET_POSITION_TARGET_GLOBAL_INT
+    (UAVControl.goto()) или пунктом миссии с current=2; как и ArduPilot,
+    имитатор не подтверждает их COMMAND_ACK.
+    """
+
+    def __init__(self, address: str = '127.0.0.1:14550', system_id: int = 1,
+                 home: Tuple[float, float, float] = (47.397742, 8.545594, 488.0),
+                 rates: Optional[Dict[str, float]] = None, cruise_speed: float = 10.0,
+                 climb_rate: float = 3.0, acceptance_radius: float = 1.0, tick: float = 0.02):
+        """
+        Создание БПЛА на земле в точке home.
+
+        Args:
+            address (str): Адрес наземной станции "host:port" (она слушает udpin).
+            system_id (int): Системный идентификатор MAVLink.
+            home (Tuple[float, float, float]): Точка старта (lat, lon, alt над уровнем моря).
+            rates (Optional[Dict[str, float]]): Частоты сообщений в Гц поверх DEFAULT_RATES.
+            cruise_speed (float): Горизонтальная скорость в м/с.
+            climb_rate (float): Вертикальная скорость в м/с.
+            acceptance_radius (float): Радиус достижения точки миссии в метрах.
+            tick (float): Шаг моделирования в секундах.
+        """
+        self.address = address
+        self.system_id = system_id
+        self.home = home
+        self.rates = dict(DEFAULT_RATES)
+        if rates:
+            self.rates.update(rates)
+        self.cruise_speed = cruise_speed
+        self.climb_rate = climb_rate
+        self.acceptance_radius = acceptance_radius
+        self.tick = tick
+
+        self.modes = mavutil.mode_mapping_byname(mavutil.mavlink.MAV_TYPE_QUADROTOR)
+        self.mode_names = {number: name for name, number in self.modes.items()}
+        self.custom_mode = self.modes['STABILIZE']
+        self.armed = False
+        self.lat, self.lon = home[0], home[1]
+        self.relative_alt = 0.0
+        self.velocity = (0.0, 0.0, 0.0)  # север, восток, вниз, м/с
+        self.heading = 0.0
+        self.battery = 100.0
+        self.guided_target: Optional[Tuple[float, float, float]] = None
+        self.mission: List[Tuple[float, float, float]] = []
+        self.mission_current = 0
+
+        self._upload: Optional[List[Optional[Tuple[float, float, float]]]] = None
+        self._upload_sent_at = 0.0
+        self._gcs = (255, 0)
+        self._link: Optional[Any] = None
+        self._boot = time.monotonic()
+        self._next_send: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> str:
+        """
+        str: Название текущего режима полёта.
+        """
+        return self.mode_names.get(self.custom_mode, str(self.custom_mode))
+
+    def start(self) -> None:
+        """
+        Открытие UDP-соединения и запуск моделирования в отдельном потоке.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._link = mavutil.mavlink_connection(f"udpout:{self.address}", source_system=self.system_id,
+                                                source_component=1)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"sim-vehicle-{self.system_id}", daemon=True)
+        self._thread.start()
+        logger.info(f"Имитатор БПЛА {self.system_id} отправляет данные на {self.address}")
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """
+        Остановка моделирования и закрытие соединения.
+
+        Args:
+            timeout (float): Время ожидания завершения потока в секундах.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self._link.close()
+
+    def __enter__(self) -> 'SimulatedVehicle':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        last = time.monotonic()
+        while not self._stop_event.is_set():
+            self._link.select(self.tick)
+            while True:
+                msg = self._link.recv_msg()
+                if msg is None:
+                    break
+                if msg.get_type() != 'BAD_DATA':
+                    with self._lock:
+                        self.handle(msg)
+            now = time.monotonic()
+            if now - last >= self.tick:
+                with self._lock:
+                    self.step(now - last)
+                    self._send_telemetry(now)
+                last = now
+
+    # --- Обработка входящих сообщений ---
+
+    def handle(self, msg: Any) -> None:
+        """
+        Обработка сообщения наземной станции.
+
+        Args:
+            msg (Any): Декодированное сообщение MAVLink.
+        """
+        msg_type = msg.get_type()
+        if msg_type == 'HEARTBEAT' or getattr(msg, 'target_system', self.system_id) not in (0, self.system_id):
+            return
+        self._gcs = (msg.get_srcSystem(), msg.get_srcComponent())
+        if msg_type == 'COMMAND_LONG':
+            self._handle_command(msg)
+        elif msg_type == 'SET_MODE':
+            self._set_mode(msg.custom_mode)
+        elif msg_type == 'SET_POSITION_TARGET_GLOBAL_INT':
+            if self.mode == 'GUIDED':
+                self.guided_target = (msg.lat_int / 1e7, msg.lon_int / 1e7, msg.alt)
+        elif msg_type == 'MISSION_COUNT':
+            self._upload = [None] * msg.count
+            self._request_next_item()
+        elif msg_type in ('MISSION_ITEM_INT', 'MISSION_ITEM'):
+            self._handle_mission_item(msg)
+        elif msg_type == 'MISSION_REQUEST_LIST':
+            self._link.mav.mission_count_send(*self._gcs, len(self.mission),
+                                              mavutil.mavlink.MAV_MISSION_TYPE_MISSION)
+        elif msg_type in ('MISSION_REQUEST_INT', 'MISSION_REQUEST'):
+            self._send_mission_item(msg.seq)
+
+    def _ack(self, command: int, result: int) -> None:
+        self._link.mav.command_ack_send(command, result)
+
+    def _handle_command(self, msg: Any) -> None:
+        command = msg.command
+        result = mavutil.mavlink.MAV_RESULT_ACCEPTED
+        if command == mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM:
+            self._set_armed(msg.param1 == 1)
+        elif command == mavutil.mavlink.MAV_CMD_DO_SET_MODE:
+            if int(msg.param2) in self.mode_names:
+                self._set_mode(int(msg.param2))
+            else:
+                result = mavutil.mavlink.MAV_RESULT_DENIED
+        elif command == mavutil.mavlink.MAV_CMD_NAV_TAKEOFF:
+            if self.armed and self.mode == 'GUIDED':
+                self.guided_target = (self.lat, self.lon, msg.param7)
+            else:
+                result = mavutil.mavlink.MAV_RESULT_FAILED
+        elif command == mavutil.mavlink.MAV_CMD_NAV_LAND:
+            self._set_mode(self.modes['LAND'])
+        elif command == mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL:
+            msg_type = mavutil.mavlink.mavlink_map.get(int(msg.param1))
+            msg_type = msg_type.msgname if msg_type is not None else None
+            if msg_type in DEFAULT_RATES:
+                interval = msg.param2
+                self.rates[msg_type] = (DEFAULT_RATES[msg_type] if interval == 0 else
+                                        0.0 if interval < 0 else 1e6 / interval)
+            else:
+                result = mavutil.mavlink.MAV_RESULT_DENIED
+        elif command == mavutil.mavlink.MAV_CMD_MISSION_START:
+            if self.armed and self.mission:
+                self.mission_current = 0
+                self._set_mode(self.modes['AUTO'])
+            else:
+                result = mavutil.mavlink.MAV_RESULT_FAILED
+        else:
+            result = mavutil.mavlink.MAV_RESULT_UNSUPPORTED
+        self._ack(command, result)
+
+    def _set_armed(self, armed: bool) -> None:
+        if armed != self.armed:
+            self.armed = armed
+            logger.info(f"Имитатор БПЛА {self.system_id}: {'взведён' if armed else 'разоружён'}")
+        self._send_heartbeat()
+
+    def _set_mode(self, custom_mode: int) -> None:
+        if custom_mode != self.custom_mode:
+            self.custom_mode = custom_mode
+            self.guided_target = None
+        self._send_heartbeat()
+
+    def _request_next_item(self) -> None:
+        if self._upload is None:
+            return
+        if None not in self._upload:
+            self.mission = list(self._upload)
+            self.mission_current = 0
+            self._upload = None
+            self._link.mav.mission_ack_send(*self._gcs, mavutil.mavlink.MAV_MISSION_ACCEPTED,
+                                            mavutil.mavlink.MAV_MISSION_TYPE_MISSION)
+            logger.info(f"Имитатор БПЛА {self.system_id}: загружено пунктов миссии: {len(self.mission)}")
+            return
+        seq = self._upload.index(None)
+        self._link.mav.mission_request_int_send(*self._gcs, seq, mavutil.mavlink.MAV_MISSION_TYPE_MISSION)
+        self._upload_sent_at = time.monotonic()
+
+    def _handle_mission_item(self, msg: Any) -> None:
+        if msg.get_type() == 'MISSION_ITEM_INT':
+            waypoint = (msg.x / 1e7, msg.y / 1e7, msg.z)
+        else:
+            waypoint = (msg.x, msg.y, msg.z)
+        if self._upload is not None:
+            if msg.seq < len(self._upload) and self._upload[msg.seq] is None:
+                self._upload[msg.seq] = waypoint
+                self._request_next_item()
+            return
+        if msg.current == 2:
+            self.guided_target = waypoint
+            self._link.mav.mission_ack_send(*self._gcs, mavutil.mavlink.MAV_MISSION_ACCEPTED,
+                                            mavutil.mavlink.MAV_MISSION_TYPE_MISSION)
+
+    def _send_mission_item(self, seq: int) -> None:
+        if not 0 <= seq < len(self.mission):
+            return
+        lat, lon, alt = self.mission[seq]
+        self._link.mav.mission_item_int_send(
+            *self._gcs, seq, mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT_INT,
+            mavutil.mavlink.MAV_CMD_NAV_WAYPOINT, int(seq == self.mission_current), 1, 0, 0, 0, 0,
+            int(round(lat * 1e7)), int(round(lon * 1e7)), alt, mavutil.mavlink.MAV_MISSION_TYPE_MISSION)
+
+    # --- Моделирование движения ---
+
+    def _target(self) -> Optional[Tuple[float, float, float]]:
+        mode = self.mode
+        if mode == 'GUIDED':
+            return self.guided_target
+        if mode == 'AUTO' and self.mission:
+            return self.mission[self.mission_current]
+        if mode == 'RTL':
+            at_home = self._horizontal_offset(self.home[0], self.home[1])
+            if math.hypot(*at_home) > self.acceptance_radius:
+                return (self.home[0], self.home[1], max(self.relative_alt, 15.0))
+            return (self.home[0], self.home[1], 0.0)
+        if mode == 'LAND':
+            return (self.lat, self.lon, 0.0)
+        return None
+
+    def _horizontal_offset(self, lat: float, lon: float) -> Tuple[float, float]:
+        north = math.radians(lat - self.lat) * EARTH_RADIUS
+        east = math.radians(lon - self.lon) * EARTH_RADIUS * math.cos(math.radians(self.lat))
+        return north, east
+
+    def step(self, dt: float) -> None:
+        """
+        Один шаг моделирования движения.
+
+        Args:
+            dt (float): Длительность шага в секундах.
+        """
+        target = self._target() if self.armed else None
+        if target is None:
+            self.velocity = (0.0, 0.0, 0.0)
+            return
+
+        north, east = self._horizontal_offset(target[0], target[1])
+        distance = math.hypot(north, east)
+        horizontal = min(distance, self.cruise_speed * dt)
+        vn = ve = 0.0
+        if distance > 1e-6:
+            vn, ve = north / distance * horizontal / dt, east / distance * horizontal / dt
+            self.heading = math.atan2(east, north)
+        climb = max(-self.climb_rate * dt, min(self.climb_rate * dt, target[2] - self.relative_alt))
+        self.lat += math.degrees(vn * dt / EARTH_RADIUS)
+        self.lon += math.degrees(ve * dt / (EARTH_RADIUS * math.cos(math.radians(self.lat))))
+        self.relative_alt += climb
+        self.velocity = (vn, ve, -climb / dt)
+        self.battery = max(0.0, self.battery - 0.02 * dt)
+
+        if self.mode in ('LAND', 'RTL') and target[2] == 0.0 and self.relative_alt <= 0.05:
+            self.relative_alt = 0.0
+            self._set_armed(False)
+        elif self.mode == 'AUTO':
+            remaining = math.sqrt((distance - horizontal) ** 2 + (target[2] - self.relative_alt) ** 2)
+            if remaining <= self.acceptance_radius:
+                self._link.mav.mission_item_reached_send(self.mission_current)
+                if self.mission_current < len(self.mission) - 1:
+                    self.mission_current += 1
+                    self._link.mav.mission_current_send(self.mission_current)
+
+    # --- Телеметрия ---
+
+    def _send_telemetry(self, now: float) -> None:
+        for msg_type, rate in self.rates.items():
+            if rate <= 0 or now < self._next_send.get(msg_type, 0.0):
+                continue
+            self._next_send[msg_type] = now + 1.0 / rate
+            if msg_type == 'HEARTBEAT':
+                self._send_heartbeat()
+            elif msg_type == 'GLOBAL_POSITION_INT':
+                self._send_position()
+            elif msg_type == 'VFR_HUD':
+                speed = math.hypot(self.velocity[0], self.velocity[1])
+                self._link.mav.vfr_hud_send(speed, speed, int(math.degrees(self.heading)) % 360,
+                                            50 if self.armed else 0, self.home[2] + self.relative_alt,
+                                            -self.velocity[2])
+            elif msg_type == 'SYS_STATUS':
+                self._link.mav.sys_status_send(0, 0, 0, 500, 12600, 1000, int(self.battery),
+                                               0, 0, 0, 0, 0, 0)
+            elif msg_type == 'ATTITUDE':
+                yaw = math.atan2(math.sin(self.heading), math.cos(self.heading))
+                self._link.mav.attitude_send(self._boot_ms(), 0.0, 0.0, yaw, 0.0, 0.0, 0.0)
+        if self._upload is not None and time.monotonic() - self._upload_sent_at > 1.0:
+            self._request_next_item()  # повтор запроса потерянного пункта
+
+    def _boot_ms(self) -> int:
+        return int((time.monotonic() - self._boot) * 1000) & 0xFFFFFFFF
+
+    def _send_heartbeat(self) -> None:
+        base_mode = mavutil.mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED
+        if self.armed:
+            base_mode |= mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+        state = mavutil.mavlink.MAV_STATE_ACTIVE if self.armed else mavutil.mavlink.MAV_STATE_STANDBY
+        self._link.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR,
+                                      mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+                                      base_mode, self.custom_mode, state)
+
+    def _send_position(self) -> None:
+        vn, ve, vd = self.velocity
+        self._link.mav.global_position_int_send(
+            self._boot_ms(),
+            int(round(self.lat * 1e7)),
+            int(round(self.lon * 1e7)),
+            int((self.home[2] + self.relative_alt) * 1000),
+            int(self.relative_alt * 1000),
+            int(vn * 100), int(ve * 100), int(vd * 100),
+            int(math.degrees(self.heading) % 360 * 100)
+        )
@@ -0,0 +1,204 @@
+# stream_rates.py
+
+from pymavlink import mavutil
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def message_id(msg_type: str) -> int:
+    """
+    Числовой идентификатор сообщения MAVLink по его имени.
+
+    Args:
+        msg_type (str): Тип сообщения (например, 'GLOBAL_POSITION_INT').
+
+    Returns:
+        int: Идентификатор сообщения.
+    """
+    msg_id = getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{msg_type}", None)
+    if msg_id is None:
+        raise ValueError(f"Неизвестный тип сообщения: {msg_type}")
+    return msg_id
+
+
+class StreamRateManager:
+    """
+    Управление частотами телеметрии через MAV_CMD_SET_MESSAGE_INTERVAL.
+
+    Потребители заявляют нужную частоту каждого типа сообщений; автопилоту
+    запрашивается наибольшая из заявленных. Менеджер подключается обработчиком
+    к MavlinkReceiver и раз в window секунд оценивает загрузку канала
+    (байт/с относительно link_capacity) и очередь непрочитанных сообщений:
+    при перегрузке все частоты снижаются вдвое (но не ниже заявленного
+    минимума), а когда канал освобождается — постепенно возвращаются.
+    """
+
+    def __init__(self, send_command: Callable[..., Any], receiver: Any, link_capacity: float = 5760.0,
+                 window: float = 2.0, high_water: float = 0.8, low_water: float = 0.5,
+                 max_backlog: int = 100, min_scale: float = 0.125):
+        """
+        Инициализация менеджера.
+
+        Args:
+            send_command (Callable[..., Any]): Отправка COMMAND_LONG (UAVControl.send_command).
+            receiver (Any): MavlinkReceiver, из которого берутся принятые сообщения.
+            link_capacity (float): Пропускная способность канала в байтах в секунду.
+            window (float): Период оценки загрузки в секундах.
+            high_water (float): Доля загрузки, выше которой частоты снижаются.
+            low_water (float): Доля загрузки, ниже которой частоты восстанавливаются.
+            max_backlog (int): Длина очереди подписки, считающаяся перегрузкой.
+            min_scale (float): Наименьший множитель частот.
+        """
+        self.send_command = send_command
+        self.receiver = receiver
+        self.link_capacity = link_capacity
+        self.window = window
+        self.high_water = high_water
+        self.low_water = low_water
+        self.max_backlog = max_backlog
+        self.min_scale = min_scale
+        self.scale = 1.0
+        self.utilization = 0.0
+        self._lock = threading.Lock()
+        self._requests: Dict[str, Dict[Any, Tuple[float, float]]] = {}
+        self._applied: Dict[str, float] = {}
+        self._bytes = 0
+        self._decoder_bytes = 0
+        self._counts: Dict[str, int] = {}
+        self.measured_rates: Dict[str, float] = {}
+        self._window_start = time.monotonic()
+        receiver.add_listener(self.on_message)
+
+    def request(self, msg_type: str, rate: float, owner: Any = None,
+                min_rate: Optional[float] = None) -> None:
+        """
+        Заявка потребителя на частоту сообщений.
+
+        Args:
+            msg_type (str): Тип сообщения MAVLink.
+            rate (float): Желаемая частота в Гц.
+            owner (Any): Владелец заявки (для последующего release()).
+            min_rate (Optional[float]): Частота, ниже которой адаптация не опускается.
+        """
+        if rate <= 0:
+            raise ValueError("Частота должна быть положительной")
+        message_id(msg_type)
+        with self._lock:
+            self._requests.setdefault(msg_type, {})[owner] = (rate, min_rate if min_rate is not None else 0.0)
+        self.apply()
+
+    def release(self, msg_type: str, owner: Any = None) -> None:
+        """
+        Снятие заявки; без заявок автопилот возвращается к частоте по умолчанию.
+
+        Args:
+            msg_type (str): Тип сообщения MAVLink.
+            owner (Any): Владелец заявки.
+        """
+        with self._lock:
+            owners = self._requests.get(msg_type, {})
+            owners.pop(owner, None)
+            if not owners:
+                self._requests.pop(msg_type, None)
+        self.apply()
+
+    def target_rates(self) -> Dict[str, float]:
+        """
+        Частоты, которые должны действовать с учётом текущего множителя.
+
+        Returns:
+            Dict[str, float]: Словарь "тип сообщения -> частота в Гц".
+        """
+        with self._lock:
+            rates = {}
+            for msg_type, owners in self._requests.items():
+                rate = max(r for r, _ in owners.values())
+                floor = max(m for _, m in owners.values())
+                rates[msg_type] = max(rate * self.scale, min(floor, rate))
+            return rates
+
+    def apply(self) -> None:
+        """
+        Отправка SET_MESSAGE_INTERVAL для типов, частота которых изменилась.
+        """
+        rates = self.target_rates()
+        with self._lock:
+            changes = {t: r for t, r in rates.items() if self._applied.get(t) != r}
+            released = [t for t in self._applied if t not in rates]
+            for msg_type in released:
+                del self._applied[msg_type]
+            self._applied.update(changes)
+        for msg_type, rate in changes.items():
+            self._set_interval(msg_type, 1e6 / rate)
+            logger.info(f"Частота {msg_type}: {rate:.2f} Гц")
+        for msg_type in released:
+            self._set_interval(msg_type, 0)  # 0 — частота по умолчанию автопилота
+            logger.info(f"Частота {msg_type}: по умолчанию")
+
+    def _set_interval(self, msg_type: str, interval_us: float) -> None:
+        future = self.send_command(mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL,
+                                   message_id(msg_type), interval_us)
+        if hasattr(future, 'add_done_callback'):
+            future.add_done_callback(lambda f: self._on_ack(msg_type, f))
+
+    def _on_ack(self, msg_type: str, future: Any) -> None:
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.warning(f"Частота {msg_type} не подтверждена: {future.exception()}")
+        elif future.result().result != mavutil.mavlink.MAV_RESULT_ACCEPTED:
+            logger.warning(f"Автопилот отклонил частоту {msg_type} с кодом {future.result().result}")
+
+    def on_message(self, msg: Any) -> None:
+        """
+        Учёт принятого сообщения (обработчик MavlinkReceiver).
+
+        Args:
+            msg (Any): Декодированное сообщение MAVLink.
+        """
+        msg_type = msg.get_type()
+        with self._lock:
+            self._bytes += len(msg.get_msgbuf())
+            self._counts[msg_type] = self._counts.get(msg_type, 0) + 1
+            elapsed = time.monotonic() - self._window_start
+            if elapsed < self.window:
+                return
+            decoder = getattr(self.receiver, 'decoder', None)
+            if decoder is not None:
+                # При выборочном декодировании учитываются и пропущенные кадры
+                self._bytes = decoder.bytes_received - self._decoder_bytes
+                self._decoder_bytes = decoder.bytes_received
+            self.utilization = self._bytes / elapsed / self.link_capacity
+            self.measured_rates = {t: c / elapsed for t, c in self._counts.items()}
+            self._bytes = 0
+            self._counts = {}
+            self._window_start = time.monotonic()
+        self.adapt(self.utilization, self.receiver.backlog())
+
+    def adapt(self, utilization: float, backlog: int = 0) -> None:
+        """
+        Изменение множителя частот по загрузке канала и очереди приёма.
+
+        Args:
+            utilization (float): Доля использованной пропускной способности.
+            backlog (int): Число непрочитанных сообщений в подписках.
+        """
+        scale = self.scale
+        if utilization > self.high_water or backlog > self.max_backlog:
+            scale = max(self.min_scale, scale / 2)
+        elif utilization < self.low_water and scale < 1.0:
+            scale = min(1.0, scale * 1.25)
+        if scale != self.scale:
+            logger.info(f"Загрузка канала {utilization:.0%}, очередь {backlog}: множитель частот {scale:.3f}")
+            self.scale = scale
+            self.apply()
+
+    def close(self) -> None:
+        """
+        Отключение от приёмника.
+        """
+        self.receiver.remove_listener(self.on_message)
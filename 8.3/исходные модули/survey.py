@@ -0,0 +1,150 @@
+# survey.py
+
+import math
+from typing import Sequence, Tuple
+import numpy as np
+import logging
+
+from geodesy import EARTH_RADIUS
+
+logger = logging.getLogger(__name__)
+
+_DEG = math.pi / 180 * EARTH_RADIUS  # Метров в градусе широты
+
+
+def camera_footprint(altitude: float, sensor_width: float, sensor_height: float,
+                     focal_length: float) -> Tuple[float, float]:
+    """
+    Размер кадра на земле при съёмке в надир.
+
+    Args:
+        altitude (float): Высота съёмки над землёй в метрах.
+        sensor_width (float): Ширина матрицы в мм (поперёк направления полёта).
+        sensor_height (float): Высота матрицы в мм (вдоль направления полёта).
+        focal_length (float): Фокусное расстояние в мм.
+
+    Returns:
+        Tuple[float, float]: Ширина и длина кадра на земле в метрах.
+    """
+    if altitude <= 0 or focal_length <= 0:
+        raise ValueError("Высота и фокусное расстояние должны быть положительными")
+    return altitude * sensor_width / focal_length, altitude * sensor_height / focal_length
+
+
+def _sweep_segments(u: np.ndarray, v: np.ndarray,
+                    spacing: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Отрезки пересечения многоугольника с прямыми v = const, проведёнными через spacing.
+
+    Все прямые пересекаются со всеми рёбрами одной операцией (матрица
+    "прямые x рёбра"); точки пересечения каждой прямой сортируются
+    и попарно образуют отрезки внутри многоугольника (правило чётности).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Номер прямой, начало и конец
+        (по u) каждого отрезка в порядке прямых и возрастания u, а также положения прямых (по v).
+    """
+    v_min, v_max = v.min(), v.max()
+    lines = max(int(math.ceil((v_max - v_min) / spacing)), 1)
+    # Прямые по центрам полос, чтобы крайние полосы не выходили за границу наполовину
+    offset = ((v_max - v_min) - (lines - 1) * spacing) / 2
+    levels = v_min + offset + np.arange(lines) * spacing
+
+    u0, v0 = u, v
+    u1, v1 = np.roll(u, -1), np.roll(v, -1)
+    level = levels[:, None]
+    crosses = (v0 <= level) != (v1 <= level)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        at = u0 + (level - v0) * (u1 - u0) / (v1 - v0)
+    at = np.where(crosses, at, np.inf)
+    at.sort(axis=1)
+    counts = crosses.sum(axis=1)
+    width = int(counts.max()) if counts.size else 0
+    at = at[:, :width - width % 2]
+    starts, ends = at[:, 0::2], at[:, 1::2]
+    valid = np.isfinite(ends)
+    line_index = np.broadcast_to(np.arange(lines)[:, None], starts.shape)[valid]
+    return line_index, starts[valid], ends[valid], levels
+
+
+def lawnmower(polygon: Sequence[Tuple[float, float]], altitude: float, footprint: Tuple[float, float],
+              side_overlap: float = 0.7, front_overlap: float = 0.8, heading: float = 0.0,
+              photo_waypoints: bool = False) -> np.ndarray:
+    """
+    Маршрут площадной съёмки "змейкой" над многоугольником.
+
+    Галсы идут параллельно направлению heading на расстоянии ширины кадра
+    с учётом поперечного перекрытия и обходятся поочерёдно в прямом
+    и обратном направлении. Многоугольник переводится в локальные метры
+    (равнопромежуточная проекция около центра), и все галсы отсекаются
+    по нему одной векторной операцией NumPy. В невыпуклом многоугольнике
+    галс может распадаться на несколько отрезков; они обходятся подряд.
+
+    Args:
+        polygon (Sequence[Tuple[float, float]]): Вершины (lat, lon) без повтора первой.
+        altitude (float): Высота полёта относительно точки старта в метрах.
+        footprint (Tuple[float, float]): Ширина и длина кадра на земле в метрах
+            (см. camera_footprint()).
+        side_overlap (float): Поперечное перекрытие кадров (доля от 0 до 1).
+        front_overlap (float): Продольное перекрытие кадров (доля от 0 до 1).
+        heading (float): Направление галсов в градусах от севера по часовой стрелке.
+        photo_waypoints (bool): Ставить точку в каждом месте съёмки (через длину кадра
+            с учётом продольного перекрытия), а не только на концах галсов.
+
+    Returns:
+        np.ndarray: Массив точек (lat, lon, alt) формы (N, 3).
+
+    Raises:
+        ValueError: Если параметры некорректны.
+    """
+    vertices = np.asarray(polygon, dtype=np.float64)
+    if vertices.ndim != 2 or vertices.shape[1] != 2 or len(vertices) < 3:
+        raise ValueError("Многоугольник должен содержать не менее трёх вершин (lat, lon)")
+    if not np.isfinite(vertices).all():
+        raise ValueError("Некорректные координаты вершин")
+    width, length = footprint
+    if width <= 0 or length <= 0:
+        raise ValueError("Размер кадра должен быть положительным")
+    if not (0 <= side_overlap < 1 and 0 <= front_overlap < 1):
+        raise ValueError("Перекрытие должно быть в диапазоне [0, 1)")
+    spacing = width * (1 - side_overlap)
+    trigger = length * (1 - front_overlap)
+
+    lat0, lon0 = vertices[:, 0].mean(), vertices[:, 1].mean()
+    cos_lat0 = math.cos(math.radians(lat0))
+    x = (vertices[:, 1] - lon0) * _DEG * cos_lat0
+    y = (vertices[:, 0] - lat0) * _DEG
+    # u — вдоль галса, v — поперёк (вправо от направления heading)
+    h = math.radians(heading)
+    along, across = (math.sin(h), math.cos(h)), (math.cos(h), -math.sin(h))
+    u = x * along[0] + y * along[1]
+    v = x * across[0] + y * across[1]
+
+    line, start, end, levels = _sweep_segments(u, v, spacing)
+    if not len(line):
+        raise ValueError("Многоугольник не содержит ни одного галса")
+
+    # Чётные галсы — по направлению heading, нечётные — навстречу
+    reverse = np.unique(line, return_inverse=True)[1].ravel() % 2 == 1
+    order = np.lexsort((np.where(reverse, -start, start), line))
+    line, start, end, reverse = line[order], start[order], end[order], reverse[order]
+    start, end = np.where(reverse, end, start), np.where(reverse, start, end)
+
+    if photo_waypoints:
+        counts = np.maximum(np.ceil(np.abs(end - start) / trigger).astype(np.intp), 1) + 1
+        offsets = np.cumsum(counts) - counts
+        t = (np.arange(counts.sum()) - np.repeat(offsets, counts)) / np.repeat(counts - 1, counts)
+        pu = np.repeat(start, counts) + np.repeat(end - start, counts) * t
+        pv = np.repeat(levels[line], counts)
+    else:
+        pu = np.column_stack((start, end)).ravel()
+        pv = np.repeat(levels[line], 2)
+
+    px = pu * along[0] + pv * across[0]
+    py = pu * along[1] + pv * across[1]
+    result = np.empty((len(pu), 3))
+    result[:, 0] = lat0 + py / _DEG
+    result[:, 1] = lon0 + px / (_DEG * cos_lat0)
+    result[:, 2] = altitude
+    logger.info(f"Съёмка: {len(np.unique(line))} галсов, {len(result)} точек")
+    return result
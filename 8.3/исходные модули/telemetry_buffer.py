@@ -0,0 +1,215 @@
+# telemetry_buffer.py
+
+import os
+import threading
+import time
+from typing import Optional, Dict, Any
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Запись буфера телеметрии: одна строка на каждое сообщение GLOBAL_POSITION_INT
+# (relative_alt — высота относительно точки старта, как в TelemetrySnapshot)
+TELEMETRY_DTYPE = np.dtype([
+    ('timestamp', 'f8'),
+    ('lat', 'f8'),
+    ('lon', 'f8'),
+    ('relative_alt', 'f4'),
+    ('groundspeed', 'f4'),
+    ('airspeed', 'f4'),
+    ('battery', 'f4'),
+    ('roll', 'f4'),
+    ('pitch', 'f4'),
+    ('yaw', 'f4'),
+])
+
+
+def load_recording(path: str) -> np.ndarray:
+    """
+    Открытие записи телеметрии с диска только для чтения.
+
+    Args:
+        path (str): Путь к файлу, записанному TelemetryRingBuffer.
+
+    Returns:
+        np.ndarray: Отображённый в память массив записей TELEMETRY_DTYPE.
+    """
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=TELEMETRY_DTYPE)
+    return np.memmap(path, dtype=TELEMETRY_DTYPE, mode='r')
+
+
+class TelemetryRingBuffer:
+    """
+    Кольцевой буфер телеметрии фиксированной ёмкости на структурированном массиве NumPy.
+
+    Буфер подключается обработчиком к MavlinkReceiver: VFR_HUD, SYS_STATUS
+    и ATTITUDE обновляют текущую строку, а каждое GLOBAL_POSITION_INT
+    дописывает её в буфер. Память выделяется один раз при создании.
+    При заданном spill_path все строки дополнительно пишутся в файл,
+    отображённый в память, который растёт блоками по spill_chunk записей.
+    """
+
+    def __init__(self, capacity: int = 3000, spill_path: Optional[str] = None,
+                 spill_chunk: int = 65536):
+        """
+        Инициализация буфера.
+
+        Args:
+            capacity (int): Число хранимых в памяти записей.
+            spill_path (Optional[str]): Файл для полной записи полёта (None — без записи).
+            spill_chunk (int): Шаг увеличения файла записи в записях.
+        """
+        if capacity <= 0:
+            raise ValueError("Ёмкость буфера должна быть положительной")
+        self._lock = threading.Lock()
+        self._data = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self._current = np.full(1, np.nan, dtype=TELEMETRY_DTYPE)
+        self._count = 0
+        self.spill_path = spill_path
+        self.spill_chunk = spill_chunk
+        self._spill: Optional[np.memmap] = None
+        self._spilled = 0
+        if spill_path is not None:
+            open(spill_path, 'wb').close()
+            self._grow_spill()
+
+    @property
+    def capacity(self) -> int:
+        """
+        int: Число хранимых в памяти записей.
+        """
+        return len(self._data)
+
+    @property
+    def total(self) -> int:
+        """
+        int: Число записей, добавленных за всё время.
+        """
+        return self._count
+
+    def __len__(self) -> int:
+        return min(self._count, len(self._data))
+
+    def feed(self, msg: Any) -> None:
+        """
+        Обработчик сообщений MAVLink для MavlinkReceiver.add_listener().
+
+        Args:
+            msg (Any): Декодированное сообщение MAVLink.
+        """
+        msg_type = msg.get_type()
+        row = self._current[0]
+        if msg_type == 'GLOBAL_POSITION_INT':
+            row['lat'] = msg.lat / 1e7
+            row['lon'] = msg.lon / 1e7
+            row['relative_alt'] = msg.relative_alt / 1000
+            row['timestamp'] = time.time()
+            self.append(self._current)
+        elif msg_type == 'VFR_HUD':
+            row['groundspeed'] = msg.groundspeed
+            row['airspeed'] = msg.airspeed
+        elif msg_type == 'SYS_STATUS':
+            row['battery'] = msg.battery_remaining
+        elif msg_type == 'ATTITUDE':
+            row['roll'] = msg.roll
+            row['pitch'] = msg.pitch
+            row['yaw'] = msg.yaw
+
+    def append(self, record: np.ndarray) -> None:
+        """
+        Добавление записи в буфер (и в файл записи, если он задан).
+
+        Args:
+            record (np.ndarray): Запись или массив из одной записи TELEMETRY_DTYPE.
+        """
+        with self._lock:
+            self._data[self._count % len(self._data)] = record
+            if self._spill is not None:
+                if self._spilled == len(self._spill):
+                    self._grow_spill()
+                self._spill[self._spilled] = record
+                self._spilled += 1
+            self._count += 1
+
+    def _release_spill(self) -> int:
+        """
+        Сброс и снятие отображения файла записи перед изменением его размера.
+
+        Returns:
+            int: Размер отображения в записях (0, если файл не отображён).
+        """
+        if self._spill is None:
+            return 0
+        size = len(self._spill)
+        self._spill.flush()
+        # Других ссылок на отображение нет: после удаления последней mmap закрывается
+        self._spill = None
+        return size
+
+    def _grow_spill(self) -> None:
+        size = self._release_spill() + self.spill_chunk
+        with open(self.spill_path, 'r+b') as f:
+            f.truncate(size * TELEMETRY_DTYPE.itemsize)
+        self._spill = np.memmap(self.spill_path, dtype=TELEMETRY_DTYPE, mode='r+', shape=(size,))
+
+    def to_array(self) -> np.ndarray:
+        """
+        Копия содержимого буфера в хронологическом порядке.
+
+        Returns:
+            np.ndarray: Массив записей TELEMETRY_DTYPE.
+        """
+        with self._lock:
+            capacity = len(self._data)
+            if self._count <= capacity:
+                return self._data[:self._count].copy()
+            start = self._count % capacity
+            return np.concatenate((self._data[start:], self._data[:start]))
+
+    def since(self, timestamp: float) -> np.ndarray:
+        """
+        Записи буфера начиная с заданного момента времени.
+
+        Args:
+            timestamp (float): Время UNIX в секундах.
+
+        Returns:
+            np.ndarray: Массив записей TELEMETRY_DTYPE.
+        """
+        data = self.to_array()
+        return data[np.searchsorted(data['timestamp'], timestamp):]
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        """
+        Последняя запись в виде словаря.
+
+        Returns:
+            Optional[Dict[str, float]]: Поля записи или None, если буфер пуст.
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+            record = self._data[(self._count - 1) % len(self._data)]
+            return {name: float(record[name]) for name in TELEMETRY_DTYPE.names}
+
+    def flush(self) -> None:
+        """
+        Сброс файла записи на диск.
+        """
+        with self._lock:
+            if self._spill is not None:
+                self._spill.flush()
+
+    def close(self) -> None:
+        """
+        Завершение записи: файл обрезается до фактического числа записей.
+        """
+        with self._lock:
+            if self._spill is None:
+                return
+            self._release_spill()
+            with open(self.spill_path, 'r+b') as f:
+                f.truncate(self._spilled * TELEMETRY_DTYPE.itemsize)
+        logger.info(f"Записано {self._spilled} записей телеметрии в {self.spill_path}")
@@ -0,0 +1,188 @@
+# telemetry_snapshot.py
+
+from collections.abc import Mapping
+import math
+from typing import Optional, Dict, Any, Iterable, Iterator
+
+# Поля снимка в порядке выдачи; time_boot_ms — время борта, timestamp — время приёма
+FIELDS = ('lat', 'lon', 'alt', 'relative_alt', 'groundspeed', 'airspeed', 'battery',
+          'roll', 'pitch', 'yaw', 'time_boot_ms', 'timestamp')
+_BITS = {name: 1 << i for i, name in enumerate(FIELDS)}
+_POSITION = _BITS['lat'] | _BITS['lon'] | _BITS['alt'] | _BITS['relative_alt']
+_SPEED = _BITS['groundspeed'] | _BITS['airspeed']
+_ATTITUDE = _BITS['roll'] | _BITS['pitch'] | _BITS['yaw']
+
+
+class TelemetrySnapshot(Mapping):
+    """
+    Неизменяемый снимок телеметрии на слотах.
+
+    Каждое поле хранится в отдельном слоте, а наличие полей — в битовой
+    маске, поэтому снимок не создаёт словарь на каждый вызов. Для
+    совместимости снимок ведёт себя как словарь только для чтения
+    (telemetry['lat'], telemetry.get('relative_alt'), 'yaw' in telemetry),
+    а to_dict() возвращает обычный словарь. Поля доступны и как атрибуты
+    (telemetry.lat); обращение к отсутствующему полю вызывает AttributeError.
+    """
+
+    __slots__ = FIELDS + ('_present',)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Снимок телеметрии неизменяем")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Снимок телеметрии неизменяем")
+
+    @classmethod
+    def from_messages(cls, messages: Dict[str, Any], timestamp: Optional[float] = None) -> 'TelemetrySnapshot':
+        """
+        Сборка снимка из последних сообщений разных типов с проверкой диапазонов.
+
+        Args:
+            messages (Dict[str, Any]): Словарь "тип сообщения -> последнее сообщение".
+            timestamp (Optional[float]): Время приёма (UNIX, секунды), если известно.
+
+        Returns:
+            TelemetrySnapshot: Снимок с доступными полями.
+        """
+        setters = _SETTERS
+        snapshot = object.__new__(cls)
+        present = 0
+        msg = messages.get('GLOBAL_POSITION_INT')
+        if msg is not None:
+            lat = msg.lat / 1e7
+            lon = msg.lon / 1e7
+            if not -90.0 <= lat <= 90.0:
+                raise ValueError("Некорректная широта")
+            if not -180.0 <= lon <= 180.0:
+                raise ValueError("Некорректная долгота")
+            setters['lat'](snapshot, lat)
+            setters['lon'](snapshot, lon)
+            setters['alt'](snapshot, msg.alt / 1000)
+            setters['relative_alt'](snapshot, msg.relative_alt / 1000)
+            setters['time_boot_ms'](snapshot, msg.time_boot_ms)
+            present |= _POSITION | _BITS['time_boot_ms']
+        msg = messages.get('VFR_HUD')
+        if msg is not None:
+            setters['groundspeed'](snapshot, msg.groundspeed)
+            setters['airspeed'](snapshot, msg.airspeed)
+            present |= _SPEED
+        msg = messages.get('SYS_STATUS')
+        if msg is not None:
+            setters['battery'](snapshot, msg.battery_remaining)
+            present |= _BITS['battery']
+        msg = messages.get('ATTITUDE')
+        if msg is not None:
+            if not -math.pi <= msg.roll <= math.pi:
+                raise ValueError("Некорректный крен")
+            if not -math.pi/2 <= msg.pitch <= math.pi/2:
+                raise ValueError("Некорректный тангаж")
+            if not -math.pi <= msg.yaw <= math.pi:
+                raise ValueError("Некорректное рыскание")
+            setters['roll'](snapshot, msg.roll)
+            setters['pitch'](snapshot, msg.pitch)
+            setters['yaw'](snapshot, msg.yaw)
+            present |= _ATTITUDE
+            if not present & _BITS['time_boot_ms']:
+                setters['time_boot_ms'](snapshot, msg.time_boot_ms)
+                present |= _BITS['time_boot_ms']
+        if timestamp is not None:
+            setters['timestamp'](snapshot, timestamp)
+            present |= _BITS['timestamp']
+        setters['_present'](snapshot, present)
+        return snapshot
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any]) -> 'TelemetrySnapshot':
+        """
+        Снимок из словаря полей (неизвестные поля вызывают KeyError).
+
+        Args:
+            values (Dict[str, Any]): Словарь "поле -> значение".
+
+        Returns:
+            TelemetrySnapshot: Снимок с заданными полями.
+        """
+        snapshot = object.__new__(cls)
+        present = 0
+        for name, value in values.items():
+            present |= _BITS[name]
+            _SETTERS[name](snapshot, value)
+        _SETTERS['_present'](snapshot, present)
+        return snapshot
+
+    def select(self, fields: Iterable[str]) -> 'TelemetrySnapshot':
+        """
+        Снимок только с выбранными полями (отсутствующие пропускаются).
+
+        Args:
+            fields (Iterable[str]): Нужные поля.
+
+        Returns:
+            TelemetrySnapshot: Новый снимок.
+        """
+        mask = 0
+        for name in fields:
+            mask |= _BITS.get(name, 0)
+        mask |= _BITS['timestamp']
+        snapshot = object.__new__(type(self))
+        for name in self._names(self._present & mask):
+            _SETTERS[name](snapshot, getattr(self, name))
+        _SETTERS['_present'](snapshot, self._present & mask)
+        return snapshot
+
+    def has(self, name: str) -> bool:
+        """
+        Признак наличия поля в снимке.
+        """
+        return bool(self._present & _BITS.get(name, 0))
+
+    @staticmethod
+    def _names(present: int) -> Iterator[str]:
+        for name in FIELDS:
+            if present & _BITS[name]:
+                yield name
+
+    def __getitem__(self, name: str) -> Any:
+        if name in _BITS:
+            try:
+                return getattr(self, name)
+            except AttributeError:
+                pass
+        raise KeyError(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return self._names(self._present)
+
+    def __contains__(self, name: Any) -> bool:
+        return self.has(name) if isinstance(name, str) else False
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """
+        Значение поля или default, если поля нет в снимке.
+        """
+        if self._present & _BITS.get(name, 0):
+            return getattr(self, name)
+        return default
+
+    def __len__(self) -> int:
+        return bin(self._present).count('1')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Обычный словарь с полями снимка.
+
+        Returns:
+            Dict[str, Any]: Словарь "поле -> значение".
+        """
+        return {name: getattr(self, name) for name in self._names(self._present)}
+
+    def __reduce__(self):
+        return (type(self).from_dict, (self.to_dict(),))
+
+    def __repr__(self) -> str:
+        return f"TelemetrySnapshot({self.to_dict()})"
+
+
+# Запись в слоты напрямую через дескрипторы, минуя запрещающий __setattr__
+_SETTERS = {name: getattr(TelemetrySnapshot, name).__set__ for name in TelemetrySnapshot.__slots__}
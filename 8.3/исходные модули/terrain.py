@@ -0,0 +1,253 @@
+# terrain.py
+
+import collections
+import math
+import os
+import threading
+from typing import Optional, Tuple, Sequence, Union
+import numpy as np
+import logging
+
+from geodesy import as_waypoint_array, haversine_distance
+
+logger = logging.getLogger(__name__)
+
+HGT_VOID = -32768  # Значение пропуска данных в тайлах SRTM
+
+
+def tile_name(lat: float, lon: float) -> str:
+    """
+    Имя файла тайла SRTM, содержащего точку (например, N47E008.hgt).
+
+    Args:
+        lat (float): Широта.
+        lon (float): Долгота.
+
+    Returns:
+        str: Имя файла.
+    """
+    lat0, lon0 = math.floor(lat), math.floor(lon)
+    return f"{'N' if lat0 >= 0 else 'S'}{abs(lat0):02d}{'E' if lon0 >= 0 else 'W'}{abs(lon0):03d}.hgt"
+
+
+class TerrainTile:
+    """
+    Тайл высот SRTM (.hgt), отображённый в память.
+
+    Файл — квадратная сетка N x N знаковых 16-битных высот (big-endian)
+    с севера на юг и с запада на восток; соседние тайлы делят крайние строки
+    и столбцы. В память читаются только страницы, к которым идёт обращение.
+    """
+
+    def __init__(self, path: str, lat0: int, lon0: int):
+        """
+        Args:
+            path (str): Путь к файлу .hgt.
+            lat0 (int): Широта южной границы тайла.
+            lon0 (int): Долгота западной границы тайла.
+        """
+        samples = os.path.getsize(path) // 2
+        size = math.isqrt(samples)
+        if size * size != samples or size < 2:
+            raise ValueError(f"Файл {path} не похож на тайл .hgt")
+        self.path = path
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.size = size
+        self.data = np.memmap(path, dtype='>i2', mode='r', shape=(size, size))
+
+    def elevation(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """
+        Билинейная интерполяция высоты для точек внутри тайла.
+
+        Args:
+            lat (np.ndarray): Широты.
+            lon (np.ndarray): Долготы.
+
+        Returns:
+            np.ndarray: Высоты над уровнем моря в метрах (NaN рядом с пропусками данных).
+        """
+        step = self.size - 1
+        row = np.clip((self.lat0 + 1 - lat) * step, 0, step)
+        col = np.clip((lon - self.lon0) * step, 0, step)
+        r0 = np.minimum(row.astype(np.intp), step - 1)
+        c0 = np.minimum(col.astype(np.intp), step - 1)
+        fr, fc = row - r0, col - c0
+        corners = np.stack((self.data[r0, c0], self.data[r0, c0 + 1],
+                            self.data[r0 + 1, c0], self.data[r0 + 1, c0 + 1])).astype(np.float64)
+        corners[corners == HGT_VOID] = np.nan
+        top = corners[0] * (1 - fc) + corners[1] * fc
+        bottom = corners[2] * (1 - fc) + corners[3] * fc
+        return top * (1 - fr) + bottom * fr
+
+
+class TerrainModel:
+    """
+    Цифровая модель рельефа из каталога тайлов .hgt с кэшем открытых тайлов.
+
+    Тайлы открываются при первом обращении и хранятся в LRU-кэше на
+    max_tiles элементов; отображение вытесненного тайла освобождается,
+    как только на него не остаётся ссылок. Запросы высот
+    векторизованы: точки группируются по тайлам, и каждый тайл
+    обрабатывается одной операцией NumPy.
+    """
+
+    def __init__(self, directory: str, max_tiles: int = 16):
+        """
+        Инициализация модели рельефа.
+
+        Args:
+            directory (str): Каталог с файлами .hgt.
+            max_tiles (int): Число одновременно открытых тайлов.
+        """
+        if max_tiles < 1:
+            raise ValueError("Размер кэша тайлов должен быть положительным")
+        self.directory = directory
+        self.max_tiles = max_tiles
+        self._tiles: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def tile(self, lat0: int, lon0: int) -> Optional[TerrainTile]:
+        """
+        Тайл с юго-западным углом (lat0, lon0) или None, если файла нет.
+
+        Args:
+            lat0 (int): Широта южной границы.
+            lon0 (int): Долгота западной границы.
+
+        Returns:
+            Optional[TerrainTile]: Открытый тайл.
+        """
+        key = (lat0, lon0)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return self._tiles[key]
+            self.misses += 1
+            path = os.path.join(self.directory, tile_name(lat0, lon0))
+            tile = TerrainTile(path, lat0, lon0) if os.path.exists(path) else None
+            if tile is None:
+                logger.warning(f"Нет тайла рельефа {tile_name(lat0, lon0)}")
+            self._tiles[key] = tile
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+            return tile
+
+    def elevation(self, lat: Union[float, Sequence[float], np.ndarray],
+                  lon: Union[float, Sequence[float], np.ndarray]) -> np.ndarray:
+        """
+        Высота рельефа над уровнем моря в заданных точках.
+
+        Args:
+            lat (Union[float, Sequence[float], np.ndarray]): Широты.
+            lon (Union[float, Sequence[float], np.ndarray]): Долготы.
+
+        Returns:
+            np.ndarray: Высоты в метрах; NaN там, где нет данных.
+        """
+        lat, lon = np.broadcast_arrays(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64))
+        flat_lat, flat_lon = lat.ravel(), lon.ravel()
+        result = np.full(flat_lat.shape, np.nan)
+        keys = np.stack((np.floor(flat_lat), np.floor(flat_lon)), axis=1).astype(np.int64)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        for index, (lat0, lon0) in enumerate(unique):
+            tile = self.tile(int(lat0), int(lon0))
+            if tile is None:
+                continue
+            mask = inverse == index
+            result[mask] = tile.elevation(flat_lat[mask], flat_lon[mask])
+        return result.reshape(lat.shape)
+
+    def clear(self) -> None:
+        """
+        Очистка кэша тайлов.
+        """
+        with self._lock:
+            self._tiles.clear()
+
+
+def agl_to_relative(waypoints: Union[Sequence[Tuple[float, float, float]], np.ndarray],
+                    home: Tuple[float, float], terrain: TerrainModel) -> np.ndarray:
+    """
+    Перевод высот точек над рельефом (AGL) в высоты относительно точки старта.
+
+    Миссии загружаются в MAV_FRAME_GLOBAL_RELATIVE_ALT, поэтому высота
+    точки равна рельефу под ней плюс AGL минус рельеф в точке старта.
+
+    Args:
+        waypoints (Union[Sequence[Tuple[float, float, float]], np.ndarray]): Точки (lat, lon, AGL).
+        home (Tuple[float, float]): Точка старта (lat, lon).
+        terrain (TerrainModel): Модель рельефа.
+
+    Returns:
+        np.ndarray: Массив формы (N, 3) с высотами относительно точки старта.
+
+    Raises:
+        ValueError: Если для точки старта или точек миссии нет данных рельефа.
+    """
+    array = as_waypoint_array(waypoints).copy()
+    ground = terrain.elevation(array[:, 0], array[:, 1])
+    home_ground = float(terrain.elevation(home[0], home[1]))
+    if math.isnan(home_ground):
+        raise ValueError("Нет данных рельефа для точки старта")
+    missing = np.flatnonzero(np.isnan(ground))
+    if missing.size:
+        raise ValueError(f"Нет данных рельефа для точек: {(missing[:10] + 1).tolist()}")
+    array[:, 2] += ground - home_ground
+    return array
+
+
+def check_clearance(waypoints: Union[Sequence[Tuple[float, float, float]], np.ndarray],
+                    home: Tuple[float, float], terrain: TerrainModel,
+                    min_clearance: float = 10.0, spacing: float = 30.0,
+                    chunk_samples: int = 262144) -> np.ndarray:
+    """
+    Проверка запаса высоты над рельефом вдоль всех участков миссии.
+
+    Каждый участок (высота относительно точки старта меняется вдоль него
+    линейно) проверяется в точках через spacing метров — обычно это шаг DEM.
+    Участки обрабатываются пачками примерно по chunk_samples точек, поэтому
+    память не растёт с длиной миссии.
+
+    Args:
+        waypoints (Union[Sequence[Tuple[float, float, float]], np.ndarray]): Точки (lat, lon, высота
+            относительно точки старта).
+        home (Tuple[float, float]): Точка старта (lat, lon).
+        terrain (TerrainModel): Модель рельефа.
+        min_clearance (float): Минимальная высота над рельефом в метрах.
+        spacing (float): Шаг проверки вдоль участка в метрах.
+        chunk_samples (int): Число проверочных точек в одной пачке.
+
+    Returns:
+        np.ndarray: Номера участков (от точки i к i + 1), где запас меньше min_clearance
+        или нет данных рельефа; для миссии из одной точки проверяется сама точка.
+    """
+    array = as_waypoint_array(waypoints)
+    home_ground = float(terrain.elevation(home[0], home[1]))
+    if math.isnan(home_ground):
+        raise ValueError("Нет данных рельефа для точки старта")
+    if len(array) == 1:
+        start, end = array, array
+    else:
+        start, end = array[:-1], array[1:]
+    lengths = haversine_distance(start[:, 0], start[:, 1], end[:, 0], end[:, 1])
+    counts = np.maximum(np.ceil(lengths / spacing).astype(np.intp), 1) + 1
+    # Границы пачек по накопленному числу точек
+    bounds = np.searchsorted(np.cumsum(counts), np.arange(chunk_samples, counts.sum(), chunk_samples))
+    bad_legs = []
+    for first, last in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(counts)]))):
+        if first == last:
+            continue
+        chunk = counts[first:last]
+        legs = np.repeat(np.arange(first, last), chunk)
+        offsets = np.cumsum(chunk) - chunk
+        t = (np.arange(chunk.sum()) - np.repeat(offsets, chunk)) / np.repeat(chunk - 1, chunk)
+        points = start[legs] + (end[legs] - start[legs]) * t[:, None]
+        clearance = points[:, 2] + home_ground - terrain.elevation(points[:, 0], points[:, 1])
+        bad = ~(clearance >= min_clearance)  # NaN (нет данных) тоже считается нарушением
+        bad_legs.append(legs[bad])
+    return np.unique(np.concatenate(bad_legs)) if bad_legs else np.empty(0, dtype=np.intp)
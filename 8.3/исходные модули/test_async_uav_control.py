@@ -0,0 +1,128 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+from async_uav_control import AsyncUAVControl
+from test_mavlink_receiver import make_msg
+from test_command_ack import make_ack
+from test_uav_control import heartbeat
+
+
+def from_system(msg, system=1):
+    msg.get_srcSystem.return_value = system
+    return msg
+
+
+class TestAsyncUAVControl(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.incoming = []
+        self.mock_master = MagicMock()
+        self.mock_master.target_system = 1
+        self.mock_master.recv_msg.side_effect = lambda: self.incoming.pop(0) if self.incoming else None
+        self.uav = AsyncUAVControl(self.mock_master, poll_interval=0.001)
+        self.uav.start()
+
+    async def asyncTearDown(self):
+        await self.uav.close()
+
+    async def test_get_telemetry_from_stream(self):
+        self.incoming += [
+            make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, alt=10000),
+            make_msg('SYS_STATUS', battery_remaining=60),
+        ]
+        await asyncio.sleep(0.01)
+
+        telemetry = await self.uav.get_telemetry()
+
+        self.assertAlmostEqual(telemetry['lat'], 47.3977)
+        self.assertEqual(telemetry['battery'], 60)
+
+    async def test_iter_telemetry_yields_latest_snapshot(self):
+        self.incoming.append(make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, alt=10000))
+        await asyncio.sleep(0.01)
+        snapshots = []
+
+        async for telemetry in self.uav.iter_telemetry(rate_hz=50, fields=['alt'], duration=0.1):
+            snapshots.append(telemetry)
+            if len(snapshots) == 1:
+                self.incoming.append(make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, alt=20000))
+                await asyncio.sleep(0.05)  # медленный потребитель
+
+        self.assertEqual(set(snapshots[0]), {'alt', 'timestamp'})
+        self.assertEqual(snapshots[0]['alt'], 10)
+        self.assertEqual(snapshots[1]['alt'], 20)
+        self.assertLessEqual(len(snapshots), 5)
+
+    async def test_concurrent_commands_get_their_own_ack(self):
+        self.mock_master.mode_mapping.return_value = {'GUIDED': 4}
+        self.incoming += [heartbeat(4), make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, alt=0)]
+        await asyncio.sleep(0.01)
+
+        takeoff = asyncio.ensure_future(self.uav.takeoff(10))
+        land = asyncio.ensure_future(self.uav.land())
+        await asyncio.sleep(0.01)
+        self.incoming += [make_ack(21), make_ack(22)]
+
+        await asyncio.gather(takeoff, land)
+        self.assertEqual(self.mock_master.mav.command_long_send.call_count, 2)
+
+    async def test_set_mode_retries_until_heartbeat_confirms(self):
+        self.mock_master.mode_mapping.return_value = {'GUIDED': 4, 'LAND': 9}
+        modes = {1: 0, 2: 4, 3: 9}  # первая команда теряется
+        self.mock_master.set_mode.side_effect = lambda mode_id: self.incoming.append(
+            heartbeat(modes[self.mock_master.set_mode.call_count]))
+
+        await self.uav.set_mode('GUIDED', timeout=0.05)
+        await self.uav.set_mode('LAND', timeout=0.05)
+        await self.uav.set_mode('LAND', timeout=0.05)
+
+        self.assertEqual(self.mock_master.set_mode.call_count, 3)
+        self.mock_master.mode_mapping.assert_called_once()
+
+    async def test_set_mode_not_confirmed(self):
+        self.mock_master.mode_mapping.return_value = {'GUIDED': 4}
+
+        with self.assertRaises(Exception):
+            await self.uav.set_mode('GUIDED', timeout=0.02, retries=1)
+        self.assertEqual(self.mock_master.set_mode.call_count, 2)
+
+    async def test_goto_and_wait_arrival(self):
+        await self.uav.goto(47.3980, 8.5460, 20)
+        args = self.mock_master.mav.set_position_target_global_int_send.call_args.args
+        self.assertEqual(args[5:8], (473980000, 85460000, 20))
+        self.mock_master.mav.mission_count_send.assert_not_called()
+
+        arrival = asyncio.ensure_future(self.uav.wait_arrival(47.3980, 8.5460, 20, timeout=1))
+        await asyncio.sleep(0.01)
+        self.incoming += [
+            from_system(make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, relative_alt=10000)),
+            from_system(make_msg('MISSION_CURRENT', seq=3)),
+        ]
+        await asyncio.sleep(0.01)
+        self.assertFalse(arrival.done())
+        self.incoming.append(
+            from_system(make_msg('GLOBAL_POSITION_INT', lat=473980000, lon=85460000, relative_alt=20000)))
+        self.assertTrue(await arrival)
+
+    async def test_wait_arrival_on_mission_item_reached_in_auto(self):
+        arrival = asyncio.ensure_future(self.uav.wait_arrival(47.3980, 8.5460, 20, timeout=1, seq=1))
+        await asyncio.sleep(0.01)
+        self.incoming.append(from_system(make_msg('MISSION_ITEM_REACHED', seq=1)))
+        self.assertTrue(await arrival)
+        self.assertFalse(await self.uav.wait_arrival(47.3980, 8.5460, 20, timeout=0.02))
+
+    async def test_upload_mission_retransmits_requested_items(self):
+        messages = [make_msg('MISSION_REQUEST_INT', seq=seq) for seq in (0, 1, 1)] + [make_msg('MISSION_ACK', type=0)]
+        for msg in messages:
+            msg.get_srcSystem.return_value = 1
+        self.incoming += messages
+
+        await self.uav.upload_mission(iter([(47.3977, 8.5456, 10), (47.3980, 8.5460, 20)]), count=2, window=1)
+
+        self.mock_master.mav.mission_count_send.assert_called_once()
+        sent = [call.args[2] for call in self.mock_master.mav.mission_item_int_send.call_args_list]
+        self.assertEqual(sent, [0, 1, 1])
+
+    async def test_wait_command_ack_timeout(self):
+        self.assertFalse(await self.uav.wait_command_ack(22, timeout=0.01))
+        self.assertEqual(self.uav._pending_acks[(22, 1)], [])
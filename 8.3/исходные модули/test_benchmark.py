@@ -0,0 +1,27 @@
+import unittest
+from benchmark import percentiles, compare, bench_decode, bench_skip_saving
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_percentiles_in_milliseconds(self):
+        summary = percentiles([0.001 * i for i in range(1, 101)])
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['p50'], 50.5)
+        self.assertAlmostEqual(summary['max'], 100.0)
+        self.assertEqual(percentiles([]), {'count': 0})
+
+    def test_decode_counts_every_message(self):
+        result = bench_decode(1000)
+        self.assertEqual(result['messages'], 1000)
+        self.assertGreater(result['messages_per_s'], 0)
+
+    def test_skipping_frames_is_cheaper_than_decoding(self):
+        result = bench_skip_saving(2000)
+        self.assertLess(result['skip_us_per_frame'], result['decode_us_per_frame'])
+        self.assertGreater(result['saving_percent'], 0)
+
+    def test_compare_reports_relative_change(self):
+        baseline = {'meta': {'timestamp': 1.0}, 'commands': {'arm': {'p50': 2.0}}}
+        current = {'meta': {'timestamp': 2.0}, 'commands': {'arm': {'p50': 3.0}}}
+        self.assertEqual(compare(baseline, current), ["commands.arm.p50: 2.000 -> 3.000 (+50.0%)"])
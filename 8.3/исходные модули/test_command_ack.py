@@ -0,0 +1,96 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+from pymavlink import mavutil
+from test_mavlink_receiver import make_msg
+from command_ack import CommandAckRouter, CommandPipeline
+
+
+def make_ack(command, result=0, system=1):
+    msg = make_msg('COMMAND_ACK', command=command, result=result)
+    msg.get_srcSystem.return_value = system
+    return msg
+
+
+class TestCommandAckRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.router = CommandAckRouter()
+
+    def test_routes_ack_to_matching_command(self):
+        takeoff = self.router.expect(22, target_system=1)
+        land = self.router.expect(21, target_system=1)
+
+        self.assertTrue(self.router.dispatch(make_ack(21)))
+
+        self.assertTrue(land.done())
+        self.assertFalse(takeoff.done())
+        self.assertEqual(self.router.pending_count(), 1)
+
+    def test_ignores_other_systems_and_messages(self):
+        pending = self.router.expect(22, target_system=1)
+
+        self.assertFalse(self.router.dispatch(make_ack(22, system=2)))
+        self.assertFalse(self.router.dispatch(make_msg('HEARTBEAT')))
+        self.assertFalse(pending.done())
+
+    def test_cancel_removes_pending(self):
+        pending = self.router.expect(22)
+        self.router.cancel(pending)
+
+        self.assertTrue(pending.cancelled())
+        self.assertFalse(self.router.dispatch(make_ack(22)))
+        self.assertEqual(self.router.pending_count(), 0)
+
+
+class TestCommandPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.master = MagicMock()
+        self.master.target_system = 1
+        self.master.target_component = 1
+        self.router = CommandAckRouter()
+        self.pipeline = CommandPipeline(self.master, self.router, ack_timeout=0.05, max_retries=3)
+
+    def confirmations(self):
+        return [call.args[3] for call in self.master.mav.command_long_send.call_args_list]
+
+    def test_retransmits_with_incremented_confirmation(self):
+        result = self.pipeline.send(22, 0, 0, 0, 0, 47.0, 8.0, 10)
+        time.sleep(0.12)
+        self.router.dispatch(make_ack(22))
+
+        self.assertEqual(result.result(timeout=1).result, 0)
+        self.assertGreaterEqual(len(self.confirmations()), 2)
+        self.assertEqual(self.confirmations()[:2], [0, 1])
+        self.assertEqual(self.master.mav.command_long_send.call_args.args[-1], 10)
+        self.assertEqual(self.pipeline.pending_count(), 0)
+
+    def test_several_commands_in_flight(self):
+        takeoff = self.pipeline.send(22)
+        land = self.pipeline.send(21)
+
+        self.router.dispatch(make_ack(21))
+        self.router.dispatch(make_ack(22, result=4))
+
+        self.assertEqual(land.result(timeout=1).result, 0)
+        self.assertEqual(takeoff.result(timeout=1).result, 4)
+
+    def test_in_progress_waits_for_final_ack(self):
+        self.pipeline.in_progress_timeout = 1.0
+        result = self.pipeline.send(241)
+        self.router.dispatch(make_ack(241, result=mavutil.mavlink.MAV_RESULT_IN_PROGRESS))
+        time.sleep(0.15)
+
+        self.assertFalse(result.done())
+        self.assertEqual(len(self.confirmations()), 1)
+        self.router.dispatch(make_ack(241))
+        self.assertEqual(result.result(timeout=1).result, 0)
+
+    def test_timeout_after_all_retries(self):
+        result = self.pipeline.send(22)
+
+        with self.assertRaises(TimeoutError):
+            result.result(timeout=1)
+        self.assertEqual(self.confirmations(), [0, 1, 2, 3])
+        self.assertEqual(self.router.pending_count(), 0)
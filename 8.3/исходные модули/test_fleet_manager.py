@@ -0,0 +1,77 @@
+import socket
+import time
+import unittest
+from unittest.mock import MagicMock
+from pymavlink import mavutil
+from fleet_manager import FleetManager
+from test_mavlink_receiver import make_msg
+
+
+def make_heartbeat(system_id):
+    msg = make_msg('HEARTBEAT', type=mavutil.mavlink.MAV_TYPE_QUADROTOR,
+                   autopilot=mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA, base_mode=0)
+    msg.get_srcSystem.return_value = system_id
+    msg.get_srcComponent.return_value = 1
+    return msg
+
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestFleetManager(unittest.TestCase):
+
+    def setUp(self):
+        self.fleet = FleetManager(select_timeout=0.01)
+
+    def tearDown(self):
+        self.fleet.close()
+
+    def test_route_registers_vehicle_by_heartbeat(self):
+        link = MagicMock()
+        self.fleet.route(link, make_heartbeat(3))
+        position = make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, alt=10000)
+        position.get_srcSystem.return_value = 3
+        self.fleet.route(link, position)
+
+        vehicle = self.fleet.vehicle(3, timeout=0)
+        self.assertEqual(vehicle.master.target_system, 3)
+        self.assertAlmostEqual(vehicle.get_telemetry()['lat'], 47.3977)
+        self.assertIn('GUIDED', vehicle.master.mode_mapping())
+
+    def test_ignores_messages_from_unknown_systems(self):
+        msg = make_msg('GLOBAL_POSITION_INT')
+        msg.get_srcSystem.return_value = 5
+        self.fleet.route(MagicMock(), msg)
+        self.assertEqual(self.fleet.vehicles, {})
+
+    def test_single_udp_endpoint_demultiplexes_systems(self):
+        port = free_udp_port()
+        self.fleet.add_link(f'udpin:127.0.0.1:{port}')
+        self.fleet.start()
+        drones = {
+            system_id: mavutil.mavlink_connection(f'udpout:127.0.0.1:{port}', source_system=system_id)
+            for system_id in (7, 8)
+        }
+        try:
+            for system_id, drone in drones.items():
+                drone.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR,
+                                         mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA, 0, 0, 0)
+                drone.mav.global_position_int_send(0, system_id * 10000000, 0, 0, 0, 0, 0, 0, 0)
+
+            vehicle = self.fleet.vehicle(8, timeout=2)
+            deadline = time.time() + 2
+            while vehicle.get_telemetry() is None and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(vehicle.get_telemetry()['lat'], 8.0)
+            self.assertEqual(self.fleet.vehicle(7, timeout=2).master.target_system, 7)
+
+            vehicle.master.arducopter_arm()
+            command = drones[8].recv_match(type='COMMAND_LONG', blocking=True, timeout=2)
+            self.assertIsNotNone(command)
+            self.assertEqual(command.target_system, 8)
+        finally:
+            for drone in drones.values():
+                drone.close()
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import geodesy
+
+
+class TestGeodesy(unittest.TestCase):
+
+    def test_vincenty_reference_distance(self):
+        # Flinders Peak -> Buninyong, эталонный пример Винченти
+        lat1, lon1 = -(37 + 57 / 60 + 3.72030 / 3600), 144 + 25 / 60 + 29.52440 / 3600
+        lat2, lon2 = -(37 + 39 / 60 + 10.15610 / 3600), 143 + 55 / 60 + 35.38390 / 3600
+        self.assertAlmostEqual(float(geodesy.vincenty_distance(lat1, lon1, lat2, lon2)), 54972.271, places=2)
+
+    def test_haversine_matches_scalar_and_vincenty(self):
+        lat = np.array([47.3977, 47.3980, 55.7558])
+        lon = np.array([8.5456, 8.5460, 37.6173])
+        haversine = geodesy.haversine_distance(lat[0], lon[0], lat, lon)
+        vincenty = geodesy.vincenty_distance(lat[0], lon[0], lat, lon)
+
+        self.assertEqual(haversine.shape, (3,))
+        self.assertAlmostEqual(haversine[2], geodesy.distance_3d(lat[0], lon[0], 0, lat[2], lon[2], 0), places=3)
+        np.testing.assert_allclose(haversine[1:], vincenty[1:], rtol=5e-3)
+
+    def test_destination_and_bearing_roundtrip(self):
+        lat2, lon2 = geodesy.destination_point([47.0, 47.0], [8.0, 8.0], [0.0, 90.0], [1000.0, 1000.0])
+        bearing = geodesy.initial_bearing(47.0, 8.0, lat2, lon2)
+        distance = geodesy.haversine_distance(47.0, 8.0, lat2, lon2)
+
+        np.testing.assert_allclose(bearing, [0.0, 90.0], atol=1e-6)
+        np.testing.assert_allclose(distance, [1000.0, 1000.0], rtol=1e-9)
+
+    def test_ned_roundtrip(self):
+        origin = (47.3977, 8.5456, 400.0)
+        waypoints = np.array([origin, (47.3986, 8.5456, 400.0), (47.3977, 8.5470, 450.0)])
+        ned = geodesy.global_to_ned(waypoints, origin)
+
+        np.testing.assert_allclose(ned[0], [0, 0, 0], atol=1e-6)
+        self.assertAlmostEqual(ned[1, 0], 100.0, delta=1.0)
+        self.assertAlmostEqual(ned[2, 2], -50.0, delta=0.1)
+        np.testing.assert_allclose(geodesy.ned_to_global(ned, origin), waypoints, atol=1e-7)
+
+    def test_validate_waypoints(self):
+        with self.assertRaises(ValueError):
+            geodesy.validate_waypoints([(47.0, 8.0, 10.0), (95.0, 8.0, 10.0)])
+        self.assertEqual(geodesy.validate_waypoints([(47.0, 8.0, 10.0)]).shape, (1, 3))
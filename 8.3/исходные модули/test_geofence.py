@@ -0,0 +1,126 @@
+import os
+import json
+import sys
+import tempfile
+import threading
+import unittest
+import numpy as np
+from geofence import Geofence, PolygonZone, CylinderZone, GeofenceViolation
+from geodesy import destination_point
+
+SQUARE = [(47.400, 8.540), (47.400, 8.550), (47.405, 8.550), (47.405, 8.540)]
+
+
+class TestGeofence(unittest.TestCase):
+
+    def setUp(self):
+        self.square = PolygonZone('square', SQUARE, max_alt=120)
+        self.tower = CylinderZone('tower', 47.390, 8.560, radius=100, min_alt=0, max_alt=50)
+        self.fence = Geofence([self.square, self.tower], cell_size=200)
+
+    def test_zones_at_point(self):
+        self.assertEqual(self.fence.zones_at(47.402, 8.545, 50), [self.square])
+        self.assertEqual(self.fence.zones_at(47.402, 8.545, 150), [])
+        self.assertEqual(self.fence.zones_at(47.3905, 8.560, 20), [self.tower])
+        self.assertEqual(self.fence.zones_at(47.395, 8.545, 20), [])
+
+    def test_segment_crossing_polygon_with_endpoints_outside(self):
+        self.assertEqual(self.fence.check_segment((47.402, 8.530, 50), (47.402, 8.560, 50)), [self.square])
+        # Над зоной
+        self.assertEqual(self.fence.check_segment((47.402, 8.530, 130), (47.402, 8.560, 130)), [])
+        # Набор высоты: внутри зоны высота от ~33 до ~100 м
+        self.assertEqual(self.fence.check_segment((47.402, 8.530, 0), (47.402, 8.560, 200)), [self.square])
+        # Мимо зоны
+        self.assertEqual(self.fence.check_segment((47.396, 8.530, 50), (47.396, 8.560, 50)), [])
+
+    def test_segment_crossing_cylinder(self):
+        self.assertEqual(self.fence.check_segment((47.390, 8.550, 20), (47.390, 8.570, 20)), [self.tower])
+        self.assertEqual(self.fence.check_segment((47.390, 8.550, 60), (47.390, 8.570, 60)), [])
+
+    def test_validate_mission_reports_legs(self):
+        waypoints = [(47.396, 8.530, 50), (47.402, 8.530, 50), (47.402, 8.560, 50), (47.390, 8.570, 20),
+                     (47.390, 8.550, 20)]
+
+        violations = self.fence.validate_mission(waypoints)
+
+        self.assertEqual(violations, [GeofenceViolation(1, self.square), GeofenceViolation(3, self.tower)])
+        with self.assertRaises(ValueError):
+            self.fence.require_clear(waypoints)
+        self.fence.require_clear(waypoints[:2])
+
+    def test_index_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        zones = []
+        for i in range(300):
+            lat, lon = 47.35 + rng.random() * 0.1, 8.50 + rng.random() * 0.1
+            if i % 3:
+                size = 50 + rng.random() * 300
+                lats, lons = destination_point(lat, lon, [0, 90, 180, 270, 45], [size, size, size, size, size * 1.5])
+                zones.append(PolygonZone(f"p{i}", list(zip(lats, lons)), max_alt=100))
+            else:
+                zones.append(CylinderZone(f"c{i}", lat, lon, 30 + rng.random() * 200, max_alt=100))
+        indexed = Geofence(zones, cell_size=150)
+        brute = Geofence(zones, cell_size=1e7)  # одна ячейка: проверяются все зоны
+
+        for _ in range(200):
+            a = (47.35 + rng.random() * 0.1, 8.50 + rng.random() * 0.1, 50.0)
+            b = (47.35 + rng.random() * 0.1, 8.50 + rng.random() * 0.1, 50.0)
+            self.assertEqual(indexed.check_segment(a, b), brute.check_segment(a, b))
+            self.assertEqual(indexed.zones_at(*a), brute.zones_at(*a))
+
+    def test_add_while_checking_from_another_thread(self):
+        errors, results = [], set()
+        done = threading.Event()
+
+        def monitor():
+            while not done.is_set():
+                try:
+                    results.add(tuple(zone.name for zone in self.fence.zones_at(47.402, 8.545, 50)))
+                except Exception as e:
+                    errors.append(e)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # частые переключения потоков посреди перестроения индекса
+        thread = threading.Thread(target=monitor)
+        thread.start()
+        try:
+            for i in range(200):
+                # Каждая новая зона сдвигает центр проекции и перестраивает сетку
+                self.fence.add(CylinderZone(f"far-{i}", 47.5 + i * 0.01, 8.7, radius=50))
+                self.assertEqual(self.fence.check_segment((47.402, 8.530, 50), (47.402, 8.560, 50)),
+                                 [self.square])
+        finally:
+            done.set()
+            thread.join()
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, {('square',)})
+
+    def test_from_geojson(self):
+        data = {'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'properties': {'name': 'park', 'max_alt': 60},
+             'geometry': {'type': 'Polygon', 'coordinates': [[[lon, lat] for lat, lon in SQUARE + SQUARE[:1]]]}},
+            {'type': 'Feature', 'properties': {'name': 'heliport', 'radius': 150},
+             'geometry': {'type': 'Point', 'coordinates': [8.560, 47.390]}},
+        ]}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'zones.geojson')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            fence = Geofence.from_geojson(path)
+
+        self.assertEqual([z.name for z in fence.zones], ['park', 'heliport'])
+        self.assertEqual(fence.zones[0].max_alt, 60)
+        self.assertEqual(len(fence.zones[0].vertices), 4)
+        self.assertEqual([z.name for z in fence.zones_at(47.3905, 8.5605, 500)], ['heliport'])
+
+    def test_invalid_zones(self):
+        with self.assertRaises(ValueError):
+            PolygonZone('line', [(47.0, 8.0), (47.1, 8.1)])
+        with self.assertRaises(ValueError):
+            CylinderZone('dot', 47.0, 8.0, radius=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
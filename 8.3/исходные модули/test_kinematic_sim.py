@@ -0,0 +1,68 @@
+import pickle
+import unittest
+import numpy as np
+from kinematic_sim import VehicleModel, simulate_mission, simulate_many, rank_missions
+
+HOME = (47.0, 8.0)
+
+
+class TestKinematicSim(unittest.TestCase):
+
+    def setUp(self):
+        self.model = VehicleModel(cruise_speed=5.0, climb_rate=2.0, descent_rate=1.0, land_speed=0.5,
+                                  acceleration=2.5, vertical_acceleration=1.0, hover_power=180.0,
+                                  cruise_power=0.0, mass=1.5, climb_efficiency=0.5, battery_capacity=60.0)
+
+    def test_legs_and_trapezoidal_profile(self):
+        # Точка над стартом на 10 м: взлёт, нулевой перелёт, возврат, посадка
+        estimate = simulate_mission([(47.0, 8.0, 10)], HOME, self.model)
+        self.assertEqual(len(estimate.leg_time), 4)
+        # Взлёт 10 м при 2 м/с и 1 м/с²: 10 / 2 + 2 / 1
+        self.assertAlmostEqual(estimate.leg_time[0], 7.0)
+        # Посадка 10 м при 0.5 м/с: 10 / 0.5 + 0.5 / 1
+        self.assertAlmostEqual(estimate.leg_time[-1], 20.5)
+        self.assertAlmostEqual(estimate.total_distance, 20.0)
+
+    def test_short_leg_never_reaches_cruise(self):
+        estimate = simulate_mission([(47.0, 8.0, 10), (47.0 + 2 / 111195, 8.0, 10)], HOME, self.model)
+        self.assertAlmostEqual(estimate.leg_time[2], 2 * np.sqrt(2 / 2.5), places=3)
+
+    def test_energy_includes_hover_and_climb(self):
+        estimate = simulate_mission([(47.0, 8.0, 10)], HOME, self.model)
+        climb = 1.5 * 9.80665 * 10 / 0.5 / 3600
+        self.assertAlmostEqual(estimate.leg_energy[0], 180.0 * 7.0 / 3600 + climb)
+        self.assertAlmostEqual(estimate.battery_end, 100 - 100 * estimate.total_energy / 60.0)
+
+    def test_headwind_slows_and_crosswind_above_cruise_is_infeasible(self):
+        waypoints = [(47.0, 8.0, 10), (47.01, 8.0, 10)]
+        calm = simulate_mission(waypoints, HOME, self.model)
+        headwind = simulate_mission(waypoints, HOME, self.model, wind=(3.0, 0.0))
+        self.assertGreater(headwind.leg_time[2], calm.leg_time[2])
+        self.assertLess(headwind.leg_time[3], calm.leg_time[3])
+        storm = simulate_mission(waypoints, HOME, self.model, wind=(6.0, 90.0))
+        self.assertFalse(storm.feasible)
+
+    def test_battery_reserve(self):
+        waypoints = [(47.0, 8.0, 10), (47.01, 8.0, 10)]
+        self.assertTrue(simulate_mission(waypoints, HOME, self.model, battery=100).feasible)
+        self.assertFalse(simulate_mission(waypoints, HOME, self.model, battery=30).feasible)
+
+    def test_simulate_many_in_pool_matches_serial_and_ranks(self):
+        candidates = [[(47.0, 8.0, 10), (47.0 + 0.001 * k, 8.0, 10)] for k in range(1, 9)]
+        candidates.append([(47.0, 8.0, 10), (47.3, 8.0, 10)])
+        serial = simulate_many(candidates, HOME, self.model, processes=1)
+        pooled = simulate_many(candidates, HOME, self.model, processes=2, chunk_size=3)
+        self.assertEqual([e.total_time for e in serial], [e.total_time for e in pooled])
+        self.assertEqual(rank_missions(serial), list(range(8)))
+        restored = pickle.loads(pickle.dumps(serial[0]))
+        self.assertEqual(restored.total_energy, serial[0].total_energy)
+
+    def test_invalid_model(self):
+        with self.assertRaises(ValueError):
+            VehicleModel(cruise_speed=0)
+        with self.assertRaises(ValueError):
+            VehicleModel(reserve=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import MagicMock
+from mavlink_receiver import MavlinkReceiver
+
+
+def make_msg(msg_type, **fields):
+    msg = MagicMock(**fields)
+    msg.get_type.return_value = msg_type
+    return msg
+
+
+class TestMavlinkReceiver(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_master = MagicMock()
+        self.mock_master.recv_match.return_value = None
+        self.receiver = MavlinkReceiver(self.mock_master, poll_timeout=0.01)
+
+    def tearDown(self):
+        self.receiver.stop()
+
+    def test_dispatch_keeps_latest_per_type(self):
+        first = make_msg('VFR_HUD', groundspeed=1.0)
+        second = make_msg('VFR_HUD', groundspeed=2.0)
+        status = make_msg('SYS_STATUS', battery_remaining=80)
+        for msg in (first, second, status):
+            self.receiver.dispatch(msg)
+
+        self.assertIs(self.receiver.latest('VFR_HUD'), second)
+        self.assertEqual(self.receiver.snapshot(['SYS_STATUS', 'ATTITUDE']), {'SYS_STATUS': status})
+        self.assertIsNone(self.receiver.latest('ATTITUDE'))
+
+    def test_poll_ignores_bad_data(self):
+        self.mock_master.recv_match.return_value = make_msg('BAD_DATA')
+        self.assertIsNone(self.receiver.poll(0.01))
+        self.assertEqual(self.receiver.snapshot(), {})
+
+    def test_subscription_pumps_connection_without_thread(self):
+        ack = make_msg('COMMAND_ACK', command=22)
+        self.mock_master.recv_match.side_effect = [make_msg('HEARTBEAT'), ack]
+        with self.receiver.subscribe(['COMMAND_ACK']) as sub:
+            self.assertIs(sub.get(1), ack)
+        self.assertIsNotNone(self.receiver.latest('HEARTBEAT'))
+
+    def test_background_thread_drains_connection(self):
+        position = make_msg('GLOBAL_POSITION_INT')
+        self.mock_master.recv_match.side_effect = lambda **kwargs: position
+        with self.receiver.subscribe(['GLOBAL_POSITION_INT']) as sub:
+            self.receiver.start()
+            self.assertTrue(self.receiver.running)
+            self.assertIs(sub.get(1), position)
+        self.receiver.stop()
+        self.assertFalse(self.receiver.running)
@@ -0,0 +1,68 @@
+import unittest
+import urllib.request
+from metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_with_labels(self):
+        counter = self.registry.counter('messages_total', 'Сообщения')
+        counter.inc(type='HEARTBEAT')
+        counter.inc(2, type='ATTITUDE')
+        counter.inc(type='HEARTBEAT')
+
+        self.assertEqual(counter.value(type='HEARTBEAT'), 2)
+        self.assertEqual(counter.value(type='ATTITUDE'), 2)
+        self.assertIs(self.registry.counter('messages_total', 'Сообщения'), counter)
+        with self.assertRaises(ValueError):
+            counter.inc(-1)
+        with self.assertRaises(ValueError):
+            self.registry.gauge('messages_total', 'Сообщения')
+
+    def test_function_metrics_are_read_on_collect(self):
+        state = {'lost': 3}
+        self.registry.counter('lost_total', 'Потери', lambda: state['lost'])
+        state['lost'] = 5
+
+        self.assertEqual(self.registry.collect()['lost_total'], {(): 5.0})
+
+    def test_histogram_buckets(self):
+        histogram = self.registry.histogram('latency_seconds', 'Задержка', buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, command='LAND')
+
+        summary = histogram.summary(command='LAND')
+
+        self.assertEqual(summary['count'], 4)
+        self.assertAlmostEqual(summary['sum'], 3.65)
+        self.assertEqual(summary['buckets'], {0.1: 2, 1.0: 3, float('inf'): 4})
+
+    def test_render_text_format(self):
+        self.registry.counter('messages_total', 'Сообщения').inc(type='VFR_HUD')
+        self.registry.histogram('latency_seconds', 'Задержка', buckets=(0.1,)).observe(0.05)
+
+        text = self.registry.render()
+
+        self.assertIn('# TYPE messages_total counter', text)
+        self.assertIn('messages_total{type="VFR_HUD"} 1.0', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn('latency_seconds_count 1', text)
+
+    def test_serve_over_http(self):
+        self.registry.gauge('backlog', 'Очередь').set(7)
+        host, port = self.registry.serve(port=0)
+        try:
+            with urllib.request.urlopen(f'http://{host}:{port}/metrics', timeout=5) as response:
+                body = response.read().decode('utf-8')
+        finally:
+            self.registry.stop_serving()
+
+        self.assertIn('backlog 7.0', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
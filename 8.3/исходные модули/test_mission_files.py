@@ -0,0 +1,125 @@
+import json
+import math
+import os
+import tempfile
+import unittest
+from mission_files import (MissionItem, MissionFile, ItemWindow, read_wpl, write_wpl, read_plan, write_plan,
+                           write_mission, detect_format)
+
+WPL = """QGC WPL 110
+0\t1\t0\t16\t0\t0\t0\t0\t47.397742\t8.545594\t488.000000\t1
+1\t0\t3\t22\t0.00000000\t0.00000000\t0.00000000\t0.00000000\t47.39780000\t8.54560000\t20.000000\t1
+2\t0\t3\t16\t2.00000000\t0.00000000\t0.00000000\tnan\t47.39800000\t8.54580000\t25.000000\t1
+
+3\t0\t2\t178\t1.00000000\t12.00000000\t-1.00000000\t0.00000000\t0.00000000\t0.00000000\t0.000000\t1
+"""
+
+
+class TestMissionFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name, content=None):
+        path = os.path.join(self.tmp.name, name)
+        if content is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        return path
+
+    def test_read_wpl(self):
+        items = list(read_wpl(self.path('m.waypoints', WPL)))
+        self.assertEqual(len(items), 4)
+        self.assertEqual(items[0].frame, 0)
+        self.assertEqual(items[1].command, 22)
+        self.assertEqual(items[2].waypoint, (47.398, 8.5458, 25.0))
+        self.assertTrue(math.isnan(items[2].params[3]))
+        self.assertFalse(items[3].has_position)
+
+    def test_read_wpl_invalid(self):
+        with self.assertRaises(ValueError):
+            list(read_wpl(self.path('bad.txt', "hello\n")))
+        with self.assertRaises(ValueError):
+            list(read_wpl(self.path('short.txt', "QGC WPL 110\n0\t1\t0\t16\n")))
+
+    def test_wpl_round_trip(self):
+        items = list(read_wpl(self.path('m.waypoints', WPL)))
+        out = self.path('out.waypoints')
+        self.assertEqual(write_wpl(out, iter(items)), 4)
+        self.assertEqual(list(read_wpl(out)), items)
+
+    def test_plan_round_trip_with_small_chunks(self):
+        items = list(read_wpl(self.path('m.waypoints', WPL)))
+        out = self.path('out.plan')
+        self.assertEqual(write_plan(out, iter(items)), 4)
+        with open(out, encoding='utf-8') as f:
+            plan = json.load(f)
+        self.assertEqual(plan['mission']['plannedHomePosition'], [47.397742, 8.545594, 488.0])
+        self.assertIsNone(plan['mission']['items'][2]['params'][3])
+        for chunk_size in (1, 7, 65536):
+            self.assertEqual(list(read_plan(out, chunk_size=chunk_size)), items)
+
+    def test_read_plan_expands_complex_items(self):
+        plan = {
+            'fileType': 'Plan',
+            'geoFence': {'polygons': [{'polygon': [[47.0, 8.0], [47.1, 8.0], [47.1, 8.1]]}]},
+            'mission': {
+                'items': [
+                    {'type': 'SimpleItem', 'command': 22, 'frame': 3, 'params': [0, 0, 0, None, 47.0, 8.0, 30]},
+                    {'type': 'ComplexItem', 'complexItemType': 'survey', 'TransectStyleComplexItem': {'Items': [
+                        {'type': 'SimpleItem', 'command': 16, 'frame': 3, 'params': [0, 0, 0, 0, 47.1, 8.1, 30]},
+                        {'type': 'SimpleItem', 'command': 16, 'frame': 3, 'params': [0, 0, 0, 0, 47.2, 8.2, 30]},
+                    ]}},
+                ],
+                'plannedHomePosition': [47.0, 8.0, 488],
+            },
+            'version': 1,
+        }
+        path = self.path('survey.plan', json.dumps(plan))
+        items = list(read_plan(path, chunk_size=16))
+        self.assertEqual([item.waypoint for item in items],
+                         [(47.0, 8.0, 30.0), (47.1, 8.1, 30.0), (47.2, 8.2, 30.0)])
+
+        plan['fileType'] = 'GeoFence'
+        with self.assertRaises(ValueError):
+            list(read_plan(self.path('fence.plan', json.dumps(plan))))
+
+    def test_truncated_plan(self):
+        out = self.path('out.plan')
+        write_plan(out, [(47.0, 8.0, 10.0), (47.1, 8.1, 10.0)])
+        with open(out, encoding='utf-8') as f:
+            content = f.read()
+        with self.assertRaises(ValueError):
+            list(read_plan(self.path('cut.plan', content[:len(content) // 2])))
+
+    def test_mission_file_detects_format_and_counts(self):
+        wpl = self.path('m.txt', WPL)
+        plan = self.path('m.json')
+        write_mission(plan + '.plan', read_wpl(wpl))
+        self.assertEqual(detect_format(wpl), 'wpl')
+        self.assertEqual(detect_format(plan + '.plan'), 'plan')
+        mission = MissionFile(plan + '.plan')
+        self.assertEqual(len(mission), 4)
+        self.assertEqual(list(mission), list(MissionFile(wpl)))
+
+    def test_item_window(self):
+        window = ItemWindow(iter(range(10)), size=3)
+        self.assertEqual(window[0], 0)
+        self.assertEqual(window[4], 4)
+        self.assertEqual(window[2], 2)
+        with self.assertRaises(IndexError):
+            window[1]
+        with self.assertRaises(IndexError):
+            window[10]
+
+    def test_coerce_tuple(self):
+        item = MissionItem.coerce((47.0, 8.0, 10))
+        self.assertEqual((item.command, item.frame, item.waypoint), (16, 3, (47.0, 8.0, 10.0)))
+        self.assertIs(MissionItem.coerce(item), item)
+
+
+if __name__ == '__main__':
+    unittest.main()
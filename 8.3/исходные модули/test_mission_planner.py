@@ -1,6 +1,14 @@
 import unittest
 from unittest.mock import MagicMock, patch
+import os
+import tempfile
+import numpy as np
 from mission_planner import MissionPlanner
+from uav_control import UAVControl
+from test_mavlink_receiver import make_msg
+from tracing import Tracer
+from geofence import Geofence, CylinderZone
+from mission_files import MissionItem, write_wpl, read_plan
 
 
 class TestMissionPlanner(unittest.TestCase):
@@ -8,14 +16,15 @@ class TestMissionPlanner(unittest.TestCase):
     @patch('mission_planner.UAVControl')
     def setUp(self, mock_uav_control):
         self.mock_uav = MagicMock()
+        self.mock_uav.receiver.latest.return_value = None
         mock_uav_control.return_value = self.mock_uav
         self.mission_planner = MissionPlanner("tcp:127.0.0.1:5760")
 
     def test_execute_mission_success(self):
         waypoints = [(47.3977, 8.5456, 10), (47.3980, 8.5460, 20)]
-        self.mock_uav.get_telemetry.side_effect = [
-            {'lat': 47.3977, 'lon': 8.5456, 'alt': 10},
-            {'lat': 47.3980, 'lon': 8.5460, 'alt': 20}
+        self.mock_uav.receiver.latest.side_effect = [
+            make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, relative_alt=10000),
+            make_msg('GLOBAL_POSITION_INT', lat=473980000, lon=85460000, relative_alt=20000),
         ]
 
         self.mission_planner.execute_mission(waypoints)
@@ -27,10 +36,76 @@ class TestMissionPlanner(unittest.TestCase):
         self.mock_uav.goto.assert_any_call(47.3980, 8.5460, 20)
         self.mock_uav.set_mode.assert_any_call('RTL')
         self.mock_uav.disarm.assert_called_once()
+        self.mock_uav.wait_arrival.assert_any_call(47.3980, 8.5460, 20, acceptance_radius=2.0, timeout=10.0)
+
+    @patch('mission_planner.time.sleep')
+    def test_execute_mission_traces_phases(self, mock_sleep):
+        waypoints = [(47.3977, 8.5456, 10), (47.3980, 8.5460, 20)]
+        self.mock_uav.get_telemetry.return_value = {'lat': 47.3977, 'lon': 8.5456, 'alt': 10}
+        self.mock_uav.tracer = Tracer()
+
+        self.mission_planner.execute_mission(waypoints)
+
+        spans = self.mock_uav.tracer.spans()
+        mission = spans[-1]
+        self.assertEqual(mission.name, 'MissionPlanner.execute_mission')
+        self.assertEqual([s.name for s in spans if s.parent_id == mission.span_id],
+                         ['mission.climb', 'mission.leg', 'mission.leg', 'mission.return'])
+        self.assertEqual([s.attributes['index'] for s in spans if s.name == 'mission.leg'], [0, 1])
+
+    def test_execute_mission_rejects_leg_through_no_fly_zone(self):
+        self.mission_planner.geofence = Geofence([CylinderZone('stadium', 47.3978, 8.5458, radius=10)])
+        waypoints = [(47.3977, 8.5456, 10), (47.3980, 8.5460, 20)]
+
+        with self.assertRaises(ValueError):
+            self.mission_planner.execute_mission(waypoints)
+        self.mock_uav.arm.assert_not_called()
+
+    def test_terrain_mission_converts_agl_from_current_position(self):
+        terrain = MagicMock()
+        terrain.elevation.side_effect = lambda lat, lon: np.asarray(lat, dtype=float) * 0 + 400.0
+        self.mission_planner.terrain = terrain
+        self.mock_uav.get_telemetry.return_value = {'lat': 47.3977, 'lon': 8.5456}
+        self.mock_uav.get_telemetry.side_effect = None
+
+        waypoints = self.mission_planner.terrain_mission([(47.3980, 8.5460, 30.0)], min_clearance=20)
+
+        self.assertEqual(waypoints, [(47.3980, 8.5460, 30.0)])
+        with self.assertRaises(ValueError):
+            self.mission_planner.terrain_mission([(47.3980, 8.5460, 10.0)], min_clearance=20)
+
+    @patch('mission_planner.time.sleep')
+    @patch('uav_control.mavutil.mavlink_connection')
+    def test_execute_mission_leg_ignores_stored_mission_progress(self, mock_connection, mock_sleep):
+        master = MagicMock()
+        master.target_system = 1
+        mock_connection.return_value = master
+        uav = UAVControl("tcp:127.0.0.1:5760")
+        # В GUIDED автопилот продолжает сообщать номер пункта сохранённой миссии AUTO
+        # (на ArduPilot пункт 0 — home): эти сообщения не должны завершать участок
+        far = make_msg('GLOBAL_POSITION_INT', lat=470000000, lon=80000000, relative_alt=10000)
+        messages = [
+            far, make_msg('MISSION_CURRENT', seq=3), make_msg('MISSION_ITEM_REACHED', seq=0),
+            make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, relative_alt=10000),
+            make_msg('MISSION_CURRENT', seq=5), far,
+            make_msg('GLOBAL_POSITION_INT', lat=473980000, lon=85460000, relative_alt=20000),
+        ]
+        for msg in messages:
+            msg.get_srcSystem.return_value = 1
+        master.recv_match.side_effect = messages
+        self.mock_uav.wait_arrival.side_effect = uav.wait_arrival
+
+        self.mission_planner.execute_mission([(47.3977, 8.5456, 10), (47.3980, 8.5460, 20)])
+
+        # Оба участка завершились только по позиции: прочитаны все сообщения
+        self.assertEqual(master.recv_match.call_count, len(messages))
+        self.assertEqual(self.mock_uav.wait_arrival.call_count, 2)
+        self.mock_uav.set_mode.assert_any_call('RTL')
 
     def test_execute_mission_fail_reach_waypoint(self):
         waypoints = [(47.3977, 8.5456, 10), (47.3980, 8.5460, 20)]
         self.mock_uav.get_telemetry.return_value = {'lat': 47.3977, 'lon': 8.5456, 'alt': 10}
+        self.mock_uav.wait_arrival.side_effect = [True, False]
 
         with self.assertRaises(Exception):
             self.mission_planner.execute_mission(waypoints)
@@ -40,3 +115,104 @@ class TestMissionPlanner(unittest.TestCase):
         self.mock_uav.takeoff.assert_called_once_with(10)
         self.mock_uav.goto.assert_any_call(47.3977, 8.5456, 10)
         self.mock_uav.disarm.assert_called_once()
+
+    def test_upload_mission_starts_auto(self):
+        waypoints = [(47.3977, 8.5456, 10), (47.3980, 8.5460, 20)]
+
+        self.mission_planner.upload_mission(waypoints)
+
+        self.mock_uav.upload_mission.assert_called_once_with(waypoints)
+        self.mock_uav.arm.assert_called_once()
+        self.mock_uav.start_mission.assert_called_once()
+
+    def test_leg_timeout_scales_with_distance(self):
+        self.mock_uav.receiver.latest.return_value = make_msg(
+            'GLOBAL_POSITION_INT', lat=473977000, lon=85456000, relative_alt=10000)
+        # ~1 км к северу при крейсерской скорости 5 м/с и двукратном запасе
+        timeout = self.mission_planner._leg_timeout((47.4067, 8.5456, 10))
+        self.assertAlmostEqual(timeout, 400, delta=5)
+        self.mock_uav.get_telemetry.assert_not_called()
+
+    def test_leg_timeout_from_previous_waypoint_without_position(self):
+        timeout = self.mission_planner._leg_timeout((47.4067, 8.5456, 10), previous=(47.3977, 8.5456, 10))
+        self.assertAlmostEqual(timeout, 400, delta=5)
+        self.assertEqual(self.mission_planner._leg_timeout((47.4067, 8.5456, 10)), 60)
+        self.mock_uav.get_telemetry.assert_not_called()
+
+    def test_execute_mission_per_waypoint_radius(self):
+        waypoints = [(47.3977, 8.5456, 10), (47.3980, 8.5460, 20)]
+        self.mock_uav.get_telemetry.return_value = None
+
+        self.mission_planner.execute_mission(waypoints, acceptance_radius=[1.0, 5.0])
+
+        radii = [call.kwargs['acceptance_radius'] for call in self.mock_uav.wait_arrival.call_args_list]
+        self.assertEqual(radii, [1.0, 5.0])
+
+    def test_mission_length(self):
+        waypoints = [(47.3977, 8.5456, 10), (47.4067, 8.5456, 10), (47.4067, 8.5456, 40)]
+        self.assertAlmostEqual(MissionPlanner.mission_length(waypoints), 1000.8 + 30, delta=1)
+
+    def test_upload_mission_optimized(self):
+        waypoints = [(47.0, 8.0, 10), (47.004, 8.0, 10), (47.001, 8.0, 10), (47.002, 8.0, 10)]
+
+        self.mission_planner.upload_mission(waypoints, start=False, optimize=True)
+
+        self.mock_uav.upload_mission.assert_called_once_with(
+            [(47.0, 8.0, 10), (47.001, 8.0, 10), (47.002, 8.0, 10), (47.004, 8.0, 10)])
+        self.mock_uav.start_mission.assert_not_called()
+
+    def test_survey_mission_plugs_into_execution(self):
+        square = [(47.0, 8.0), (47.0, 8.002), (47.002, 8.002), (47.002, 8.0)]
+        waypoints = self.mission_planner.survey_mission(square, 30, (60, 40), side_overlap=0.5)
+        array = self.mission_planner.survey_mission(square, 30, (60, 40), side_overlap=0.5, as_array=True)
+        self.assertIsInstance(waypoints[0], tuple)
+        np.testing.assert_allclose(array, waypoints)
+
+        self.mission_planner.upload_mission(array, start=False)
+        self.assertEqual(self.mock_uav.upload_mission.call_args.args[0].shape, (len(waypoints), 3))
+
+    def test_estimate_mission_uses_telemetry_home_and_battery(self):
+        self.mock_uav.get_telemetry.return_value = {'lat': 47.0, 'lon': 8.0, 'battery': 25}
+        waypoints = [(47.0, 8.0, 10), (47.05, 8.0, 10)]
+
+        estimate = self.mission_planner.estimate_mission(waypoints)
+
+        self.assertEqual(estimate.battery_start, 25.0)
+        self.assertFalse(estimate.feasible)
+        self.assertGreater(estimate.total_time, 2 * 5560 / self.mission_planner.cruise_speed)
+
+    def test_rank_missions(self):
+        candidates = [[(47.0, 8.0, 10), (47.005, 8.0, 10)], [(47.0, 8.0, 10), (47.0025, 8.0, 10)]]
+        ranked = self.mission_planner.rank_missions(candidates, home=(47.0, 8.0), battery=100, processes=1)
+        self.assertEqual([index for index, _ in ranked], [1, 0])
+        self.mock_uav.get_telemetry.assert_not_called()
+
+    def test_upload_mission_file_streams_items(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'survey.waypoints')
+            write_wpl(path, [(47.0, 8.0, 10), (47.001, 8.0, 10), (47.002, 8.0, 10)])
+
+            self.assertEqual(self.mission_planner.upload_mission_file(path, start=False), 3)
+
+        args, kwargs = self.mock_uav.upload_mission.call_args
+        self.assertEqual(kwargs['count'], 3)
+        self.assertNotIsInstance(args[0], list)
+        self.mock_uav.arm.assert_not_called()
+
+    def test_upload_mission_file_rejects_no_fly_zone(self):
+        self.mission_planner.geofence = Geofence([CylinderZone('stadium', 47.0015, 8.0, radius=10)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'survey.waypoints')
+            write_wpl(path, [MissionItem(47.0, 8.0, 488, frame=0), (47.001, 8.0, 10), (47.002, 8.0, 10)])
+
+            with self.assertRaisesRegex(ValueError, 'пункт 2: stadium'):
+                self.mission_planner.upload_mission_file(path)
+        self.mock_uav.upload_mission.assert_not_called()
+
+    def test_download_mission_file(self):
+        self.mock_uav.download_mission.return_value = iter([MissionItem(47.0, 8.0, 10), MissionItem(47.1, 8.1, 20)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'mission.plan')
+
+            self.assertEqual(self.mission_planner.download_mission_file(path), 2)
+            self.assertEqual([item.waypoint for item in read_plan(path)], [(47.0, 8.0, 10.0), (47.1, 8.1, 20.0)])
@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from geodesy import global_to_ned
+from route_optimizer import optimize_order, optimize_route, route_cost
+
+
+class TestRouteOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.waypoints = np.column_stack((47.0 + rng.random(200) * 0.02,
+                                          8.0 + rng.random(200) * 0.02,
+                                          20.0 + rng.random(200) * 30.0))
+        self.points = global_to_ned(self.waypoints, tuple(self.waypoints[0]))
+
+    def test_order_is_permutation_with_fixed_start(self):
+        order = optimize_order(self.waypoints, time_budget=0.5)
+        self.assertEqual(order[0], 0)
+        self.assertEqual(sorted(order.tolist()), list(range(200)))
+
+    def test_improves_on_given_order(self):
+        order = optimize_order(self.waypoints, time_budget=0.5)
+        self.assertLess(route_cost(self.points, order), 0.3 * route_cost(self.points, np.arange(200)))
+
+    def test_points_on_a_line_are_sorted(self):
+        lats = [47.0, 47.004, 47.001, 47.003, 47.002, 47.005]
+        route = optimize_route([(lat, 8.0, 10.0) for lat in lats], time_budget=0.5)
+        self.assertEqual([p[0] for p in route], sorted(lats))
+
+    def test_closed_route(self):
+        order = optimize_order(self.waypoints, time_budget=0.5, return_to_start=True)
+        self.assertEqual(order[0], 0)
+        self.assertEqual(len(set(order.tolist())), 200)
@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from pymavlink import mavutil
+from selective_decode import SelectiveDecoder, message_ids
+from mavlink_receiver import MavlinkReceiver
+
+
+def encode_stream():
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    frames = [
+        mav.heartbeat_encode(2, 3, 0, 4, 4).pack(mav),
+        mav.attitude_encode(0, 0.1, 0.2, 0.3, 0, 0, 0).pack(mav),
+        mav.global_position_int_encode(0, 473977420, 85455940, 488000, 10000, 0, 0, 0, 0).pack(mav),
+        mav.vfr_hud_encode(5.0, 5.0, 90, 50, 498.0, 0.0).pack(mav),
+    ]
+    return frames
+
+
+class FakeLink:
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.mav = mavutil.mavlink.MAVLink(None)
+        self.post_message = MagicMock()
+
+    def recv(self, n=None):
+        return self.chunks.pop(0) if self.chunks else b''
+
+    def select(self, timeout):
+        return False
+
+
+class TestSelectiveDecoder(unittest.TestCase):
+
+    def decode_all(self, decoder):
+        messages = []
+        while True:
+            msg = decoder.recv_msg()
+            if msg is None:
+                return messages
+            messages.append(msg.get_type())
+
+    def test_decodes_only_wanted_types(self):
+        link = FakeLink([b''.join(encode_stream())])
+        decoder = SelectiveDecoder(link, lambda: message_ids(['GLOBAL_POSITION_INT']))
+
+        self.assertEqual(self.decode_all(decoder), ['HEARTBEAT', 'GLOBAL_POSITION_INT'])
+        self.assertEqual(decoder.skipped, 2)
+        self.assertEqual(link.post_message.call_count, 2)
+
+    def test_frames_split_across_reads(self):
+        data = b''.join(encode_stream())
+        link = FakeLink([data[i:i + 7] for i in range(0, len(data), 7)])
+        decoder = SelectiveDecoder(link, lambda: None)
+
+        messages = []
+        while link.chunks or messages == []:
+            msg = decoder.recv_msg()
+            if msg is not None:
+                messages.append(msg.get_type())
+        messages += self.decode_all(decoder)
+        self.assertEqual(messages, ['HEARTBEAT', 'ATTITUDE', 'GLOBAL_POSITION_INT', 'VFR_HUD'])
+
+    def test_skipped_frames_keep_loss_counters(self):
+        mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+        frames = []
+        for seq in range(4):
+            mav.seq = seq
+            frames.append(mav.attitude_encode(0, 0.1, 0.2, 0.3, 0, 0, 0).pack(mav))
+        link = FakeLink([b''.join(frames[:2] + frames[3:])])  # кадр с номером 2 потерян
+        link.last_seq, link.mav_loss, link.mav_count = {}, 0, 0
+        decoder = SelectiveDecoder(link, lambda: message_ids(['VFR_HUD']))
+
+        self.assertEqual(self.decode_all(decoder), [])
+        self.assertEqual(link.mav_loss, 1)
+        self.assertEqual(link.mav_count, 3)
+
+    def test_corrupted_frame_is_dropped(self):
+        frames = encode_stream()
+        corrupted = bytearray(frames[2])
+        corrupted[-1] ^= 0xFF
+        link = FakeLink([b'\x00\x01' + frames[1] + bytes(corrupted) + frames[3]])
+        decoder = SelectiveDecoder(link, lambda: message_ids(['GLOBAL_POSITION_INT', 'VFR_HUD']))
+
+        self.assertEqual(self.decode_all(decoder), ['VFR_HUD'])
+        self.assertEqual(decoder.bad_frames, 1)
+
+    def test_stray_start_byte_does_not_swallow_frames(self):
+        frames = encode_stream()
+        # Байт 0xFE внутри чужих данных похож на заголовок ATTITUDE длиной 40 байт
+        stray = bytes([0xFE, 40, 0, 1, 1, mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE])
+        link = FakeLink([stray + frames[0] + frames[2]])
+        decoder = SelectiveDecoder(link, lambda: message_ids(['GLOBAL_POSITION_INT']))
+
+        self.assertEqual(self.decode_all(decoder), ['HEARTBEAT', 'GLOBAL_POSITION_INT'])
+        self.assertEqual(decoder.skipped, 0)
+        self.assertEqual(decoder.bad_frames, 1)
+
+    def test_skip_crc_without_native_extension(self):
+        frames = encode_stream()
+        corrupted = bytearray(frames[1])
+        corrupted[-1] ^= 0xFF
+        link = FakeLink([b''.join(frames) + bytes(corrupted) + frames[3]])
+        decoder = SelectiveDecoder(link, lambda: message_ids(['GLOBAL_POSITION_INT']))
+
+        with patch('selective_decode._native_crc', None):
+            self.assertEqual(self.decode_all(decoder), ['HEARTBEAT', 'GLOBAL_POSITION_INT'])
+        self.assertEqual(decoder.skipped, 3)
+        self.assertEqual(decoder.bad_frames, 1)
+
+    def test_receiver_wanted_types_follow_consumers(self):
+        receiver = MavlinkReceiver(MagicMock(), selective_decode=True)
+        receiver.want(['VFR_HUD'])
+        receiver.add_listener(MagicMock(), ['COMMAND_ACK'])
+        receiver.add_listener(MagicMock())
+        self.assertEqual(receiver.wanted_ids(), message_ids(['VFR_HUD', 'COMMAND_ACK']))
+
+        with receiver.subscribe(['ATTITUDE']):
+            self.assertIn(mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE, receiver.wanted_ids())
+            with receiver.subscribe():
+                self.assertIsNone(receiver.wanted_ids())
+        self.assertNotIn(mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE, receiver.wanted_ids())
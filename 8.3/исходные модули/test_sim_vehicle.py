@@ -0,0 +1,117 @@
+import os
+import socket
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from pymavlink import mavutil
+from sim_vehicle import SimulatedVehicle
+from uav_control import UAVControl
+from mission_files import MissionFile, write_wpl, write_plan
+from test_mavlink_receiver import make_msg
+
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def command(cmd, *params):
+    params = list(params) + [0] * (7 - len(params))
+    msg = make_msg('COMMAND_LONG', command=cmd, target_system=1, **{f'param{i + 1}': p for i, p in enumerate(params)})
+    msg.get_srcSystem.return_value = 255
+    msg.get_srcComponent.return_value = 0
+    return msg
+
+
+class TestSimulatedVehicle(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = SimulatedVehicle(cruise_speed=10.0, climb_rate=5.0)
+        self.sim._link = MagicMock()
+
+    def test_takeoff_requires_armed_guided(self):
+        self.sim.handle(command(mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, 0, 0, 0, 0, 0, 0, 10))
+        self.sim._link.mav.command_ack_send.assert_called_with(
+            mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, mavutil.mavlink.MAV_RESULT_FAILED)
+
+    def test_climbs_and_lands(self):
+        self.sim.handle(command(mavutil.mavlink.MAV_CMD_DO_SET_MODE, 1, self.sim.modes['GUIDED']))
+        self.sim.handle(command(mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM, 1))
+        self.sim.handle(command(mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, 0, 0, 0, 0, 0, 0, 10))
+        for _ in range(30):
+            self.sim.step(0.1)
+        self.assertAlmostEqual(self.sim.relative_alt, 10.0)
+
+        self.sim.handle(command(mavutil.mavlink.MAV_CMD_NAV_LAND))
+        for _ in range(30):
+            self.sim.step(0.1)
+        self.assertEqual(self.sim.mode, 'LAND')
+        self.assertFalse(self.sim.armed)
+
+    def test_position_target_in_guided_without_ack(self):
+        target = make_msg('SET_POSITION_TARGET_GLOBAL_INT', target_system=1, lat_int=473980000,
+                          lon_int=85460000, alt=20.0)
+        self.sim.handle(target)
+        self.assertIsNone(self.sim.guided_target)
+
+        self.sim.handle(command(mavutil.mavlink.MAV_CMD_DO_SET_MODE, 1, self.sim.modes['GUIDED']))
+        self.sim._link.reset_mock()
+        self.sim.handle(target)
+        self.assertEqual(self.sim.guided_target, (47.398, 8.546, 20.0))
+        self.sim._link.mav.command_ack_send.assert_not_called()
+
+    def test_unknown_command_unsupported(self):
+        self.sim.handle(command(mavutil.mavlink.MAV_CMD_DO_SET_SERVO))
+        self.sim._link.mav.command_ack_send.assert_called_with(
+            mavutil.mavlink.MAV_CMD_DO_SET_SERVO, mavutil.mavlink.MAV_RESULT_UNSUPPORTED)
+
+
+class TestSimulatedVehicleEndToEnd(unittest.TestCase):
+
+    def test_mission_over_udp(self):
+        port = free_udp_port()
+        waypoints = [(47.3978, 8.5456, 20), (47.3980, 8.5458, 20)]
+        with SimulatedVehicle(f'127.0.0.1:{port}', cruise_speed=30.0, climb_rate=20.0,
+                              rates={'GLOBAL_POSITION_INT': 50.0}) as sim:
+            uav = UAVControl(f'udpin:127.0.0.1:{port}', background_receiver=True)
+            try:
+                uav.arm()
+                uav.takeoff(10)
+                uav.upload_mission(waypoints)
+                uav.start_mission()
+                self.assertTrue(uav.wait_arrival(*waypoints[1], timeout=10, seq=1))
+                self.assertEqual(sim.mission, waypoints)
+            finally:
+                uav.close()
+
+    def test_guided_goto_over_udp(self):
+        port = free_udp_port()
+        target = (47.3980, 8.5458, 15)
+        with SimulatedVehicle(f'127.0.0.1:{port}', cruise_speed=30.0, climb_rate=20.0,
+                              rates={'GLOBAL_POSITION_INT': 50.0}) as sim:
+            uav = UAVControl(f'udpin:127.0.0.1:{port}', background_receiver=True)
+            try:
+                uav.arm()
+                uav.takeoff(10)
+                uav.goto(*target)
+                self.assertTrue(uav.wait_arrival(*target, timeout=10))
+                self.assertEqual(sim.mission, [])
+            finally:
+                uav.close()
+
+    def test_mission_file_round_trip_over_udp(self):
+        port = free_udp_port()
+        waypoints = [(round(47.3978 + i / 10000, 4), 8.5456, 20.0) for i in range(50)]
+        with tempfile.TemporaryDirectory() as tmp, SimulatedVehicle(f'127.0.0.1:{port}') as sim:
+            uav = UAVControl(f'udpin:127.0.0.1:{port}', background_receiver=True)
+            try:
+                write_plan(os.path.join(tmp, 'up.plan'), waypoints)
+                uav.upload_mission(MissionFile(os.path.join(tmp, 'up.plan')), window=4)
+                self.assertEqual(sim.mission, waypoints)
+
+                write_wpl(os.path.join(tmp, 'down.waypoints'), uav.download_mission())
+                self.assertEqual([item.waypoint for item in MissionFile(os.path.join(tmp, 'down.waypoints'))],
+                                 waypoints)
+            finally:
+                uav.close()
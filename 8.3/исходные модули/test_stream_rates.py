@@ -0,0 +1,61 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+from pymavlink import mavutil
+from mavlink_receiver import MavlinkReceiver
+from stream_rates import StreamRateManager, message_id
+from test_mavlink_receiver import make_msg
+
+SET_MESSAGE_INTERVAL = mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL
+POSITION_ID = mavutil.mavlink.MAVLINK_MSG_ID_GLOBAL_POSITION_INT
+
+
+class TestStreamRateManager(unittest.TestCase):
+
+    def setUp(self):
+        self.send_command = MagicMock()
+        self.receiver = MavlinkReceiver(MagicMock())
+        self.manager = StreamRateManager(self.send_command, self.receiver, link_capacity=1000.0, window=0.05)
+
+    def intervals(self):
+        return [(call.args[1], call.args[2]) for call in self.send_command.call_args_list
+                if call.args[0] == SET_MESSAGE_INTERVAL]
+
+    def test_highest_request_wins_and_release_restores_default(self):
+        self.manager.request('GLOBAL_POSITION_INT', 5, owner='map')
+        self.manager.request('GLOBAL_POSITION_INT', 20, owner='autopilot')
+        self.manager.release('GLOBAL_POSITION_INT', owner='autopilot')
+        self.manager.release('GLOBAL_POSITION_INT', owner='map')
+
+        self.assertEqual(self.intervals(), [(POSITION_ID, 200000.0), (POSITION_ID, 50000.0),
+                                            (POSITION_ID, 200000.0), (POSITION_ID, 0)])
+
+    def test_overload_lowers_rates_down_to_minimum(self):
+        self.manager.request('GLOBAL_POSITION_INT', 20, min_rate=8)
+        self.manager.request('ATTITUDE', 20)
+
+        self.manager.adapt(0.95)
+        self.manager.adapt(0.95)
+
+        self.assertEqual(self.manager.scale, 0.25)
+        self.assertEqual(self.manager.target_rates(), {'GLOBAL_POSITION_INT': 8, 'ATTITUDE': 5})
+
+        self.manager.adapt(0.1)
+        self.assertEqual(self.manager.scale, 0.3125)
+
+    def test_measures_link_utilization_from_receiver(self):
+        self.manager.request('ATTITUDE', 50)
+        msg = make_msg('ATTITUDE')
+        msg.get_msgbuf.return_value = b'x' * 100
+        for _ in range(5):
+            self.receiver.dispatch(msg)
+        time.sleep(0.06)
+        self.receiver.dispatch(msg)
+
+        self.assertGreater(self.manager.utilization, 0.8)
+        self.assertEqual(self.manager.scale, 0.5)
+        self.assertEqual(self.intervals()[-1], (message_id('ATTITUDE'), 40000.0))
+
+    def test_unknown_message_type(self):
+        with self.assertRaises(ValueError):
+            self.manager.request('NOT_A_MESSAGE', 10)
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+from geodesy import haversine_distance
+from survey import lawnmower, camera_footprint
+
+SQUARE = [(47.0, 8.0), (47.0, 8.01), (47.01, 8.01), (47.01, 8.0)]
+
+
+class TestSurvey(unittest.TestCase):
+
+    def test_camera_footprint(self):
+        self.assertEqual(camera_footprint(100, 13.2, 8.8, 8.8), (150.0, 100.0))
+        with self.assertRaises(ValueError):
+            camera_footprint(0, 13.2, 8.8, 8.8)
+
+    def test_north_lines_alternate_direction(self):
+        points = lawnmower(SQUARE, 50, (100, 75), side_overlap=0.5)
+        self.assertEqual(points.shape, (32, 3))
+        self.assertTrue(np.all(points[:, 2] == 50))
+        # Каждый галс идёт с юга на север или обратно на постоянной долготе
+        starts, ends = points[0::2], points[1::2]
+        np.testing.assert_allclose(starts[:, 1], ends[:, 1])
+        np.testing.assert_allclose(starts[0::2, 0], 47.0, atol=1e-9)
+        np.testing.assert_allclose(starts[1::2, 0], 47.01, atol=1e-9)
+        # Соседние галсы разнесены на ширину кадра с учётом перекрытия
+        spacing = haversine_distance(47.005, starts[:-1, 1], 47.005, starts[1:, 1])
+        np.testing.assert_allclose(spacing, 50.0, rtol=1e-3)
+
+    def test_heading_east(self):
+        points = lawnmower(SQUARE, 50, (200, 100), side_overlap=0.0, heading=90)
+        starts, ends = points[0::2], points[1::2]
+        np.testing.assert_allclose(starts[:, 0], ends[:, 0])
+        self.assertTrue(np.all(ends[0::2, 1] > starts[0::2, 1]))
+        self.assertTrue(np.all(ends[1::2, 1] < starts[1::2, 1]))
+
+    def test_concave_polygon_splits_lines(self):
+        u_shape = [(47.0, 8.0), (47.0, 8.03), (47.03, 8.03), (47.03, 8.02), (47.01, 8.02),
+                   (47.01, 8.01), (47.03, 8.01), (47.03, 8.0)]
+        points = lawnmower(u_shape, 50, (500, 500), side_overlap=0.0, heading=90)
+        top = points[points[:, 0] > 47.02]
+        # Галс над вырезом обходит оба "плеча" и не заходит в вырез
+        inside_notch = (top[:, 1] > 8.01 + 1e-9) & (top[:, 1] < 8.02 - 1e-9)
+        self.assertFalse(inside_notch.any())
+        self.assertEqual(len(points[np.isclose(points[:, 0], points[0, 0])]), 4)
+
+    def test_photo_waypoints_spacing(self):
+        points = lawnmower(SQUARE, 50, (100, 100), side_overlap=0.5, front_overlap=0.8, photo_waypoints=True)
+        first_line = points[np.isclose(points[:, 1], points[0, 1])]
+        steps = haversine_distance(first_line[:-1, 0], first_line[:-1, 1], first_line[1:, 0], first_line[1:, 1])
+        self.assertTrue(np.all(steps <= 20.0 + 1e-6))
+        self.assertAlmostEqual(first_line[0, 0], 47.0)
+        self.assertAlmostEqual(first_line[-1, 0], 47.01)
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            lawnmower(SQUARE[:2], 50, (100, 100))
+        with self.assertRaises(ValueError):
+            lawnmower(SQUARE, 50, (0, 100))
+        with self.assertRaises(ValueError):
+            lawnmower(SQUARE, 50, (100, 100), side_overlap=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
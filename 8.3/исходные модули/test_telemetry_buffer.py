@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+import weakref
+from unittest.mock import patch
+import numpy as np
+from telemetry_buffer import TelemetryRingBuffer, load_recording
+from test_mavlink_receiver import make_msg
+
+
+def position(lat):
+    return make_msg('GLOBAL_POSITION_INT', lat=int(lat * 1e7), lon=int(8.5 * 1e7), relative_alt=10000)
+
+
+class TestTelemetryRingBuffer(unittest.TestCase):
+
+    def test_feed_combines_latest_messages(self):
+        buffer = TelemetryRingBuffer(capacity=4)
+        buffer.feed(make_msg('VFR_HUD', groundspeed=5.0, airspeed=6.0))
+        buffer.feed(make_msg('SYS_STATUS', battery_remaining=80))
+        buffer.feed(position(47.0))
+
+        latest = buffer.latest()
+        self.assertAlmostEqual(latest['lat'], 47.0)
+        self.assertAlmostEqual(latest['relative_alt'], 10.0)
+        self.assertNotIn('alt', latest)
+        self.assertEqual(latest['groundspeed'], 5.0)
+        self.assertEqual(latest['battery'], 80)
+        self.assertEqual(len(buffer), 1)
+
+    def test_ring_keeps_last_records_in_order(self):
+        buffer = TelemetryRingBuffer(capacity=3)
+        for i in range(5):
+            buffer.feed(position(47.0 + i * 0.001))
+
+        data = buffer.to_array()
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.total, 5)
+        self.assertAlmostEqual(data['lat'][0], 47.002)
+        self.assertAlmostEqual(data['lat'][-1], 47.004)
+        self.assertEqual(len(buffer.since(data['timestamp'][1])), 2)
+
+    def test_spill_records_whole_flight(self):
+        path = os.path.join(tempfile.mkdtemp(), 'flight.bin')
+        buffer = TelemetryRingBuffer(capacity=2, spill_path=path, spill_chunk=4)
+        for i in range(10):
+            buffer.feed(position(47.0 + i * 0.001))
+        buffer.close()
+
+        recording = load_recording(path)
+        self.assertEqual(len(recording), 10)
+        self.assertAlmostEqual(recording['lat'][9], 47.009)
+        del recording
+
+    def test_spill_mapping_released_before_resize(self):
+        path = os.path.join(tempfile.mkdtemp(), 'flight.bin')
+        buffer = TelemetryRingBuffer(capacity=2, spill_path=path, spill_chunk=4)
+        for i in range(4):
+            buffer.feed(position(47.0 + i * 0.001))
+        old_mapping = weakref.ref(buffer._spill)
+        alive_on_remap = []
+        memmap = np.memmap
+
+        def remap(*args, **kwargs):
+            alive_on_remap.append(old_mapping() is not None)
+            return memmap(*args, **kwargs)
+
+        with patch('telemetry_buffer.np.memmap', side_effect=remap):
+            buffer.feed(position(47.004))
+
+        self.assertEqual(alive_on_remap, [False])
+        self.assertEqual(os.path.getsize(path), 8 * buffer._spill.itemsize)
+        buffer.close()
+        self.assertIsNone(buffer._spill)
+        self.assertEqual(os.path.getsize(path), 5 * load_recording(path).itemsize)
+
@@ -0,0 +1,73 @@
+import pickle
+import unittest
+from telemetry_snapshot import TelemetrySnapshot
+from test_mavlink_receiver import make_msg
+
+
+class TestTelemetrySnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.messages = {
+            'GLOBAL_POSITION_INT': make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000,
+                                            alt=510000, relative_alt=10000, time_boot_ms=1500),
+            'SYS_STATUS': make_msg('SYS_STATUS', battery_remaining=75),
+        }
+
+    def test_from_messages_sets_present_fields(self):
+        snapshot = TelemetrySnapshot.from_messages(self.messages, timestamp=1700000000.0)
+
+        self.assertAlmostEqual(snapshot['lat'], 47.3977)
+        self.assertEqual(snapshot.relative_alt, 10.0)
+        self.assertEqual(snapshot['time_boot_ms'], 1500)
+        self.assertEqual(snapshot['timestamp'], 1700000000.0)
+        self.assertIn('battery', snapshot)
+        self.assertNotIn('yaw', snapshot)
+        self.assertIsNone(snapshot.get('yaw'))
+        self.assertEqual(snapshot.get('yaw', 0.0), 0.0)
+        with self.assertRaises(KeyError):
+            snapshot['yaw']
+        with self.assertRaises(AttributeError):
+            snapshot.yaw
+
+    def test_to_dict_matches_mapping_view(self):
+        snapshot = TelemetrySnapshot.from_messages(self.messages)
+
+        values = snapshot.to_dict()
+
+        self.assertEqual(list(values), ['lat', 'lon', 'alt', 'relative_alt', 'battery', 'time_boot_ms'])
+        self.assertEqual(len(snapshot), 6)
+        self.assertEqual(snapshot, values)
+        self.assertEqual(dict(snapshot), values)
+
+    def test_snapshot_is_immutable(self):
+        snapshot = TelemetrySnapshot.from_messages(self.messages)
+        with self.assertRaises(AttributeError):
+            snapshot.lat = 0.0
+        with self.assertRaises(TypeError):
+            snapshot['lat'] = 0.0
+        with self.assertRaises(AttributeError):
+            snapshot.extra = 1
+
+    def test_select_keeps_timestamp(self):
+        snapshot = TelemetrySnapshot.from_messages(self.messages, timestamp=5.0)
+
+        selected = snapshot.select(['lat', 'yaw'])
+
+        self.assertEqual(selected.to_dict(), {'lat': snapshot.lat, 'timestamp': 5.0})
+
+    def test_invalid_latitude(self):
+        self.messages['GLOBAL_POSITION_INT'].lat = 950000000
+        with self.assertRaises(ValueError):
+            TelemetrySnapshot.from_messages(self.messages)
+
+    def test_pickle_roundtrip(self):
+        snapshot = TelemetrySnapshot.from_dict({'lat': 47.0, 'lon': 8.0, 'battery': 50})
+
+        restored = pickle.loads(pickle.dumps(snapshot))
+
+        self.assertIsInstance(restored, TelemetrySnapshot)
+        self.assertEqual(restored, snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from terrain import TerrainModel, tile_name, agl_to_relative, check_clearance, HGT_VOID
+
+SIZE = 121  # шаг 30 угловых секунд
+
+
+def write_tile(directory, lat0, lon0, heights):
+    heights.astype('>i2').tofile(os.path.join(directory, tile_name(lat0, lon0)))
+
+
+def plane(lat0, lon0, a=100.0, b=1000.0, c=500.0):
+    # Высота линейно зависит от координат: билинейная интерполяция точна
+    lats = lat0 + 1 - np.arange(SIZE) / (SIZE - 1)
+    lons = lon0 + np.arange(SIZE) / (SIZE - 1)
+    return np.rint(a + b * (lats[:, None] - 47) + c * (lons[None, :] - 8)).astype(np.int64)
+
+
+class TestTerrain(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        write_tile(self.tmp.name, 47, 8, plane(47, 8))
+        write_tile(self.tmp.name, 47, 9, plane(47, 9))
+        self.terrain = TerrainModel(self.tmp.name, max_tiles=1)
+
+    def tearDown(self):
+        self.terrain.clear()
+        self.tmp.cleanup()
+
+    def test_tile_name(self):
+        self.assertEqual(tile_name(47.4, 8.5), 'N47E008.hgt')
+        self.assertEqual(tile_name(-0.5, -70.2), 'S01W071.hgt')
+
+    def test_bilinear_lookup_across_tiles(self):
+        lat = np.array([47.5, 47.25, 47.9, 47.5])
+        lon = np.array([8.5, 8.75, 9.1, 9.999])
+
+        heights = self.terrain.elevation(lat, lon)
+
+        expected = 100 + 1000 * (lat - 47) + 500 * (lon - 8)
+        np.testing.assert_allclose(heights, expected, atol=0.5)
+        self.assertEqual(self.terrain.misses, 2)
+        self.assertEqual(len(self.terrain._tiles), 1)  # LRU на один тайл
+
+    def test_missing_tile_and_void(self):
+        heights = plane(47, 8)
+        heights[60, 60] = HGT_VOID
+        write_tile(self.tmp.name, 47, 8, heights)
+        terrain = TerrainModel(self.tmp.name)
+
+        result = terrain.elevation([47.5, 47.8, 10.0], [8.5, 8.2, 10.0])
+
+        self.assertTrue(np.isnan(result[0]))
+        self.assertFalse(np.isnan(result[1]))
+        self.assertTrue(np.isnan(result[2]))
+
+    def test_agl_to_relative(self):
+        home = (47.0, 8.0)  # рельеф 100 м
+        relative = agl_to_relative([(47.5, 8.5, 30.0), (47.0, 8.2, 30.0)], home, self.terrain)
+
+        np.testing.assert_allclose(relative[:, 2], [30 + 750, 30 + 100], atol=0.5)
+        with self.assertRaises(ValueError):
+            agl_to_relative([(10.0, 10.0, 30.0)], home, self.terrain)
+
+    def test_check_clearance_samples_legs(self):
+        home = (47.0, 8.0)
+        # Обе точки на 30 м над рельефом, но участок идёт по прямой над склоном
+        waypoints = agl_to_relative([(47.0, 8.0, 30.0), (47.0, 8.2, 30.0), (47.1, 8.2, 30.0)], home, self.terrain)
+        waypoints[2, 2] = waypoints[1, 2]  # последний участок горизонтален, а склон растёт
+
+        self.assertEqual(check_clearance(waypoints, home, self.terrain, min_clearance=20).tolist(), [1])
+        self.assertEqual(check_clearance(waypoints[:2], home, self.terrain, min_clearance=20).tolist(), [])
+        self.assertEqual(check_clearance(waypoints, home, self.terrain, min_clearance=20,
+                                         chunk_samples=50).tolist(), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
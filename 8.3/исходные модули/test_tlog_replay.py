@@ -0,0 +1,80 @@
+import os
+import struct
+import tempfile
+import time
+import unittest
+from pymavlink import mavutil
+from tlog_replay import TlogReplay, replay_connection
+from uav_control import UAVControl
+
+
+def write_tlog(path, start=1700000000.0, count=20, interval=1.0):
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    with open(path, 'wb') as f:
+        for i in range(count):
+            if i % 2 == 0:
+                msg = mav.heartbeat_encode(mavutil.mavlink.MAV_TYPE_QUADROTOR,
+                                           mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA, 0, 4, 4)
+            else:
+                msg = mav.global_position_int_encode(i * 1000, 473977000 + i, 85456000, 500000,
+                                                     10000, 0, 0, 0, 0)
+            usec = int((start + i * interval) * 1e6)
+            f.write(struct.pack('>Q', usec) + msg.pack(mav))
+
+
+class TestTlogReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'flight.tlog')
+        write_tlog(self.path)
+
+    def test_as_fast_as_possible_reads_whole_log(self):
+        replay = TlogReplay(self.path, speed=None)
+        messages = []
+        while True:
+            msg = replay.recv_match(blocking=True, timeout=5)
+            if msg is None:
+                break
+            messages.append(msg)
+        replay.close()
+
+        self.assertEqual(len(messages), 20)
+        self.assertTrue(replay.eof)
+
+    def test_timeout_measured_in_log_time(self):
+        replay = TlogReplay(self.path, speed=None)
+        replay.recv_match(type='HEARTBEAT', blocking=True)
+
+        started = time.monotonic()
+        self.assertIsNone(replay.recv_match(type='SYS_STATUS', blocking=True, timeout=3.5))
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertAlmostEqual(replay.clock(), 1700000003.5)
+        self.assertEqual(replay.recv_match(blocking=True)._timestamp, 1700000004.0)
+        replay.close()
+
+    def test_speedup_paces_messages(self):
+        replay = replay_connection(f"replay:{self.path}?speed=20")
+        replay.recv_match(blocking=True)
+
+        started = time.monotonic()
+        msg = replay.recv_match(type='GLOBAL_POSITION_INT', blocking=True, timeout=10)
+        elapsed = time.monotonic() - started
+        replay.close()
+
+        self.assertIsNotNone(msg)
+        self.assertGreater(elapsed, 0.03)
+        self.assertLess(elapsed, 0.5)
+
+    def test_writes_are_recorded(self):
+        replay = TlogReplay(self.path, speed=None)
+        replay.arducopter_arm()
+        self.assertEqual(len(replay.sent), 1)
+        replay.close()
+
+    def test_uav_control_over_replay(self):
+        uav = UAVControl(f"replay:{self.path}?speed=max")
+        telemetry = uav.get_telemetry()
+        uav.close()
+
+        self.assertAlmostEqual(telemetry['lat'], 47.3977001)
+        self.assertEqual(telemetry['relative_alt'], 10.0)
@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from tracing import Tracer, NULL_TRACER, traced
+
+
+class Vehicle:
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    @traced(args=('altitude',))
+    def takeoff(self, altitude, timeout=5):
+        with self.tracer.span('Vehicle.takeoff.wait_position'):
+            return altitude
+
+    @traced()
+    def land(self):
+        raise RuntimeError("отказ")
+
+
+class TestTracer(unittest.TestCase):
+
+    def setUp(self):
+        self.tracer = Tracer()
+
+    def test_nested_spans_with_attributes(self):
+        with self.tracer.span('mission', waypoints=2) as mission:
+            with self.tracer.span('mission.leg', index=0) as leg:
+                self.assertIs(self.tracer.current(), leg)
+        self.assertIsNone(self.tracer.current())
+
+        spans = self.tracer.spans()
+        self.assertEqual([s.name for s in spans], ['mission.leg', 'mission'])
+        self.assertEqual(leg.parent_id, mission.span_id)
+        self.assertIsNone(mission.parent_id)
+        self.assertEqual(leg.attributes, {'index': 0})
+        self.assertGreaterEqual(mission.duration, leg.duration)
+
+    def test_threads_have_separate_stacks(self):
+        worker = {}
+
+        def run():
+            with self.tracer.span('worker') as span:
+                worker['span'] = span
+
+        with self.tracer.span('main'):
+            thread = threading.Thread(target=run)
+            thread.start()
+            thread.join()
+        self.assertIsNone(worker['span'].parent_id)
+
+    def test_traced_method_records_arguments_and_errors(self):
+        vehicle = Vehicle(self.tracer)
+
+        self.assertEqual(vehicle.takeoff(10), 10)
+        with self.assertRaises(RuntimeError):
+            vehicle.land()
+
+        spans = {s.name: s for s in self.tracer.spans()}
+        self.assertEqual(spans['Vehicle.takeoff'].attributes, {'altitude': 10})
+        self.assertEqual(spans['Vehicle.takeoff.wait_position'].parent_id, spans['Vehicle.takeoff'].span_id)
+        self.assertEqual(spans['Vehicle.land'].attributes['error'], 'RuntimeError: отказ')
+
+    def test_hooks_receive_finished_spans(self):
+        finished = []
+        self.tracer.add_hook(finished.append)
+        with self.tracer.span('arm'):
+            pass
+        self.tracer.remove_hook(finished.append)
+        with self.tracer.span('disarm'):
+            pass
+        self.assertEqual([s.name for s in finished], ['arm'])
+
+    def test_export_chrome_trace(self):
+        with self.tracer.span('UAVControl.goto', lat=47.0):
+            with self.tracer.span('UAVControl.goto.sleep'):
+                pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trace.json')
+            self.tracer.export_chrome_trace(path)
+            with open(path, encoding='utf-8') as f:
+                trace = json.load(f)
+
+        events = trace['traceEvents']
+        self.assertEqual([e['name'] for e in events], ['UAVControl.goto', 'UAVControl.goto.sleep'])
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertEqual(events[0]['cat'], 'UAVControl')
+        self.assertEqual(events[0]['args']['lat'], 47.0)
+        self.assertEqual(events[1]['args']['parent_id'], events[0]['args']['span_id'])
+        self.assertGreaterEqual(events[0]['dur'], events[1]['dur'])
+
+    def test_null_tracer_records_nothing(self):
+        vehicle = Vehicle(NULL_TRACER)
+        self.assertEqual(vehicle.takeoff(10), 10)
+        self.assertIsNone(NULL_TRACER.current())
+
+
+if __name__ == '__main__':
+    unittest.main()
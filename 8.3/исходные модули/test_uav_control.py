@@ -1,6 +1,18 @@
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 from uav_control import UAVControl
+from tracing import Tracer
+from geofence import Geofence, CylinderZone
+from test_mavlink_receiver import make_msg
+from test_command_ack import make_ack
+from mission_files import MissionItem
+
+
+def heartbeat(custom_mode, system=1):
+    msg = make_msg('HEARTBEAT', custom_mode=custom_mode, base_mode=0)
+    msg.get_srcSystem.return_value = system
+    return msg
 
 
 class TestUAVControl(unittest.TestCase):
@@ -25,10 +37,34 @@ class TestUAVControl(unittest.TestCase):
         self.mock_master.motors_disarmed_wait.assert_called_once()
 
     def test_set_mode_success(self):
+        self.mock_master.target_system = 1
         self.mock_master.mode_mapping.return_value = {'GUIDED': 4}
+        self.mock_master.recv_match.side_effect = [heartbeat(4)]
         self.uav.set_mode('GUIDED')
         self.mock_master.set_mode.assert_called_once_with(4)
 
+    def test_set_mode_retries_until_heartbeat_confirms(self):
+        self.mock_master.target_system = 1
+        self.mock_master.mode_mapping.return_value = {'GUIDED': 4, 'LAND': 9}
+        modes = {1: 0, 2: 4, 3: 9}  # первая команда теряется
+        self.mock_master.recv_match.side_effect = lambda **kwargs: heartbeat(
+            modes[self.mock_master.set_mode.call_count])
+
+        self.uav.set_mode('GUIDED', timeout=0.05)
+        self.uav.set_mode('LAND', timeout=0.05)
+
+        self.assertEqual(self.mock_master.set_mode.call_count, 3)
+        self.mock_master.mode_mapping.assert_called_once()
+
+    def test_set_mode_not_confirmed(self):
+        self.mock_master.target_system = 1
+        self.mock_master.mode_mapping.return_value = {'GUIDED': 4}
+        self.mock_master.recv_match.return_value = heartbeat(0)
+
+        with self.assertRaises(Exception):
+            self.uav.set_mode('GUIDED', timeout=0.02, retries=1)
+        self.assertEqual(self.mock_master.set_mode.call_count, 2)
+
     def test_takeoff_invalid_altitude(self):
         with self.assertRaises(ValueError):
             self.uav.takeoff(-10)
@@ -39,3 +75,249 @@ class TestUAVControl(unittest.TestCase):
         telemetry = self.uav.get_telemetry()
         self.assertIsNone(telemetry)
         mock_logger.warning.assert_called_once_with("Телеметрия недоступна")
+
+    def test_get_telemetry_from_receiver_cache(self):
+        self.mock_master.recv_match.side_effect = lambda **kwargs: time.sleep(0.01)
+        self.uav.start_receiver()
+        try:
+            self.uav.receiver.dispatch(make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, alt=10000))
+            self.uav.receiver.dispatch(make_msg('VFR_HUD', groundspeed=5.0, airspeed=6.0))
+            self.uav.receiver.dispatch(make_msg('SYS_STATUS', battery_remaining=75))
+            self.uav.receiver.dispatch(make_msg('ATTITUDE', roll=0.1, pitch=0.2, yaw=0.3))
+            telemetry = self.uav.get_telemetry()
+        finally:
+            self.uav.stop_receiver()
+
+        self.assertAlmostEqual(telemetry['lat'], 47.3977)
+        self.assertAlmostEqual(telemetry['lon'], 8.5456)
+        self.assertEqual(telemetry['alt'], 10)
+        self.assertEqual(telemetry['groundspeed'], 5.0)
+        self.assertEqual(telemetry['battery'], 75)
+        self.assertEqual(telemetry['yaw'], 0.3)
+        for call in self.mock_master.recv_match.call_args_list:
+            self.assertNotIn('type', call.kwargs)
+
+    def test_iter_telemetry_drops_stale_snapshots(self):
+        self.mock_master.recv_match.side_effect = lambda **kwargs: time.sleep(0.005)
+        self.uav.start_receiver()
+        try:
+            self.uav.receiver.dispatch(make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, alt=10000))
+            self.uav.receiver.dispatch(make_msg('SYS_STATUS', battery_remaining=75))
+            stream = self.uav.iter_telemetry(rate_hz=50, fields=['lat', 'battery'])
+            first = next(stream)
+            time.sleep(0.1)  # потребитель отстал на несколько периодов
+            self.uav.receiver.dispatch(make_msg('SYS_STATUS', battery_remaining=74))
+            start = time.monotonic()
+            second = next(stream)
+            third = next(stream)
+            elapsed = time.monotonic() - start
+            stream.close()
+        finally:
+            self.uav.stop_receiver()
+
+        self.assertEqual(set(first), {'lat', 'battery', 'timestamp'})
+        self.assertEqual(first['battery'], 75)
+        self.assertEqual(second['battery'], 74)
+        self.assertGreaterEqual(second['timestamp'], first['timestamp'])
+        # После отставания следующий снимок выдаётся через период, а не сразу из очереди
+        self.assertGreaterEqual(elapsed, 0.015)
+        self.assertEqual(third['battery'], 74)
+
+    def test_iter_telemetry_duration_without_receiver(self):
+        messages = [make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, alt=10000)]
+        self.mock_master.recv_match.side_effect = lambda **kwargs: messages.pop(0) if messages else None
+        self.uav.receiver.poll_timeout = 0.005
+
+        snapshots = list(self.uav.iter_telemetry(rate_hz=20, duration=0.2))
+
+        self.assertGreaterEqual(len(snapshots), 3)
+        self.assertLessEqual(len(snapshots), 5)
+        self.assertAlmostEqual(snapshots[-1]['lat'], 47.3977)
+
+    def test_iter_telemetry_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            next(self.uav.iter_telemetry(rate_hz=0))
+
+    def test_takeoff_keeps_telemetry_while_waiting_for_ack(self):
+        self.mock_master.target_system = 1
+        self.mock_master.mode_mapping.return_value = {'GUIDED': 4}
+        position = make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, alt=0)
+        self.mock_master.recv_match.side_effect = [
+            heartbeat(4),
+            position,
+            make_msg('VFR_HUD', groundspeed=0.0),
+            make_ack(22),
+        ]
+
+        self.uav.takeoff(10)
+
+        self.mock_master.mav.command_long_send.assert_called_once()
+        self.assertIsNotNone(self.uav.receiver.latest('VFR_HUD'))
+        self.assertEqual(self.uav.ack_router.pending_count(), 0)
+
+    def test_metrics_count_messages_and_ack_latency(self):
+        self.mock_master.target_system = 1
+        self.mock_master.mav_loss = 2
+        self.mock_master.recv_match.side_effect = [
+            make_msg('VFR_HUD', groundspeed=0.0),
+            make_msg('VFR_HUD', groundspeed=0.0),
+            make_ack(21),
+        ]
+
+        self.uav.land()
+
+        metrics = self.uav.metrics.collect()
+        self.assertEqual(metrics['mavlink_messages_received_total'][(('type', 'VFR_HUD'),)], 2)
+        self.assertEqual(metrics['mavlink_packets_lost_total'], {(): 2.0})
+        self.assertGreater(metrics['mavlink_recv_blocked_seconds_total'][()], 0)
+        latency = self.uav.metrics.get('mavlink_command_ack_latency_seconds')
+        self.assertEqual(latency.summary(command='MAV_CMD_NAV_LAND')['count'], 1)
+
+    def test_tracer_records_nested_operation_spans(self):
+        self.mock_master.target_system = 1
+        self.mock_master.recv_match.side_effect = [make_ack(21)]
+        self.uav.tracer = Tracer()
+
+        self.uav.land()
+
+        spans = {s.name: s for s in self.uav.tracer.spans()}
+        self.assertEqual(spans['UAVControl.send_command'].attributes, {'command': 21})
+        self.assertEqual(spans['UAVControl.send_command'].parent_id, spans['UAVControl.land'].span_id)
+        self.assertEqual(spans['UAVControl.wait_command_ack'].parent_id, spans['UAVControl.land'].span_id)
+
+    def test_geofence_monitor_reports_entry_once(self):
+        zone = CylinderZone('stadium', 47.3977, 8.5456, radius=20, max_alt=50)
+        breaches = []
+        self.uav.monitor_geofence(Geofence([zone]), lambda zones, msg: breaches.append(zones))
+
+        for lat in (473970000, 473977000, 473977100, 473970000, 473977000):
+            self.uav.receiver.dispatch(make_msg('GLOBAL_POSITION_INT', lat=lat, lon=85456000, relative_alt=10000))
+        self.uav.stop_geofence_monitor()
+        self.uav.receiver.dispatch(make_msg('GLOBAL_POSITION_INT', lat=473970000, lon=85456000, relative_alt=10000))
+        self.uav.receiver.dispatch(make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, relative_alt=10000))
+
+        self.assertEqual(breaches, [[zone], [zone]])
+
+    def test_land_rejected(self):
+        self.mock_master.target_system = 1
+        self.mock_master.recv_match.side_effect = [make_ack(21, result=4)]
+
+        with self.assertRaises(Exception):
+            self.uav.land()
+        self.mock_master.mav.command_long_send.assert_called_once()
+
+    def test_goto_sends_guided_target_without_waiting(self):
+        started = time.monotonic()
+        self.uav.goto(47.3980, 8.5460, 20)
+
+        self.assertLess(time.monotonic() - started, 0.1)
+        args = self.mock_master.mav.set_position_target_global_int_send.call_args.args
+        self.assertEqual(args[3], 6)  # MAV_FRAME_GLOBAL_RELATIVE_ALT_INT
+        self.assertEqual(args[5:8], (473980000, 85460000, 20))
+        self.mock_master.mav.mission_count_send.assert_not_called()
+        self.mock_master.recv_match.assert_not_called()
+
+    def test_upload_mission_retransmits_requested_items(self):
+        self.mock_master.target_system = 1
+        messages = [
+            make_msg('MISSION_REQUEST_INT', seq=0),
+            make_msg('MISSION_REQUEST_INT', seq=1),
+            make_msg('MISSION_REQUEST_INT', seq=1),
+            make_msg('MISSION_ACK', type=0),
+        ]
+        for msg in messages:
+            msg.get_srcSystem.return_value = 1
+        self.mock_master.recv_match.side_effect = messages
+
+        self.uav.upload_mission([(47.3977, 8.5456, 10), (47.3980, 8.5460, 20)])
+
+        self.mock_master.mav.mission_count_send.assert_called_once()
+        sent = [call.args[2] for call in self.mock_master.mav.mission_item_int_send.call_args_list]
+        self.assertEqual(sent, [0, 1, 1])
+
+    def test_upload_mission_streams_items_from_iterator(self):
+        self.mock_master.target_system = 1
+        messages = [make_msg('MISSION_REQUEST_INT', seq=seq) for seq in (0, 1, 2, 2)] + [make_msg('MISSION_ACK', type=0)]
+        for msg in messages:
+            msg.get_srcSystem.return_value = 1
+        self.mock_master.recv_match.side_effect = messages
+        pulled = []
+
+        def items():
+            for i in range(3):
+                pulled.append(i)
+                yield MissionItem(47.0 + i / 1000, 8.0, 10, command=16 if i else 22)
+
+        self.uav.upload_mission(items(), count=3, window=1)
+
+        calls = self.mock_master.mav.mission_item_int_send.call_args_list
+        self.assertEqual([call.args[2] for call in calls], [0, 1, 2, 2])
+        self.assertEqual(calls[0].args[4], 22)
+        self.assertEqual(calls[2].args[11], 470020000)
+        self.assertEqual(pulled, [0, 1, 2])
+
+    def test_download_mission(self):
+        self.mock_master.target_system = 1
+        messages = [
+            make_msg('MISSION_COUNT', count=2),
+            make_msg('MISSION_ITEM_INT', seq=0, frame=6, command=16, x=470000000, y=80000000, z=10.0,
+                     param1=0, param2=0, param3=0, param4=0, autocontinue=1),
+            make_msg('MISSION_ITEM_INT', seq=0, frame=6, command=16, x=470000000, y=80000000, z=10.0,
+                     param1=0, param2=0, param3=0, param4=0, autocontinue=1),
+            make_msg('MISSION_ITEM_INT', seq=1, frame=2, command=178, x=0, y=0, z=0.0,
+                     param1=1, param2=12, param3=-1, param4=0, autocontinue=1),
+        ]
+        for msg in messages:
+            msg.get_srcSystem.return_value = 1
+        self.mock_master.recv_match.side_effect = messages + [None] * 10
+
+        items = list(self.uav.download_mission())
+
+        self.assertEqual([(item.command, item.frame) for item in items], [(16, 3), (178, 2)])
+        self.assertEqual(items[0].waypoint, (47.0, 8.0, 10.0))
+        self.assertEqual(items[1].params, (1.0, 12.0, -1.0, 0.0))
+        requested = [call.args[2] for call in self.mock_master.mav.mission_request_int_send.call_args_list]
+        self.assertEqual(requested, [0, 1])
+        self.mock_master.mav.mission_ack_send.assert_called_once()
+
+    def test_upload_mission_rejected(self):
+        self.mock_master.target_system = 1
+        ack = make_msg('MISSION_ACK', type=1)
+        ack.get_srcSystem.return_value = 1
+        self.mock_master.recv_match.side_effect = [ack]
+
+        with self.assertRaises(Exception):
+            self.uav.upload_mission([(47.3977, 8.5456, 10)])
+
+    def test_wait_arrival_on_metric_distance(self):
+        self.mock_master.target_system = 1
+        far = make_msg('GLOBAL_POSITION_INT', lat=473977000, lon=85456000, relative_alt=10000)
+        near = make_msg('GLOBAL_POSITION_INT', lat=473980100, lon=85460000, relative_alt=19500)
+        for msg in (far, near):
+            msg.get_srcSystem.return_value = 1
+        self.mock_master.recv_match.side_effect = [far, near]
+
+        self.assertTrue(self.uav.wait_arrival(47.3980, 8.5460, 20, acceptance_radius=2.0, timeout=1))
+
+    def test_wait_arrival_on_mission_item_reached(self):
+        self.mock_master.target_system = 1
+        reached = make_msg('MISSION_ITEM_REACHED', seq=3)
+        reached.get_srcSystem.return_value = 1
+        self.mock_master.recv_match.side_effect = [reached]
+
+        self.assertTrue(self.uav.wait_arrival(47.3980, 8.5460, 20, timeout=1, seq=3))
+
+    def test_wait_arrival_timeout(self):
+        self.mock_master.recv_match.return_value = None
+        self.assertFalse(self.uav.wait_arrival(47.3980, 8.5460, 20, timeout=0.05))
+
+    def test_record_telemetry_attaches_to_receiver(self):
+        position = make_msg('GLOBAL_POSITION_INT', lat=470000000, lon=85000000, relative_alt=10000)
+        buffer = self.uav.record_telemetry(capacity=8)
+
+        self.uav.receiver.dispatch(position)
+        self.uav.stop_recording()
+        self.uav.receiver.dispatch(position)
+
+        self.assertEqual(buffer.total, 1)
+        self.assertIsNone(self.uav.telemetry_buffer)
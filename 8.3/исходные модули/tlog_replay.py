@@ -0,0 +1,162 @@
+# tlog_replay.py
+
+from pymavlink import mavutil
+import collections
+import time
+from typing import Optional, Any, Deque
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TlogReplay(mavutil.mavlogfile):
+    """
+    Соединение MAVLink, воспроизводящее записанный полёт из файла .tlog.
+
+    Заменяет mavutil.mavlink_connection() для UAVControl и MissionPlanner:
+    сообщения выдаются в темпе их меток времени с ускорением speed
+    (None — без пауз, так быстро, как читается файл). Таймауты recv_match()
+    отсчитываются по времени записи, поэтому при ускорении 10x ожидание
+    с таймаутом 5 с занимает 0,5 с, а без пауз — ровно до первого сообщения
+    позже таймаута. Отправленные пакеты не передаются никуда и сохраняются в sent.
+    """
+
+    def __init__(self, filename: str, speed: Optional[float] = 1.0, sent_maxlen: int = 1000):
+        """
+        Открытие записи для воспроизведения.
+
+        Args:
+            filename (str): Путь к файлу .tlog.
+            speed (Optional[float]): Ускорение воспроизведения (None — без пауз).
+            sent_maxlen (int): Число хранимых отправленных пакетов.
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("Ускорение воспроизведения должно быть положительным")
+        super().__init__(filename)
+        self.speed = speed
+        self.sent: Deque[bytes] = collections.deque(maxlen=sent_maxlen)
+        self.eof = False
+        self._pending: Optional[Any] = None
+        self._log_start: Optional[float] = None
+        self._wall_start = 0.0
+        self._log_now: Optional[float] = None
+
+    def write(self, buf: bytes) -> None:
+        """
+        Запись отправленного пакета в sent вместо файла записи.
+        """
+        self.sent.append(bytes(buf))
+
+    def _peek(self) -> Optional[Any]:
+        if self._pending is None and not self.eof:
+            msg = super().recv_msg()
+            if msg is None:
+                self.eof = True
+                logger.info(f"Воспроизведение {self.filename} завершено")
+            else:
+                self._pending = msg
+                if self._log_start is None:
+                    self._log_start = msg._timestamp
+                    self._log_now = msg._timestamp
+                    self._wall_start = time.monotonic()
+        return self._pending
+
+    def clock(self) -> Optional[float]:
+        """
+        Текущее время воспроизведения по часам записи.
+
+        Returns:
+            Optional[float]: Время UNIX из записи или None до первого сообщения.
+        """
+        if self._log_start is None:
+            return None
+        if self.speed is None:
+            return self._log_now
+        return self._log_start + (time.monotonic() - self._wall_start) * self.speed
+
+    def _sleep_until(self, log_time: float) -> None:
+        if self.speed is None:
+            self._log_now = max(self._log_now, log_time)
+            return
+        delay = (log_time - self.clock()) / self.speed
+        if delay > 0:
+            time.sleep(delay)
+
+    def _take(self) -> Any:
+        msg, self._pending = self._pending, None
+        if self.speed is None:
+            self._log_now = max(self._log_now, msg._timestamp)
+        return msg
+
+    def recv_msg(self) -> Optional[Any]:
+        """
+        Следующее сообщение записи, если его время уже наступило.
+
+        Returns:
+            Optional[Any]: Сообщение или None.
+        """
+        msg = self._peek()
+        if msg is None:
+            return None
+        if self.speed is not None and msg._timestamp > self.clock():
+            return None
+        return self._take()
+
+    def recv_match(self, condition: Optional[str] = None, type: Any = None,
+                   blocking: bool = False, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Ожидание сообщения заданного типа по часам записи.
+
+        Args:
+            condition (Optional[str]): Условие в формате mavutil.
+            type (Any): Тип или список типов сообщений.
+            blocking (bool): Ждать появления подходящего сообщения.
+            timeout (Optional[float]): Таймаут в секундах времени записи.
+
+        Returns:
+            Optional[Any]: Подходящее сообщение или None.
+        """
+        if type is not None and not isinstance(type, (list, set, tuple)):
+            type = [type]
+        deadline = None
+        while True:
+            msg = self._peek()
+            if msg is None:
+                return None
+            if deadline is None and timeout is not None:
+                deadline = self.clock() + timeout
+            if self.speed is not None and msg._timestamp > self.clock():
+                if not blocking:
+                    return None
+                if deadline is not None and msg._timestamp > deadline:
+                    self._sleep_until(deadline)
+                    return None
+                self._sleep_until(msg._timestamp)
+            elif deadline is not None and msg._timestamp > deadline:
+                # Без пауз таймаут истекает, как только следующее сообщение позже него
+                self._sleep_until(deadline)
+                return None
+            msg = self._take()
+            if type is not None and msg.get_type() not in type:
+                continue
+            if not mavutil.evaluate_condition(condition, self.messages):
+                continue
+            return msg
+
+
+def replay_connection(connection_string: str) -> TlogReplay:
+    """
+    Открытие воспроизведения по строке вида "replay:<файл.tlog>[?speed=<ускорение|max>]".
+
+    Args:
+        connection_string (str): Строка подключения.
+
+    Returns:
+        TlogReplay: Соединение, воспроизводящее запись.
+    """
+    path = connection_string[len('replay:'):]
+    speed: Optional[float] = 1.0
+    if '?speed=' in path:
+        path, value = path.rsplit('?speed=', 1)
+        speed = None if value == 'max' else float(value)
+    return TlogReplay(path, speed=speed)
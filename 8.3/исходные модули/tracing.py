@@ -0,0 +1,267 @@
+# tracing.py
+
+import collections
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, List, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """
+    Интервал выполнения операции с атрибутами и ссылкой на родительский интервал.
+    """
+
+    __slots__ = ('name', 'span_id', 'parent_id', 'thread_id', 'start', 'end', 'attributes')
+
+    def __init__(self, name: str, span_id: int, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+
+    def set_attribute(self, name: str, value: Any) -> None:
+        """
+        Добавление атрибута к интервалу (например, результата операции).
+        """
+        self.attributes[name] = value
+
+    @property
+    def duration(self) -> Optional[float]:
+        """
+        Optional[float]: Длительность в секундах или None, если интервал не завершён.
+        """
+        return None if self.end is None else self.end - self.start
+
+
+class _SpanContext:
+    __slots__ = ('tracer', 'name', 'attributes', 'span')
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span: Optional[Span] = None
+
+    def __enter__(self) -> Span:
+        self.span = self.tracer._open(self.name, self.attributes)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.span.attributes['error'] = f"{exc_type.__name__}: {exc_value}"
+        self.tracer._close(self.span)
+
+
+class Tracer:
+    """
+    Сборщик интервалов выполнения с вложенностью и экспортом в формат Chrome Trace Event.
+
+    Интервалы открываются контекстным менеджером span(); вложенность
+    отслеживается отдельно для каждого потока. Завершённые интервалы
+    хранятся в ограниченной очереди и передаются подключённым обработчикам
+    (add_hook()), например для отправки во внешнюю систему трассировки.
+    Файл chrome_trace() открывается в chrome://tracing или Perfetto.
+    """
+
+    enabled = True
+
+    def __init__(self, max_spans: int = 100000):
+        """
+        Инициализация трассировщика.
+
+        Args:
+            max_spans (int): Число хранимых завершённых интервалов.
+        """
+        self._lock = threading.Lock()
+        self._spans: collections.deque = collections.deque(maxlen=max_spans)
+        self._hooks: List[Callable[[Span], None]] = []
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._origin = time.perf_counter()
+
+    def span(self, name: str, **attributes: Any) -> _SpanContext:
+        """
+        Интервал выполнения для использования в with.
+
+        Args:
+            name (str): Имя операции.
+            **attributes (Any): Атрибуты интервала.
+
+        Returns:
+            _SpanContext: Контекстный менеджер, возвращающий Span.
+        """
+        return _SpanContext(self, name, attributes)
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _open(self, name: str, attributes: Dict[str, Any]) -> Span:
+        stack = self._stack()
+        parent = stack[-1].span_id if stack else None
+        span = Span(name, next(self._ids), parent, attributes)
+        stack.append(span)
+        return span
+
+    def _close(self, span: Span) -> None:
+        span.end = time.perf_counter()
+        stack = self._stack()
+        if span in stack:
+            del stack[stack.index(span):]
+        with self._lock:
+            self._spans.append(span)
+            hooks = list(self._hooks)
+        for hook in hooks:
+            try:
+                hook(span)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика трассировки: {e}")
+
+    def current(self) -> Optional[Span]:
+        """
+        Открытый интервал текущего потока или None.
+        """
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def add_hook(self, hook: Callable[[Span], None]) -> None:
+        """
+        Подключение обработчика, вызываемого для каждого завершённого интервала.
+        """
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[Span], None]) -> None:
+        """
+        Отключение обработчика.
+        """
+        with self._lock:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+    def spans(self) -> List[Span]:
+        """
+        Завершённые интервалы в порядке завершения.
+        """
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        """
+        Удаление накопленных интервалов.
+        """
+        with self._lock:
+            self._spans.clear()
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Интервалы в формате Chrome Trace Event (события "X" с длительностью).
+
+        Returns:
+            Dict[str, Any]: Объект JSON с ключом traceEvents.
+        """
+        pid = os.getpid()
+        events = []
+        for span in self.spans():
+            args = {name: value if isinstance(value, (int, float, str, bool)) or value is None else repr(value)
+                    for name, value in span.attributes.items()}
+            args['span_id'] = span.span_id
+            if span.parent_id is not None:
+                args['parent_id'] = span.parent_id
+            events.append({
+                'name': span.name,
+                'cat': span.name.split('.')[0],
+                'ph': 'X',
+                'ts': (span.start - self._origin) * 1e6,
+                'dur': span.duration * 1e6,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': args,
+            })
+        events.sort(key=lambda event: event['ts'])
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path: str) -> None:
+        """
+        Запись интервалов в файл JSON для chrome://tracing или Perfetto.
+
+        Args:
+            path (str): Путь к файлу.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+        logger.info(f"Трасса сохранена в {path}")
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        return None
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class NullTracer:
+    """
+    Отключённая трассировка: span() ничего не записывает и почти ничего не стоит.
+    """
+
+    enabled = False
+
+    def span(self, name: str, **attributes: Any) -> _NullContext:
+        return _NULL_CONTEXT
+
+    def current(self) -> None:
+        return None
+
+
+NULL_TRACER = NullTracer()
+
+
+def traced(name: Optional[str] = None, args: Sequence[str] = ()) -> Callable:
+    """
+    Декоратор метода, выполняющий его внутри интервала self.tracer.
+
+    Args:
+        name (Optional[str]): Имя интервала (по умолчанию Класс.метод).
+        args (Sequence[str]): Аргументы метода, записываемые в атрибуты интервала.
+
+    Returns:
+        Callable: Декоратор.
+    """
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        signature = inspect.signature(func) if args else None
+
+        @functools.wraps(func)
+        def wrapper(self, *call_args, **call_kwargs):
+            tracer = self.tracer
+            if not tracer.enabled:
+                return func(self, *call_args, **call_kwargs)
+            attributes = {}
+            if signature is not None:
+                bound = signature.bind(self, *call_args, **call_kwargs)
+                bound.apply_defaults()
+                attributes = {arg: bound.arguments[arg] for arg in args if arg in bound.arguments}
+            with tracer.span(span_name, **attributes):
+                return func(self, *call_args, **call_kwargs)
+        return wrapper
+    return decorate
@@ -1,29 +1,379 @@
 # uav_control.py
 
 from pymavlink import mavutil
+from mavlink_receiver import MavlinkReceiver
+from command_ack import CommandAckRouter, CommandPipeline
+from telemetry_buffer import TelemetryRingBuffer
+from tlog_replay import replay_connection
+from stream_rates import StreamRateManager
+from telemetry_snapshot import TelemetrySnapshot
+from metrics import MetricsRegistry
+from tracing import NULL_TRACER, traced
+from geodesy import distance_3d
+from mission_files import MissionItem, ItemWindow, GLOBAL_FRAMES
+from concurrent import futures
 import time
-import math
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Sequence, Tuple, Iterable, Iterator, Callable, List, Union
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Типы сообщений, из которых собирается снимок телеметрии
+TELEMETRY_TYPES = ('GLOBAL_POSITION_INT', 'VFR_HUD', 'SYS_STATUS', 'ATTITUDE')
+
+
+def telemetry_from_messages(messages: Dict[str, Any]) -> TelemetrySnapshot:
+    """
+    Сборка снимка телеметрии из последних сообщений разных типов.
+
+    Args:
+        messages (Dict[str, Any]): Словарь "тип сообщения -> последнее сообщение".
+
+    Returns:
+        TelemetrySnapshot: Координаты, скорость, батарея и ориентация (что из них доступно).
+    """
+    return TelemetrySnapshot.from_messages(messages)
+
+
+def merged_snapshot(messages: Dict[str, Any], timestamp: float,
+                    fields: Optional[Iterable[str]] = None) -> TelemetrySnapshot:
+    """
+    Снимок телеметрии с меткой времени и, при необходимости, только выбранными полями.
+
+    Args:
+        messages (Dict[str, Any]): Словарь "тип сообщения -> последнее сообщение".
+        timestamp (float): Время приёма самого свежего сообщения (UNIX, секунды).
+        fields (Optional[Iterable[str]]): Нужные поля (None — все доступные).
+
+    Returns:
+        TelemetrySnapshot: Снимок телеметрии с полем 'timestamp'.
+    """
+    telemetry = TelemetrySnapshot.from_messages(messages, timestamp)
+    if fields is not None:
+        telemetry = telemetry.select(fields)
+    return telemetry
+
+
+def open_connection(connection_string: str) -> Any:
+    """
+    Открытие соединения MAVLink.
+
+    Строки вида "replay:<файл.tlog>[?speed=10|max]" открывают воспроизведение
+    записанного полёта, остальные передаются в mavutil.mavlink_connection().
+
+    Args:
+        connection_string (str): Строка подключения.
+
+    Returns:
+        Any: Соединение MAVLink.
+    """
+    if connection_string.startswith('replay:'):
+        return replay_connection(connection_string)
+    return mavutil.mavlink_connection(connection_string)
+
+
+# Соответствие кадров MISSION_ITEM и MISSION_ITEM_INT (координаты в градусах и в градусах * 1e7)
+_INT_FRAMES = {0: 5, 3: 6, 10: 11}
+_FLOAT_FRAMES = {int_frame: frame for frame, int_frame in _INT_FRAMES.items()}
+
+
+def send_mission_item(master: Any, seq: int, waypoint: Union[MissionItem, Tuple[float, float, float]],
+                      use_int: bool) -> None:
+    """
+    Отправка одного пункта миссии в ответ на запрос БПЛА.
+
+    Args:
+        master (Any): Соединение MAVLink.
+        seq (int): Номер пункта.
+        waypoint (Union[MissionItem, Tuple[float, float, float]]): Точка (lat, lon, alt)
+            (отправляется как MAV_CMD_NAV_WAYPOINT) или пункт миссии с собственной командой.
+        use_int (bool): Отправить MISSION_ITEM_INT вместо устаревшего MISSION_ITEM.
+    """
+    item = MissionItem.coerce(waypoint)
+    if use_int:
+        scale = 1e7 if item.frame in GLOBAL_FRAMES else 1
+        master.mav.mission_item_int_send(
+            master.target_system,
+            master.target_component,
+            seq,
+            _INT_FRAMES.get(item.frame, item.frame),
+            item.command,
+            0,  # current
+            int(item.autocontinue),
+            *item.params,
+            int(round(item.lat * scale)),
+            int(round(item.lon * scale)),
+            item.alt,
+            mavutil.mavlink.MAV_MISSION_TYPE_MISSION
+        )
+    else:
+        master.mav.mission_item_send(
+            master.target_system,
+            master.target_component,
+            seq,
+            _FLOAT_FRAMES.get(item.frame, item.frame),
+            item.command,
+            0,  # current
+            int(item.autocontinue),
+            *item.params,
+            item.lat, item.lon, item.alt,
+            mavutil.mavlink.MAV_MISSION_TYPE_MISSION
+        )
+
+
+# Цель SET_POSITION_TARGET_GLOBAL_INT задаётся только координатами: скорости, ускорения и курс игнорируются
+_POSITION_ONLY = (mavutil.mavlink.POSITION_TARGET_TYPEMASK_VX_IGNORE |
+                  mavutil.mavlink.POSITION_TARGET_TYPEMASK_VY_IGNORE |
+                  mavutil.mavlink.POSITION_TARGET_TYPEMASK_VZ_IGNORE |
+                  mavutil.mavlink.POSITION_TARGET_TYPEMASK_AX_IGNORE |
+                  mavutil.mavlink.POSITION_TARGET_TYPEMASK_AY_IGNORE |
+                  mavutil.mavlink.POSITION_TARGET_TYPEMASK_AZ_IGNORE |
+                  mavutil.mavlink.POSITION_TARGET_TYPEMASK_YAW_IGNORE |
+                  mavutil.mavlink.POSITION_TARGET_TYPEMASK_YAW_RATE_IGNORE)
+
+
+def send_position_target(master: Any, lat: float, lon: float, alt: float) -> None:
+    """
+    Отправка цели полёта в режиме GUIDED (SET_POSITION_TARGET_GLOBAL_INT).
+
+    Автопилот не подтверждает это сообщение: достижение цели
+    отслеживается по позиции (см. arrival_condition()).
+
+    Args:
+        master (Any): Соединение MAVLink.
+        lat (float): Широта целевой точки.
+        lon (float): Долгота целевой точки.
+        alt (float): Высота целевой точки в метрах (относительно точки старта).
+    """
+    master.mav.set_position_target_global_int_send(
+        0,  # time_boot_ms
+        master.target_system,
+        master.target_component,
+        mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT_INT,
+        _POSITION_ONLY,
+        int(round(lat * 1e7)),
+        int(round(lon * 1e7)),
+        alt,
+        0, 0, 0,  # скорость
+        0, 0, 0,  # ускорение
+        0, 0  # курс и скорость его изменения
+    )
+
+
+def mission_item_from_message(msg: Any) -> MissionItem:
+    """
+    Пункт миссии из сообщения MISSION_ITEM_INT или MISSION_ITEM.
+
+    Args:
+        msg (Any): Сообщение MAVLink.
+
+    Returns:
+        MissionItem: Пункт с координатами в градусах.
+    """
+    frame = msg.frame
+    lat, lon = msg.x, msg.y
+    if msg.get_type() == 'MISSION_ITEM_INT':
+        frame = _FLOAT_FRAMES.get(frame, frame)
+        scale = 1e7 if frame in GLOBAL_FRAMES else 1
+        lat, lon = lat / scale, lon / scale
+    return MissionItem(lat, lon, msg.z, msg.command, frame,
+                       (msg.param1, msg.param2, msg.param3, msg.param4), msg.autocontinue)
+
+
+class ModeTable:
+    """
+    Таблица режимов полёта соединения, пересчитываемая только при смене типа БПЛА или автопилота.
+    """
+
+    __slots__ = ('master', '_table', '_key')
+
+    def __init__(self, master: Any):
+        """
+        Args:
+            master (Any): Соединение MAVLink.
+        """
+        self.master = master
+        self._table: Optional[Dict[str, Any]] = None
+        self._key: Optional[Tuple[Any, Any]] = None
+
+    def get(self) -> Dict[str, Any]:
+        """
+        Текущая таблица режимов.
+
+        Returns:
+            Dict[str, Any]: Словарь "название режима -> номер режима".
+        """
+        key = (getattr(self.master, 'mav_type', None), getattr(self.master, 'mav_autopilot', None))
+        if self._table is None or self._key != key:
+            mode_mapping = self.master.mode_mapping()
+            if not isinstance(mode_mapping, dict):
+                logger.error("Ошибка: mode_mapping() не вернул словарь")
+                raise Exception("Не удалось получить список режимов полёта")
+            self._table = mode_mapping
+            self._key = key
+        return self._table
+
+
+def mode_condition(target_system: int, mode_id: int) -> Callable[[Any], bool]:
+    """
+    Фильтр HEARTBEAT целевого БПЛА с заданным режимом полёта.
+
+    Args:
+        target_system (int): Номер системы БПЛА.
+        mode_id (int): Ожидаемый custom_mode.
+
+    Returns:
+        Callable[[Any], bool]: Условие для подписки на HEARTBEAT.
+    """
+    def condition(msg: Any) -> bool:
+        return msg.get_srcSystem() == target_system and msg.custom_mode == mode_id
+    return condition
+
+
+# Сообщения, по которым определяется прибытие в точку
+ARRIVAL_TYPES = ('GLOBAL_POSITION_INT', 'MISSION_ITEM_REACHED', 'MISSION_CURRENT')
+
+
+def arrival_condition(lat: float, lon: float, alt: float, acceptance_radius: float,
+                      seq: Optional[int] = None) -> Callable[[Any], bool]:
+    """
+    Проверка прибытия в точку по одному из сообщений ARRIVAL_TYPES.
+
+    Args:
+        lat (float): Широта целевой точки.
+        lon (float): Долгота целевой точки.
+        alt (float): Высота целевой точки в метрах (относительно точки старта).
+        acceptance_radius (float): Радиус приёмки в метрах.
+        seq (Optional[int]): Номер пункта миссии для сообщений автопилота.
+
+    Returns:
+        Callable[[Any], bool]: Функция, возвращающая True для сообщения о прибытии.
+    """
+    def reached(msg: Any) -> bool:
+        msg_type = msg.get_type()
+        if msg_type == 'GLOBAL_POSITION_INT':
+            distance = distance_3d(msg.lat / 1e7, msg.lon / 1e7, msg.relative_alt / 1000, lat, lon, alt)
+            return distance <= acceptance_radius
+        if seq is None:
+            return False
+        if msg_type == 'MISSION_ITEM_REACHED':
+            return msg.seq == seq
+        if msg_type == 'MISSION_CURRENT':
+            return msg.seq > seq
+        return False
+    return reached
+
+
+class MissionUpload:
+    """
+    Состояние одной транзакции загрузки миссии (MISSION_COUNT / MISSION_REQUEST / MISSION_ACK).
+
+    Класс не читает соединение сам: владелец подписывается на MESSAGE_TYPES,
+    вызывает start(), а затем передаёт в feed() каждое принятое сообщение
+    или None по истечении времени ожидания, пока done не станет True.
+    Так один и тот же протокол используют UAVControl и AsyncUAVControl.
+    """
+
+    MESSAGE_TYPES = ('MISSION_REQUEST_INT', 'MISSION_REQUEST', 'MISSION_ACK')
+
+    def __init__(self, master: Any, waypoints: Sequence[Union[MissionItem, Tuple[float, float, float]]],
+                 count: int, max_retries: int = 5):
+        """
+        Args:
+            master (Any): Соединение MAVLink.
+            waypoints (Sequence[Union[MissionItem, Tuple[float, float, float]]]): Пункты миссии
+                с доступом по номеру (список или mission_files.ItemWindow).
+            count (int): Число пунктов.
+            max_retries (int): Число повторов подряд при отсутствии ответа.
+        """
+        if count == 0:
+            raise ValueError("Миссия не содержит точек")
+        self.master = master
+        self.waypoints = waypoints
+        self.count = count
+        self.max_retries = max_retries
+        self.done = False
+        self._last_request = None
+        self._retries = 0
+
+    def _send_count(self) -> None:
+        self.master.mav.mission_count_send(
+            self.master.target_system,
+            self.master.target_component,
+            self.count,
+            mavutil.mavlink.MAV_MISSION_TYPE_MISSION
+        )
+
+    def _send_item(self, request: Any) -> None:
+        send_mission_item(self.master, request.seq, self.waypoints[request.seq],
+                          request.get_type() == 'MISSION_REQUEST_INT')
+
+    def start(self) -> None:
+        """
+        Отправка MISSION_COUNT, открывающего транзакцию.
+        """
+        self._send_count()
+
+    def feed(self, msg: Optional[Any]) -> None:
+        """
+        Обработка очередного ответа БПЛА.
+
+        Args:
+            msg (Optional[Any]): MISSION_REQUEST_INT, MISSION_REQUEST или MISSION_ACK
+                либо None, если время ожидания истекло.
+
+        Raises:
+            Exception: Если миссия отклонена или превышено число повторов.
+        """
+        if msg is None:
+            self._retries += 1
+            if self._retries > self.max_retries:
+                raise Exception("Превышено время ожидания запроса пункта миссии")
+            if self._last_request is None:
+                self._send_count()
+            else:
+                self._send_item(self._last_request)
+            return
+
+        self._retries = 0
+        if msg.get_type() == 'MISSION_ACK':
+            if msg.type != mavutil.mavlink.MAV_MISSION_ACCEPTED:
+                raise Exception(f"Миссия отклонена с кодом {msg.type}")
+            self.done = True
+            return
+
+        if not 0 <= msg.seq < self.count:
+            logger.warning(f"Запрошен несуществующий пункт миссии {msg.seq}")
+            return
+        self._last_request = msg
+        self._send_item(msg)
+
 
 class UAVControl:
     """
     Класс для управления БПЛА через MAVLink.
     """
 
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, background_receiver: bool = False,
+                 master: Optional[Any] = None, selective_decode: bool = False,
+                 tracer: Optional[Any] = None):
         """
         Инициализация подключения к БПЛА.
 
         Args:
             connection_string (str): Строка подключения MAVLink.
+            background_receiver (bool): Запустить фоновый поток приёма MAVLink
+                с кэшем последних сообщений каждого типа.
+            master (Optional[Any]): Уже открытое соединение; если задано,
+                connection_string используется только как имя.
+            selective_decode (bool): Декодировать только используемые типы сообщений
+                (остальные кадры пропускаются по заголовку без распаковки).
+            tracer (Optional[Any]): Трассировщик операций (tracing.Tracer); по умолчанию выключен.
         """
+        self.tracer = tracer if tracer is not None else NULL_TRACER
         try:
-            self.master = mavutil.mavlink_connection(connection_string)
+            self.master = master if master is not None else open_connection(connection_string)
             self.master.wait_heartbeat()
             logger.info("Соединение установлено")
             self.seq = 0  # Инициализация последовательного номера миссии
@@ -31,30 +381,320 @@ class UAVControl:
             logger.error(f"Ошибка подключения: {e}")
             raise
 
+        self.receiver = MavlinkReceiver(self.master, selective_decode=selective_decode)
+        self.receiver.want(TELEMETRY_TYPES)
+        self.ack_router = CommandAckRouter()
+        self.receiver.add_listener(self.ack_router.dispatch, ['COMMAND_ACK'])
+        self.commands = CommandPipeline(self.master, self.ack_router)
+        self.stream_rates = StreamRateManager(self.send_command, self.receiver)
+        self.metrics = MetricsRegistry()
+        self._register_metrics()
+        self.telemetry_buffer: Optional[TelemetryRingBuffer] = None
+        self._geofence_listener: Optional[Callable[[Any], None]] = None
+        self._modes = ModeTable(self.master)
+        if background_receiver:
+            self.receiver.start()
+
+    def _register_metrics(self) -> None:
+        """
+        Регистрация метрик соединения, приёма и команд.
+
+        Счётчики pymavlink (mav_count, mav_loss, ошибки разбора) и время
+        ожидания в recv_match() читаются в момент запроса метрик; на каждое
+        принятое сообщение приходится только увеличение счётчика его типа.
+        """
+        master, receiver = self.master, self.receiver
+
+        def decode_errors() -> int:
+            errors = getattr(getattr(master, 'mav', None), 'total_receive_errors', 0)
+            if receiver.decoder is not None:
+                errors += receiver.decoder.bad_frames
+            return errors
+
+        self._messages_received = self.metrics.counter(
+            'mavlink_messages_received_total', 'Принятые сообщения MAVLink по типам')
+        self.metrics.counter('mavlink_packets_received_total', 'Принятые пакеты MAVLink',
+                             lambda: getattr(master, 'mav_count', 0))
+        self.metrics.counter('mavlink_packets_lost_total', 'Пакеты, потерянные по разрывам номеров последовательности',
+                             lambda: getattr(master, 'mav_loss', 0))
+        self.metrics.counter('mavlink_decode_errors_total', 'Кадры с ошибкой разбора или CRC', decode_errors)
+        self.metrics.counter('mavlink_recv_blocked_seconds_total', 'Время ожидания в recv_match()',
+                             lambda: receiver.recv_blocked)
+        self.metrics.gauge('mavlink_receive_backlog', 'Непрочитанные сообщения в подписках', receiver.backlog)
+        self.metrics.gauge('mavlink_link_utilization', 'Загрузка канала по оценке StreamRateManager',
+                           lambda: self.stream_rates.utilization)
+        self._ack_latency = self.metrics.histogram(
+            'mavlink_command_ack_latency_seconds', 'Время от отправки COMMAND_LONG до окончательного COMMAND_ACK')
+        self._command_failures = self.metrics.counter(
+            'mavlink_command_failures_total', 'Команды без подтверждения после всех повторов')
+        self.receiver.add_listener(self._count_message)
+
+    def _count_message(self, msg: Any) -> None:
+        self._messages_received.inc(type=msg.get_type())
+
+    def _record_command(self, command: int, started: float, future: futures.Future) -> None:
+        """
+        Учёт задержки подтверждения или отказа команды в метриках.
+        """
+        if future.cancelled():
+            return
+        entry = mavutil.mavlink.enums['MAV_CMD'].get(command)
+        name = entry.name if entry is not None else str(command)
+        if future.exception() is not None:
+            self._command_failures.inc(command=name)
+        else:
+            self._ack_latency.observe(time.monotonic() - started, command=name)
+
+    def serve_metrics(self, port: int = 9102, host: str = '127.0.0.1') -> Tuple[str, int]:
+        """
+        Запуск локального HTTP-сервера с метриками в текстовом формате Prometheus.
+
+        Args:
+            port (int): Порт (0 — любой свободный).
+            host (str): Адрес прослушивания.
+
+        Returns:
+            Tuple[str, int]: Фактический адрес сервера.
+        """
+        return self.metrics.serve(port, host)
+
+    def start_receiver(self) -> None:
+        """
+        Запуск фонового приёма MAVLink.
+
+        После запуска все чтения из соединения выполняет поток приёмника,
+        а get_telemetry() возвращает данные из кэша без обращения к сокету.
+        """
+        self.receiver.start()
+
+    def stop_receiver(self) -> None:
+        """
+        Остановка фонового приёма MAVLink.
+        """
+        self.receiver.stop()
+
+    def record_telemetry(self, capacity: int = 3000,
+                         spill_path: Optional[str] = None) -> TelemetryRingBuffer:
+        """
+        Включение записи телеметрии в кольцевой буфер.
+
+        Буфер заполняется из потока приёма, поэтому приёмник должен быть
+        запущен (start_receiver()) или получать сообщения извне.
+
+        Args:
+            capacity (int): Число хранимых в памяти записей.
+            spill_path (Optional[str]): Файл для полной записи полёта на диск.
+
+        Returns:
+            TelemetryRingBuffer: Буфер телеметрии.
+        """
+        self.stop_recording()
+        self.telemetry_buffer = TelemetryRingBuffer(capacity, spill_path)
+        self.receiver.add_listener(self.telemetry_buffer.feed, TELEMETRY_TYPES)
+        return self.telemetry_buffer
+
+    def stop_recording(self) -> None:
+        """
+        Отключение буфера телеметрии и закрытие файла записи.
+        """
+        buffer = self.telemetry_buffer
+        if buffer is None:
+            return
+        self.receiver.remove_listener(buffer.feed)
+        buffer.close()
+        self.telemetry_buffer = None
+
+    def monitor_geofence(self, geofence: Any,
+                         on_breach: Optional[Callable[[List[Any], Any], None]] = None) -> None:
+        """
+        Проверка каждой принятой позиции по запретным зонам.
+
+        Позиции GLOBAL_POSITION_INT (высота относительно точки старта)
+        проверяются в потоке приёма; о входе в зону сообщается один раз,
+        пока набор нарушенных зон не изменится.
+
+        Args:
+            geofence (Any): Набор зон (geofence.Geofence).
+            on_breach (Optional[Callable[[List[Any], Any], None]]): Обработчик
+                нарушения, получает список зон и сообщение с позицией.
+        """
+        self.stop_geofence_monitor()
+        inside: List[Any] = []
+
+        def check(msg: Any) -> None:
+            zones = geofence.zones_at(msg.lat / 1e7, msg.lon / 1e7, msg.relative_alt / 1000)
+            if zones == inside:
+                return
+            inside[:] = zones
+            if zones:
+                logger.error(f"БПЛА в запретной зоне: {', '.join(zone.name for zone in zones)}")
+                if on_breach is not None:
+                    on_breach(zones, msg)
+
+        self._geofence_listener = check
+        self.receiver.add_listener(check, ['GLOBAL_POSITION_INT'])
+
+    def stop_geofence_monitor(self) -> None:
+        """
+        Отключение проверки позиций по запретным зонам.
+        """
+        if self._geofence_listener is not None:
+            self.receiver.remove_listener(self._geofence_listener)
+            self._geofence_listener = None
+
+    def close(self) -> None:
+        """
+        Остановка приёма и закрытие соединения MAVLink.
+        """
+        self.receiver.stop()
+        self.stop_recording()
+        self.stop_geofence_monitor()
+        self.stream_rates.close()
+        self.metrics.stop_serving()
+        self.master.close()
+        logger.info("Соединение закрыто")
+
+    def _armed_condition(self, armed: bool):
+        """
+        Фильтр HEARTBEAT целевого БПЛА с заданным состоянием взведения.
+        """
+        def condition(msg: Any) -> bool:
+            if msg.get_srcSystem() != self.master.target_system:
+                return False
+            is_armed = bool(msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED)
+            return is_armed == armed
+        return condition
+
+    def _wait_armed_state(self, armed: bool, timeout: float = 10) -> None:
+        """
+        Ожидание HEARTBEAT с нужным состоянием взведения через фоновый приёмник.
+
+        Args:
+            armed (bool): Ожидаемое состояние.
+            timeout (float): Время ожидания в секундах.
+        """
+        with self.receiver.subscribe(['HEARTBEAT'], self._armed_condition(armed)) as sub:
+            if armed:
+                self.master.arducopter_arm()
+            else:
+                self.master.arducopter_disarm()
+            if sub.get(timeout) is None:
+                raise Exception("Не получено подтверждение состояния двигателей")
+
+    def _recv_match(self, msg_type: str, timeout: float) -> Optional[Any]:
+        """
+        Ожидание сообщения заданного типа.
+
+        Сообщения других типов, принятые во время ожидания, не теряются:
+        они попадают в кэш приёмника и к остальным подписчикам.
+
+        Args:
+            msg_type (str): Тип сообщения MAVLink.
+            timeout (float): Время ожидания в секундах.
+
+        Returns:
+            Optional[Any]: Сообщение или None.
+        """
+        with self.receiver.subscribe([msg_type]) as sub:
+            return sub.get(timeout)
+
+    def _wait_future(self, future: futures.Future, timeout: float) -> bool:
+        """
+        Ожидание завершения future с чтением соединения при необходимости.
+
+        Args:
+            future (futures.Future): Ожидаемый результат.
+            timeout (float): Время ожидания в секундах.
+
+        Returns:
+            bool: True, если future завершён до истечения таймаута.
+        """
+        deadline = time.monotonic() + timeout
+        while not future.done():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self.receiver.running:
+                futures.wait([future], timeout=remaining)
+            else:
+                self.receiver.poll(min(remaining, self.receiver.poll_timeout))
+        return True
+
+    def expect_command_ack(self, command: int) -> futures.Future:
+        """
+        Регистрация ожидания COMMAND_ACK до отправки команды.
+
+        Args:
+            command (int): Код команды MAVLink.
+
+        Returns:
+            futures.Future: Future с сообщением COMMAND_ACK; передаётся в wait_command_ack().
+        """
+        return self.ack_router.expect(command, self.master.target_system)
+
+    def request_stream(self, msg_type: str, rate: float, min_rate: Optional[float] = None) -> None:
+        """
+        Запрос частоты сообщений у автопилота (MAV_CMD_SET_MESSAGE_INTERVAL).
+
+        При перегрузке канала частота может быть временно снижена, но не ниже min_rate.
+
+        Args:
+            msg_type (str): Тип сообщения MAVLink (например, 'GLOBAL_POSITION_INT').
+            rate (float): Желаемая частота в Гц.
+            min_rate (Optional[float]): Минимально допустимая частота в Гц.
+        """
+        self.stream_rates.request(msg_type, rate, owner=self, min_rate=min_rate)
+
+    @traced(args=('command',))
+    def send_command(self, command: int, *params: float) -> futures.Future:
+        """
+        Отправка COMMAND_LONG через конвейер команд с повторами.
+
+        Args:
+            command (int): Код команды MAVLink.
+            *params (float): Параметры param1..param7.
+
+        Returns:
+            futures.Future: Future с окончательным COMMAND_ACK; передаётся в wait_command_ack().
+        """
+        started = time.monotonic()
+        future = self.commands.send(command, *params)
+        future.add_done_callback(lambda f: self._record_command(command, started, f))
+        return future
+
+    @traced()
     def arm(self) -> None:
         """
         Взведение (Arm) БПЛА для начала работы двигателей.
         """
         try:
-            self.master.arducopter_arm()
-            self.master.motors_armed_wait()
+            if self.receiver.running:
+                self._wait_armed_state(True)
+            else:
+                self.master.arducopter_arm()
+                self.master.motors_armed_wait()
             logger.info("БПЛА взведён")
         except Exception as e:
             logger.error(f"Ошибка взведения БПЛА: {e}")
             raise
 
+    @traced()
     def disarm(self) -> None:
         """
         Разоружение (Disarm) БПЛА для остановки двигателей.
         """
         try:
-            self.master.arducopter_disarm()
-            self.master.motors_disarmed_wait()
+            if self.receiver.running:
+                self._wait_armed_state(False)
+            else:
+                self.master.arducopter_disarm()
+                self.master.motors_disarmed_wait()
             logger.info("БПЛА разоружён")
         except Exception as e:
             logger.error(f"Ошибка разоружения БПЛА: {e}")
             raise
 
+    @traced(args=('altitude',))
     def takeoff(self, altitude: float) -> None:
         """
         Команда на взлёт до заданной высоты.
@@ -69,85 +709,133 @@ class UAVControl:
             self.set_mode('GUIDED')
 
             # Получение текущих координат
-            msg = self.master.recv_match(type='GLOBAL_POSITION_INT', blocking=True, timeout=5)
+            with self.tracer.span('UAVControl.takeoff.wait_position'):
+                msg = self.receiver.latest('GLOBAL_POSITION_INT') if self.receiver.running else None
+                if msg is None:
+                    msg = self._recv_match('GLOBAL_POSITION_INT', timeout=5)
             if msg:
                 current_lat = msg.lat / 1e7
                 current_lon = msg.lon / 1e7
             else:
                 raise Exception("Не удалось получить текущие координаты для взлёта")
 
-            self.master.mav.command_long_send(
-                self.master.target_system,
-                self.master.target_component,
+            pending = self.send_command(
                 mavutil.mavlink.MAV_CMD_NAV_TAKEOFF,
-                0,
                 0, 0, 0, 0,
                 current_lat,  # param5: Широта взлёта
                 current_lon,  # param6: Долгота взлёта
                 altitude      # param7: Высота взлёта
             )
 
-            if not self.wait_command_ack(mavutil.mavlink.MAV_CMD_NAV_TAKEOFF):
+            if not self.wait_command_ack(mavutil.mavlink.MAV_CMD_NAV_TAKEOFF, pending=pending):
                 raise Exception("Команда взлёта не подтверждена")
             logger.info(f"Взлёт на высоту {altitude} метров")
         except Exception as e:
             logger.error(f"Ошибка взлёта: {e}")
             raise
 
-    def set_mode(self, mode: str) -> None:
+    @traced()
+    def land(self) -> None:
         """
-        Установка режима полёта БПЛА.
+        Команда на посадку в текущей точке.
+        """
+        try:
+            pending = self.send_command(mavutil.mavlink.MAV_CMD_NAV_LAND)
+
+            if not self.wait_command_ack(mavutil.mavlink.MAV_CMD_NAV_LAND, pending=pending):
+                raise Exception("Команда посадки не подтверждена")
+            logger.info("Посадка начата")
+        except Exception as e:
+            logger.error(f"Ошибка посадки: {e}")
+            raise
+
+    def mode_table(self) -> Dict[str, Any]:
+        """
+        Таблица режимов полёта для текущего типа БПЛА и автопилота.
+
+        Таблица запрашивается у соединения один раз и пересчитывается,
+        только если в HEARTBEAT сменился тип БПЛА или автопилота.
+
+        Returns:
+            Dict[str, Any]: Словарь "название режима -> номер режима".
+        """
+        return self._modes.get()
+
+    @traced(args=('mode',))
+    def set_mode(self, mode: str, timeout: float = 1.5, retries: int = 2) -> None:
+        """
+        Установка режима полёта БПЛА с подтверждением по HEARTBEAT.
+
+        Команда повторяется, пока в HEARTBEAT не появится нужный custom_mode.
+        Если БПЛА уже находится в этом режиме, команда не отправляется.
 
         Args:
             mode (str): Название режима (например, 'GUIDED', 'LAND').
+            timeout (float): Время ожидания подтверждения одной попытки в секундах.
+            retries (int): Число повторных отправок команды.
         """
-        mode_mapping = self.master.mode_mapping()
-        if not isinstance(mode_mapping, dict):
-            logger.error("Ошибка: mode_mapping() не вернул словарь")
-            raise Exception("Не удалось получить список режимов полёта")
-
-        mode_id = mode_mapping.get(mode)
+        mode_id = self.mode_table().get(mode)
         if mode_id is None:
             raise ValueError(f"Неизвестный режим: {mode}")
 
+        if not isinstance(mode_id, int):
+            # PX4: номер режима — кортеж, custom_mode в HEARTBEAT с ним напрямую не сравнить
+            try:
+                self.master.set_mode(mode_id)
+                logger.info(f"Режим установлен: {mode}")
+            except Exception as e:
+                logger.error(f"Ошибка установки режима {mode}: {e}")
+                raise
+            return
+
+        condition = mode_condition(self.master.target_system, mode_id)
+        heartbeat = self.receiver.latest('HEARTBEAT') if self.receiver.running else None
+        if heartbeat is not None and condition(heartbeat):
+            logger.info(f"Режим {mode} уже установлен")
+            return
+
         try:
-            self.master.set_mode(mode_id)
-            logger.info(f"Режим установлен: {mode}")
+            with self.receiver.subscribe(['HEARTBEAT'], condition) as sub:
+                for attempt in range(retries + 1):
+                    self.master.set_mode(mode_id)
+                    if sub.get(timeout) is not None:
+                        logger.info(f"Режим установлен: {mode}")
+                        return
+                    logger.warning(f"Режим {mode} не подтверждён, попытка {attempt + 1}")
+            raise Exception(f"БПЛА не перешёл в режим {mode}")
         except Exception as e:
             logger.error(f"Ошибка установки режима {mode}: {e}")
             raise
 
-    def get_telemetry(self) -> Optional[Dict[str, float]]:
+    def _cached_telemetry(self) -> TelemetrySnapshot:
+        """
+        Сборка полного снимка телеметрии из кэша фонового приёмника.
+        """
+        return telemetry_from_messages(self.receiver.snapshot(TELEMETRY_TYPES))
+
+    def get_telemetry(self) -> Optional[TelemetrySnapshot]:
         """
         Получение телеметрических данных от БПЛА.
 
+        При работающем фоновом приёмнике возвращается полный снимок
+        (координаты, скорость, батарея, ориентация) из кэша без чтения сокета.
+
         Returns:
-            Optional[Dict[str, float]]: Словарь с телеметрическими данными или None.
+            Optional[TelemetrySnapshot]: Снимок телеметрии (только для чтения,
+            to_dict() — обычный словарь) или None.
         """
         try:
+            if self.receiver.running:
+                telemetry = self._cached_telemetry()
+                if telemetry:
+                    return telemetry
+                logger.warning("Телеметрия недоступна")
+                return None
+
             msg = self.master.recv_match(
                 type=['GLOBAL_POSITION_INT', 'ATTITUDE'], blocking=True, timeout=5)
             if msg:
-                telemetry = {}
-                if msg.get_type() == 'GLOBAL_POSITION_INT':
-                    telemetry['lat'] = msg.lat / 1e7
-                    telemetry['lon'] = msg.lon / 1e7
-                    telemetry['alt'] = msg.alt / 1000
-                    if not -90.0 <= telemetry['lat'] <= 90.0:
-                        raise ValueError("Некорректная широта")
-                    if not -180.0 <= telemetry['lon'] <= 180.0:
-                        raise ValueError("Некорректная долгота")
-                elif msg.get_type() == 'ATTITUDE':
-                    telemetry['roll'] = msg.roll
-                    telemetry['pitch'] = msg.pitch
-                    telemetry['yaw'] = msg.yaw
-                    if not -math.pi <= telemetry['roll'] <= math.pi:
-                        raise ValueError("Некорректный крен")
-                    if not -math.pi/2 <= telemetry['pitch'] <= math.pi/2:
-                        raise ValueError("Некорректный тангаж")
-                    if not -math.pi <= telemetry['yaw'] <= math.pi:
-                        raise ValueError("Некорректное рыскание")
-                return telemetry
+                return telemetry_from_messages({msg.get_type(): msg})
             else:
                 logger.warning("Телеметрия недоступна")
                 return None
@@ -155,65 +843,280 @@ class UAVControl:
             logger.error(f"Ошибка получения телеметрии: {e}")
             return None
 
-    def wait_command_ack(self, command: int, timeout: int = 10) -> bool:
+    def _sleep_until(self, moment: float) -> None:
+        """
+        Ожидание момента time.monotonic() с чтением соединения, если приёмник не запущен.
+        """
+        while True:
+            remaining = moment - time.monotonic()
+            if remaining <= 0:
+                return
+            if self.receiver.running:
+                time.sleep(remaining)
+            else:
+                self.receiver.poll(min(remaining, self.receiver.poll_timeout))
+
+    def iter_telemetry(self, rate_hz: float = 10.0, fields: Optional[Iterable[str]] = None,
+                       duration: Optional[float] = None) -> Iterator[TelemetrySnapshot]:
+        """
+        Поток объединённых снимков телеметрии с заданной частотой.
+
+        Снимок собирается из кэша последних сообщений всех типов в момент
+        выдачи, поэтому медленный потребитель получает самые свежие данные,
+        а промежуточные снимки не накапливаются в очереди.
+
+        Args:
+            rate_hz (float): Частота выдачи снимков в Гц.
+            fields (Optional[Iterable[str]]): Нужные поля (None — все доступные).
+            duration (Optional[float]): Длительность потока в секундах (None — без ограничения).
+
+        Yields:
+            TelemetrySnapshot: Снимок телеметрии с полем 'timestamp' — временем
+            приёма самого свежего сообщения.
+        """
+        if rate_hz <= 0:
+            raise ValueError("Частота должна быть положительной")
+        fields = list(fields) if fields is not None else None
+        period = 1.0 / rate_hz
+        next_tick = time.monotonic()
+        end = None if duration is None else next_tick + duration
+        while end is None or next_tick <= end:
+            self._sleep_until(next_tick)
+            messages = self.receiver.snapshot(TELEMETRY_TYPES)
+            if messages:
+                ages = [self.receiver.age(msg_type) for msg_type in messages]
+                try:
+                    snapshot = merged_snapshot(messages, time.time() - min(ages), fields)
+                except ValueError as e:
+                    logger.error(f"Ошибка получения телеметрии: {e}")
+                else:
+                    yield snapshot
+            now = time.monotonic()
+            next_tick += period
+            if next_tick < now:
+                next_tick = now  # потребитель не успевает: пропущенные снимки не копятся
+
+    @traced(args=('command',))
+    def wait_command_ack(self, command: int, timeout: int = 10,
+                         pending: Optional[futures.Future] = None) -> bool:
         """
         Ожидание подтверждения выполнения команды.
 
+        Подтверждение приходит через маршрутизатор COMMAND_ACK, поэтому
+        телеметрия и подтверждения других команд во время ожидания не теряются.
+
         Args:
             command (int): Код команды MAVLink.
             timeout (int): Время ожидания в секундах.
+            pending (Optional[futures.Future]): Ожидание из send_command() или
+                зарегистрированное через expect_command_ack() до отправки команды.
 
         Returns:
             bool: True, если команда подтверждена, False в противном случае.
         """
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            ack_msg = self.master.recv_match(type='COMMAND_ACK', blocking=True, timeout=1)
-            if ack_msg and ack_msg.command == command:
-                if ack_msg.result == mavutil.mavlink.MAV_RESULT_ACCEPTED:
-                    logger.info(f"Команда {command} подтверждена")
-                    return True
-                else:
-                    logger.error(f"Команда {command} отклонена с кодом {ack_msg.result}")
-                    return False
-        logger.error(f"Не получено подтверждение для команды {command}")
+        if pending is None:
+            pending = self.expect_command_ack(command)
+        if not self._wait_future(pending, timeout):
+            self.ack_router.cancel(pending)
+            logger.error(f"Не получено подтверждение для команды {command}")
+            return False
+
+        if pending.exception() is not None:
+            logger.error(f"Команда {command} не подтверждена: {pending.exception()}")
+            return False
+        ack_msg = pending.result()
+        if ack_msg.result == mavutil.mavlink.MAV_RESULT_ACCEPTED:
+            logger.info(f"Команда {command} подтверждена")
+            return True
+        logger.error(f"Команда {command} отклонена с кодом {ack_msg.result}")
         return False
 
+    @traced(args=('lat', 'lon', 'alt'))
     def goto(self, lat: float, lon: float, alt: float) -> None:
         """
-        Команда на полёт к заданным координатам.
+        Команда на полёт к заданным координатам в режиме GUIDED.
+
+        Цель передаётся одним сообщением SET_POSITION_TARGET_GLOBAL_INT
+        без ожидания подтверждения; прибытие отслеживается wait_arrival()
+        по позиции.
 
         Args:
             lat (float): Широта целевой точки.
             lon (float): Долгота целевой точки.
-            alt (float): Высота целевой точки в метрах.
+            alt (float): Высота целевой точки в метрах (относительно точки старта).
         """
         try:
-            # Отправка количества миссий (1 пункт)
-            self.master.mav.mission_count_send(
-                self.master.target_system,
-                self.master.target_component,
-                1,  # Количество пунктов миссии
-                mavutil.mavlink.MAV_MISSION_TYPE_MISSION
-            )
-            time.sleep(1)  # Задержка для обработки
-
-            self.master.mav.mission_item_send(
-                self.master.target_system,
-                self.master.target_component,
-                0,  # Последовательный номер миссии
-                mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT,  # Исправленный фрейм
-                mavutil.mavlink.MAV_CMD_NAV_WAYPOINT,
-                0,  # current
-                1,  # autocontinue
-                0, 0, 0, 0,
-                lat, lon, alt
-            )
-
-            if not self.wait_command_ack(mavutil.mavlink.MAV_CMD_NAV_WAYPOINT):
-                raise Exception("Команда полёта к точке не подтверждена")
-
+            send_position_target(self.master, lat, lon, alt)
             logger.info(f"Летим к точке ({lat}, {lon}, {alt})")
         except Exception as e:
             logger.error(f"Ошибка при полёте к точке: {e}")
             raise
+
+    @traced()
+    def upload_mission(self, waypoints: Iterable[Union[MissionItem, Tuple[float, float, float]]],
+                       item_timeout: float = 1.5, max_retries: int = 5, count: Optional[int] = None,
+                       window: int = 64) -> None:
+        """
+        Загрузка всей миссии за одну транзакцию протокола MAVLink Mission.
+
+        Отправляется MISSION_COUNT, затем на каждый MISSION_REQUEST_INT
+        (или MISSION_REQUEST) высылается запрошенный пункт, пока БПЛА
+        не ответит MISSION_ACK. Повторно передаются только те пункты,
+        которые БПЛА запросил ещё раз (см. MissionUpload).
+
+        Вместо списка можно передать итерируемый объект (например,
+        mission_files.MissionFile или генератор): пункты читаются по мере
+        запросов БПЛА, а для повторной передачи хранятся только последние
+        window пунктов.
+
+        Args:
+            waypoints (Iterable[Union[MissionItem, Tuple[float, float, float]]]): Точки (lat, lon, alt)
+                или пункты миссии.
+            item_timeout (float): Время ожидания очередного запроса в секундах.
+            max_retries (int): Число повторов подряд при отсутствии ответа.
+            count (Optional[int]): Число пунктов, если waypoints не поддерживает len().
+            window (int): Число последних пунктов итератора, доступных для повторной передачи.
+        """
+        if count is None:
+            count = len(waypoints)
+        if not isinstance(waypoints, Sequence):
+            waypoints = ItemWindow(waypoints, window)
+        upload = MissionUpload(self.master, waypoints, count, max_retries)
+
+        def from_target(msg: Any) -> bool:
+            return msg.get_srcSystem() == self.master.target_system
+
+        try:
+            with self.receiver.subscribe(MissionUpload.MESSAGE_TYPES, from_target) as sub:
+                upload.start()
+                while not upload.done:
+                    upload.feed(sub.get(item_timeout))
+            logger.info(f"Миссия из {count} точек загружена")
+        except Exception as e:
+            logger.error(f"Ошибка загрузки миссии: {e}")
+            raise
+
+    def download_mission(self, item_timeout: float = 1.5, max_retries: int = 5) -> Iterator[MissionItem]:
+        """
+        Потоковая выгрузка миссии с БПЛА.
+
+        Отправляется MISSION_REQUEST_LIST, после MISSION_COUNT пункты
+        запрашиваются по одному через MISSION_REQUEST_INT и выдаются по мере
+        получения, без накопления списка; после последнего пункта БПЛА
+        получает MISSION_ACK. Генератор можно передать прямо
+        в mission_files.write_mission().
+
+        Args:
+            item_timeout (float): Время ожидания очередного ответа в секундах.
+            max_retries (int): Число повторов запроса подряд при отсутствии ответа.
+
+        Yields:
+            MissionItem: Пункты миссии по порядку.
+
+        Raises:
+            Exception: Если БПЛА перестал отвечать.
+        """
+        mission_type = mavutil.mavlink.MAV_MISSION_TYPE_MISSION
+
+        def from_target(msg: Any) -> bool:
+            return msg.get_srcSystem() == self.master.target_system
+
+        def request(seq: Optional[int]) -> None:
+            if seq is None:
+                self.master.mav.mission_request_list_send(
+                    self.master.target_system, self.master.target_component, mission_type)
+            else:
+                self.master.mav.mission_request_int_send(
+                    self.master.target_system, self.master.target_component, seq, mission_type)
+
+        with self.receiver.subscribe(['MISSION_COUNT', 'MISSION_ITEM_INT', 'MISSION_ITEM'], from_target) as sub:
+            request(None)
+            count = None
+            seq = 0
+            retries = 0
+            while count is None or seq < count:
+                msg = sub.get(item_timeout)
+                if msg is None:
+                    retries += 1
+                    if retries > max_retries:
+                        logger.error("Превышено время ожидания ответа при выгрузке миссии")
+                        raise Exception("Превышено время ожидания ответа при выгрузке миссии")
+                    request(None if count is None else seq)
+                    continue
+                if msg.get_type() == 'MISSION_COUNT':
+                    if count is None:
+                        count = msg.count
+                        retries = 0
+                        if count:
+                            request(0)
+                    continue
+                if count is None or msg.seq != seq:
+                    continue
+                retries = 0
+                item = mission_item_from_message(msg)
+                seq += 1
+                if seq < count:
+                    request(seq)
+                yield item
+            self.master.mav.mission_ack_send(
+                self.master.target_system, self.master.target_component,
+                mavutil.mavlink.MAV_MISSION_ACCEPTED, mission_type)
+        logger.info(f"Выгружено пунктов миссии: {count}")
+
+    @traced()
+    def start_mission(self) -> None:
+        """
+        Запуск загруженной миссии в режиме AUTO.
+        """
+        try:
+            self.set_mode('AUTO')
+            pending = self.send_command(mavutil.mavlink.MAV_CMD_MISSION_START)
+            if not self.wait_command_ack(mavutil.mavlink.MAV_CMD_MISSION_START, pending=pending):
+                raise Exception("Команда запуска миссии не подтверждена")
+            logger.info("Миссия запущена")
+        except Exception as e:
+            logger.error(f"Ошибка запуска миссии: {e}")
+            raise
+
+    @traced(args=('lat', 'lon', 'alt', 'acceptance_radius', 'timeout', 'seq'))
+    def wait_arrival(self, lat: float, lon: float, alt: float, acceptance_radius: float = 2.0,
+                     timeout: float = 60, seq: Optional[int] = None) -> bool:
+        """
+        Ожидание прибытия БПЛА в точку по потоку сообщений.
+
+        Прибытие фиксируется, как только расстояние по GLOBAL_POSITION_INT
+        (высота относительно точки старта) становится не больше радиуса
+        приёмки, либо когда автопилот сообщает о достижении пункта миссии
+        seq через MISSION_ITEM_REACHED или переходит к следующему пункту
+        (MISSION_CURRENT).
+
+        Args:
+            lat (float): Широта целевой точки.
+            lon (float): Долгота целевой точки.
+            alt (float): Высота целевой точки в метрах (относительно точки старта).
+            acceptance_radius (float): Радиус приёмки в метрах.
+            timeout (float): Время ожидания в секундах.
+            seq (Optional[int]): Номер пункта миссии для сообщений автопилота.
+
+        Returns:
+            bool: True, если точка достигнута до истечения таймаута.
+        """
+        reached = arrival_condition(lat, lon, alt, acceptance_radius, seq)
+
+        def from_target(msg: Any) -> bool:
+            return msg.get_srcSystem() == self.master.target_system
+
+        with self.receiver.subscribe(ARRIVAL_TYPES, from_target) as sub:
+            position = self.receiver.latest('GLOBAL_POSITION_INT') if self.receiver.running else None
+            if position is not None and reached(position):
+                return True
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                msg = sub.get(remaining)
+                if msg is None:
+                    return False
+                if reached(msg):
+                    return True